@@ -0,0 +1,109 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_question(text: str) -> str:
+    """Normalisasi pertanyaan untuk key exact-match (huruf kecil, tanpa tanda baca, spasi rapat)."""
+    text = (text or "").lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _unit(vec):
+    if vec is None:
+        return None
+    v = np.asarray(vec, dtype=np.float32)
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else None
+
+
+class AnswerCache:
+    """
+    Cache jawaban LLM dua tingkat:
+      1) exact   : key = (signature dataset, pertanyaan ternormalisasi)
+      2) semantic: cosine similarity embedding pertanyaan >= threshold
+    Eviction LRU (max_entries) + TTL. Semua entry terikat ke signature dataset,
+    jadi cache otomatis tidak terpakai lagi begitu dataset berganti.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: float = 3600.0, similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._data = OrderedDict()  # (sig, norm) -> (answer, unit_embedding, created_at)
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl > 0 and (now - created_at) > self.ttl
+
+    def get(self, question: str, signature: int, embedding=None, count_miss: bool = True):
+        """
+        Return (answer, tier) atau None. tier = "exact" | "semantic".
+        count_miss=False dipakai untuk cek exact dulu sebelum menghitung embedding.
+        """
+        key = (signature, normalize_question(question))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if self._expired(entry[2], now):
+                    del self._data[key]
+                    self.counters["evictions"] += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.counters["exact_hits"] += 1
+                    return entry[0], "exact"
+
+            q = _unit(embedding)
+            if q is not None and self.similarity_threshold > 0:
+                best_key, best_sim = None, self.similarity_threshold
+                for k, (_, vec, created_at) in self._data.items():
+                    if k[0] != signature or vec is None or self._expired(created_at, now):
+                        continue
+                    sim = float(np.dot(q, vec))
+                    if sim >= best_sim:
+                        best_key, best_sim = k, sim
+                if best_key is not None:
+                    self._data.move_to_end(best_key)
+                    self.counters["semantic_hits"] += 1
+                    return self._data[best_key][0], "semantic"
+
+            if count_miss:
+                self.counters["misses"] += 1
+            return None
+
+    def put(self, question: str, signature: int, answer: str, embedding=None) -> None:
+        key = (signature, normalize_question(question))
+        with self._lock:
+            self._data[key] = (answer, _unit(embedding), time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, keep_signature: int = None) -> int:
+        """Hapus semua entry (atau semua kecuali milik keep_signature)."""
+        with self._lock:
+            if keep_signature is None:
+                n = len(self._data)
+                self._data.clear()
+            else:
+                stale = [k for k in self._data if k[0] != keep_signature]
+                for k in stale:
+                    del self._data[k]
+                n = len(stale)
+            self.counters["invalidations"] += 1
+            return n
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            c["size"] = len(self._data)
+        lookups = c["exact_hits"] + c["semantic_hits"] + c["misses"]
+        c["hit_rate"] = (c["exact_hits"] + c["semantic_hits"]) / lookups if lookups else 0.0
+        return c
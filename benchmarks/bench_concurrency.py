@@ -0,0 +1,142 @@
+"""
+Benchmark concurrency main.handle_message.
+
+Mensimulasikan N user yang mengirim pesan bersamaan ke handle_message dengan
+chain palsu (retrieval blocking + LLM I/O) supaya tidak butuh Telegram/Groq.
+Dibandingkan dua mode:
+  - legacy : chain.invoke() sinkron di dalam handler (perilaku lama)
+  - async  : chain.ainvoke() (perilaku sekarang)
+
+Jalankan:
+    python benchmarks/bench_concurrency.py --users 1 2 4 8 16 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "bench-dummy")
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import main
+
+
+# ============================================================
+# Chain palsu
+# ============================================================
+def make_fake_chain(retrieve_ms: float, llm_ms: float):
+    def retrieve(q):
+        time.sleep(retrieve_ms / 1000)  # embedding + Chroma (CPU/IO blocking)
+        return q
+
+    def llm_sync(q):
+        time.sleep(llm_ms / 1000)
+        return AIMessage(content="Harga paket Bromo: Rp 350.000 per orang")
+
+    async def llm_async(q):
+        await asyncio.sleep(llm_ms / 1000)  # HTTP ke Groq
+        return AIMessage(content="Harga paket Bromo: Rp 350.000 per orang")
+
+    return RunnableLambda(retrieve) | RunnableLambda(llm_sync, afunc=llm_async)
+
+
+class _LegacyChain:
+    """Bungkus chain sehingga ainvoke memanggil invoke sinkron (perilaku lama)."""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def ainvoke(self, x):
+        return self.inner.invoke(x)
+
+
+# ============================================================
+# Update / Context palsu
+# ============================================================
+class _FakeMessage:
+    def __init__(self, text):
+        self.text = text
+
+    async def reply_text(self, *args, **kwargs):
+        return None
+
+
+class _FakeBot:
+    async def send_chat_action(self, *args, **kwargs):
+        return None
+
+
+def _fake_update(user_id: int, text: str):
+    return SimpleNamespace(message=_FakeMessage(text), effective_chat=SimpleNamespace(id=user_id))
+
+
+# ============================================================
+# Runner
+# ============================================================
+async def _user_loop(user_id: int, n_msgs: int, latencies: list):
+    ctx = SimpleNamespace(bot=_FakeBot())
+    for i in range(n_msgs):
+        t0 = time.perf_counter()
+        await main.handle_message(_fake_update(user_id, f"harga paket bromo {i}"), ctx)
+        latencies.append(time.perf_counter() - t0)
+
+
+async def run_once(n_users: int, n_msgs: int) -> dict:
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_user_loop(uid, n_msgs, latencies) for uid in range(n_users)])
+    elapsed = time.perf_counter() - t0
+    lat_ms = sorted(x * 1000 for x in latencies)
+    return {
+        "users": n_users,
+        "msgs": len(latencies),
+        "msg_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(lat_ms),
+        "p95_ms": lat_ms[int(0.95 * (len(lat_ms) - 1))],
+    }
+
+
+async def _noop_ensure(force: bool = False):
+    return None
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    ap.add_argument("--msgs", type=int, default=5, help="pesan per user")
+    ap.add_argument("--retrieve-ms", type=float, default=30)
+    ap.add_argument("--llm-ms", type=float, default=400)
+    args = ap.parse_args()
+
+    fake = make_fake_chain(args.retrieve_ms, args.llm_ms)
+    main.ensure_chain_latest = _noop_ensure
+    main._ready.set()
+    main.save_chatlog = lambda *a, **k: None
+    main.STREAM_RESPONSES = False  # fokus ke throughput, bukan streaming
+    main.ANSWER_CACHE_ENABLED = False  # pesan sengaja mirip, jangan sampai kena cache
+    main.print = lambda *a, **k: None  # redam log per pesan
+
+    print(f"MAX_CONCURRENT_CHAINS={main.MAX_CONCURRENT_CHAINS} BLOCKING_WORKERS={main.BLOCKING_WORKERS}")
+    print(f"{'mode':<8}{'users':>6}{'msgs':>6}{'msg/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    async def _run_all():
+        # semaphore/lock di main terikat ke satu event loop, jadi semua run di loop yang sama
+        asyncio.get_running_loop().set_default_executor(main._blocking_executor)
+        for mode, chain in (("legacy", _LegacyChain(fake)), ("async", fake)):
+            main.chain = chain
+            for n in args.users:
+                r = await run_once(n, args.msgs)
+                print(f"{mode:<8}{r['users']:>6}{r['msgs']:>6}{r['msg_per_s']:>10.1f}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}")
+
+    asyncio.run(_run_all())
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,82 @@
+"""
+Regresi fast path harga (FactIndex.answer) pada fact_questions.jsonl.
+
+- expect = [potongan teks] : harus dijawab fast path dan jawabannya berisi semua potongan
+- expect = null            : bukan pertanyaan harga langsung, harus lanjut ke RAG (answer() None)
+- forbid                   : potongan yang tidak boleh muncul (mis. proses perhitungan " x ",
+                             sama dengan aturan prompt RAG)
+
+Fakta diambil dari index aktif (snapshot CURRENT), atau --data untuk ekstrak ulang dari data/.
+
+Contoh:
+    python benchmarks/bench_facts.py
+    python benchmarks/bench_facts.py --data
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from harness import summarize_ms
+
+from fact_index import FactIndex
+
+EVAL_FILE = Path(__file__).resolve().parent / "fact_questions.jsonl"
+
+
+def _load_facts(from_data: bool) -> FactIndex:
+    if not from_data:
+        import index_store
+        return FactIndex.load(index_store.current_index_dir())
+
+    import build_dataset
+    facts = FactIndex()
+    for file in build_dataset._list_data_files(build_dataset.DATA_DIR):
+        facts.set_file(file, build_dataset._parse_worker(str(build_dataset.DATA_DIR / file), file)["facts"])
+    return facts
+
+
+def _check(answer, item) -> str:
+    """'' kalau lolos, selain itu alasan gagal."""
+    expect = item.get("expect")
+    if expect is None:
+        return "" if answer is None else "harusnya lewat RAG"
+    if answer is None:
+        return "tidak dijawab fast path"
+    missing = [e for e in expect if e not in answer]
+    if missing:
+        return f"tidak ada {missing}"
+    bad = [f for f in item.get("forbid", []) if f in answer]
+    return f"berisi {bad}" if bad else ""
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", default=str(EVAL_FILE))
+    ap.add_argument("--data", action="store_true", help="ekstrak fakta dari data/ (bukan index aktif)")
+    args = ap.parse_args()
+
+    facts = _load_facts(args.data)
+    with open(args.eval, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    print(f"[INFO] {len(facts)} fakta harga, {len(items)} pertanyaan")
+
+    lat, failed = [], 0
+    for it in items:
+        t0 = time.perf_counter()
+        answer = facts.answer(it["question"])
+        lat.append(time.perf_counter() - t0)
+        reason = _check(answer, it)
+        failed += bool(reason)
+        status = "[FAIL]" if reason else "[OK]  "
+        route = "RAG" if answer is None else answer.replace("\n", " | ")
+        print(f"{status} {it['question']!r} -> {route}{f'  ({reason})' if reason else ''}")
+
+    s = summarize_ms(lat)
+    print(f"[STAT] lolos {len(items) - failed}/{len(items)} | answer() p50={s['p50']:.3f}ms p95={s['p95']:.3f}ms")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,152 @@
+"""
+Latency user pertama setelah reload dataset, dengan dan tanpa warm-up FAQ,
+dengan kuota Groq sungguhan (--rpm/--tpm, default free tier 30/6000).
+
+Alur per mode (gateway baru = kuota penuh): warm-up bot -> reload index di background
+(seperti dipicu watcher); selama reload --fresh user bertanya pertanyaan baru tiap --gap
+detik (dilayani chain lama, berebut kuota dengan warm-up) -> gelombang pertama --users user
+bertanya pertanyaan populer bersamaan -> gelombang kedua (steady state, cache sudah terisi).
+Pertanyaan populer = SAMPLE_QUESTIONS + varian sampai --questions (pengganti h_chatlog +
+faq_warmup.txt). "ditolak" = user mendapat pesan "layanan sedang sangat ramai" (LLMUnavailable).
+
+Mode:
+  tanpa warm-up
+  warm-up lama  : warm-up tanpa cek sisa kuota (perilaku sebelum FAQ_WARMUP_QUOTA_RESERVE)
+  warm-up       : warm-up berhenti saat kuota tinggal jatah user
+
+Contoh:
+    python benchmarks/bench_faq_warmup.py --users 5 --fresh 5 --gap 5
+    python benchmarks/bench_faq_warmup.py --rpm 0 --tpm 0   # tanpa batas kuota
+"""
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from harness import FakeChatModel, SAMPLE_QUESTIONS, SQLiteChatlogWriter, fake_context, fake_update, summarize_ms
+
+import chatlog_db
+import faq_warmup
+import main
+from llm_gateway import LLM_QUEUE_TIMEOUT, LLMGateway
+
+BUSY_PREFIX = "⚠️"
+
+
+def _popular(n: int) -> list:
+    out = list(SAMPLE_QUESTIONS[:n])
+    i = 0
+    while len(out) < n:
+        out.append(f"{SAMPLE_QUESTIONS[i % len(SAMPLE_QUESTIONS)].rstrip('?')} untuk rombongan {i + 2} orang?")
+        i += 1
+    return out
+
+
+async def _ask(uid: int, question: str, lat: list) -> bool:
+    """Return True kalau user ditolak (kuota penuh)."""
+    update = fake_update(uid, question, placeholder=main.STREAM_PLACEHOLDER)
+    t0 = time.perf_counter()
+    await main.handle_message(update, fake_context())
+    lat.append(time.perf_counter() - t0)
+    return (update.message.last_text or "").startswith(BUSY_PREFIX)
+
+
+async def _wave(questions: list, uid0: int) -> tuple:
+    lat = []
+    rejected = await asyncio.gather(*[_ask(uid0 + i, q, lat) for i, q in enumerate(questions)])
+    return summarize_ms(lat), sum(rejected)
+
+
+async def _fresh_users(args) -> tuple:
+    """User dengan pertanyaan baru (tidak ada di cache) yang datang selama reload."""
+    lat, tasks = [], []
+    for i in range(args.fresh):
+        q = f"paket trip bromo tanggal {i + 1} bulan depan masih ada kursi untuk {i + 3} orang?"
+        tasks.append(asyncio.create_task(_ask(20_000 + i, q, lat)))
+        await asyncio.sleep(args.gap)
+    rejected = await asyncio.gather(*tasks)
+    return summarize_ms(lat), sum(rejected)
+
+
+_budgeted_warmup_llm = main._warmup_llm
+
+
+async def _legacy_warmup_llm(prompt_value):
+    return await main.llm.ainvoke(prompt_value)
+
+
+async def run(args, mode: str) -> None:
+    popular = _popular(args.questions)
+    faq_warmup.FAQ_WARMUP = mode != "tanpa warm-up"
+    faq_warmup.collect_questions = lambda: list(popular)
+    main._warmup_llm = _legacy_warmup_llm if mode == "warm-up lama" else _budgeted_warmup_llm
+
+    await main.ensure_chain_latest(force=True)
+    main.answer_cache.invalidate()
+    # gateway baru per mode: kuota penuh, dan warm-up startup tidak ikut terhitung
+    gateway = LLMGateway(FakeChatModel(ttft_ms=args.ttft_ms, tok_per_s=args.tok_per_s), rpm=args.rpm, tpm=args.tpm)
+    main.llm = gateway
+
+    warm = {}
+    run_warmup = faq_warmup.run_warmup
+
+    async def _capture(*a, **k):
+        warm.update(await run_warmup(*a, **k))
+        return warm
+
+    faq_warmup.run_warmup = _capture
+    # reload di background seperti DatasetWatcher (versi naik -> chain lama tetap melayani)
+    main.dataset_watcher = SimpleNamespace(version=main._last_sig_ns + 1, stats=lambda: {}, stop=lambda: None)
+    t0 = time.perf_counter()
+    reload_task = asyncio.create_task(main.ensure_chain_latest(from_watcher=True))
+    fresh, fresh_rej = await _fresh_users(args)
+    await reload_task
+    reload_s = time.perf_counter() - t0
+    faq_warmup.run_warmup = run_warmup
+
+    rng = random.Random(args.seed)
+    questions = [rng.choice(popular) for _ in range(args.users)]
+    first, first_rej = await _wave(questions, 10_000)
+    steady, steady_rej = await _wave(questions, 10_000)
+    warm_txt = (f"warm={warm.get('warmed', 0)}/{warm.get('questions', 0)} gagal={warm.get('failed', 0)} "
+                f"kuota={warm.get('budget', 0)}") if warm else "warm=-"
+    print(f"{mode:<14} reload={reload_s:5.1f}s {warm_txt} "
+          f"| selama reload p95={fresh['p95']:.0f}ms ditolak={fresh_rej}/{args.fresh} "
+          f"| user pertama p50={first['p50']:.0f}ms p95={first['p95']:.0f}ms ditolak={first_rej}/{args.users} "
+          f"| steady p95={steady['p95']:.0f}ms ditolak={steady_rej}/{args.users} "
+          f"| llm ditolak={gateway.stats_counter['rejected']}")
+    main.dataset_watcher = None
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=5)
+    ap.add_argument("--questions", type=int, default=27, help="jumlah pertanyaan populer yang di-warm-up")
+    ap.add_argument("--fresh", type=int, default=5, help="user dengan pertanyaan baru selama reload")
+    ap.add_argument("--gap", type=float, default=5.0, help="jeda antar user baru (detik)")
+    ap.add_argument("--rpm", type=float, default=30)
+    ap.add_argument("--tpm", type=float, default=6000)
+    ap.add_argument("--ttft-ms", type=float, default=400)
+    ap.add_argument("--tok-per-s", type=float, default=250)
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args()
+
+    async def go():
+        main.llm = LLMGateway(FakeChatModel(ttft_ms=args.ttft_ms, tok_per_s=args.tok_per_s), rpm=0, tpm=0)
+        main.print = lambda *a, **k: None
+        chatlog_db.set_chatlog_sink(chatlog_db.ChatlogSink(writer=SQLiteChatlogWriter()))
+        asyncio.get_running_loop().set_default_executor(main._blocking_executor)
+        await main._warmup()
+        if main.chain is None:
+            raise SystemExit(f"[ERROR] Warm-up gagal: {main._startup['error']}")
+        print(f"[INFO] kuota RPM={args.rpm:g} TPM={args.tpm:g}, antre maks {LLM_QUEUE_TIMEOUT:g}s, "
+              f"jatah user {faq_warmup.FAQ_WARMUP_QUOTA_RESERVE:.0%}")
+        for mode in ("tanpa warm-up", "warm-up lama", "warm-up"):
+            await run(args, mode)
+
+    asyncio.run(go())
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,153 @@
+"""
+Backend retriever Chroma (HNSW) vs FlatIndex (exact, NumPy) : latency & recall.
+
+- recall@k : irisan top-k Chroma dengan top-k exact FlatIndex (ground truth) / k
+- hit@k    : seperti bench_retrieval.py (chunk berisi semua `expect`), index asli saja
+- latency  : waktu search per query (embedding query sudah dihitung di muka),
+             sekuensial dan --threads thread bersamaan
+
+Mode:
+  default     : index aktif (snapshot CURRENT) + eval_questions.jsonl + model embedding asli
+  --synthetic : collection Chroma sementara berisi N vektor acak (tanpa model), untuk skala
+
+Contoh:
+    python benchmarks/bench_flat_index.py --k 6
+    python benchmarks/bench_flat_index.py --synthetic 5000 --queries 200 --threads 8
+"""
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from harness import summarize_ms
+
+from flat_index import FlatIndex
+
+EVAL_FILE = Path(__file__).resolve().parent / "eval_questions.jsonl"
+
+
+def _hit(docs, expect) -> bool:
+    return any(all(e.lower() in d.page_content.lower() for e in expect) for d in docs)
+
+
+def _time_queries(search, vectors: list, threads: int) -> tuple:
+    """Return (latency per query, hasil per query, query/detik)."""
+    def one(vec):
+        t0 = time.perf_counter()
+        docs = search(vec)
+        return time.perf_counter() - t0, docs
+
+    t0 = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(threads) as pool:
+            out = list(pool.map(one, vectors))
+    else:
+        out = [one(v) for v in vectors]
+    elapsed = time.perf_counter() - t0
+    return [lat for lat, _ in out], [docs for _, docs in out], len(vectors) / elapsed if elapsed else 0.0
+
+
+def _report(name: str, lat: list, qps: float, extra: str = "") -> None:
+    s = summarize_ms(lat)
+    print(f"{name:<16} p50={s['p50']:.2f}ms p95={s['p95']:.2f}ms p99={s['p99']:.2f}ms | {qps:8.1f} q/s {extra}")
+
+
+def _compare(vdb, flat: FlatIndex, vectors: list, k: int, threads: int, items: list = None) -> None:
+    def chroma_search(vec):
+        return vdb.similarity_search_by_vector(vec, k=k)
+
+    def flat_search(vec):
+        return flat.similarity_search_by_vector(vec, k=k)
+
+    # pemanasan (HNSW dimuat ke memori, halaman mmap dibaca)
+    chroma_search(vectors[0])
+    flat_search(vectors[0])
+
+    for threads_n in sorted({1, threads}):
+        c_lat, c_docs, c_qps = _time_queries(chroma_search, vectors, threads_n)
+        f_lat, f_docs, f_qps = _time_queries(flat_search, vectors, threads_n)
+        recall = np.mean([
+            len({d.id for d in c} & {d.id for d in f}) / max(1, len(f)) for c, f in zip(c_docs, f_docs)
+        ])
+        c_extra, f_extra = f"recall@{k}={recall:.3f}", "recall=1 (exact)"
+        if items:
+            c_extra += f" hit={sum(_hit(d, it['expect']) for d, it in zip(c_docs, items))}/{len(items)}"
+            f_extra += f" hit={sum(_hit(d, it['expect']) for d, it in zip(f_docs, items))}/{len(items)}"
+        print(f"--- threads={threads_n}")
+        _report("chroma (hnsw)", c_lat, c_qps, c_extra)
+        _report("flat (numpy)", f_lat, f_qps, f_extra)
+
+
+def _run_index(args) -> None:
+    import index_store
+    import main
+
+    from langchain_chroma import Chroma
+
+    main._init_models()
+    index_dir = index_store.current_index_dir()
+    vdb = Chroma(persist_directory=str(index_dir), embedding_function=main.embeddings)
+
+    t0 = time.perf_counter()
+    flat = FlatIndex.from_collection(vdb)
+    export_s = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as tmp:
+        flat.save(tmp)
+        t0 = time.perf_counter()
+        flat = FlatIndex.load(tmp)
+        load_s = time.perf_counter() - t0
+
+        with open(args.eval, encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        vectors = [main.embeddings.embed_query(it["question"]) for it in items]
+        print(f"[INFO] {index_dir.name}: {len(flat)} chunk, space={flat.space}, "
+              f"export={export_s * 1000:.0f}ms load(mmap)={load_s * 1000:.1f}ms, {len(items)} query")
+        _compare(vdb, flat, vectors, args.k, args.threads, items)
+
+
+def _run_synthetic(args) -> None:
+    import chromadb
+    from langchain_chroma import Chroma
+
+    rng = np.random.default_rng(args.seed)
+    data = rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        client = chromadb.PersistentClient(path=tmp)
+        col = client.get_or_create_collection("langchain")
+        for i in range(0, len(data), 1000):
+            batch = data[i:i + 1000]
+            col.upsert(ids=[f"c{i + j}" for j in range(len(batch))], embeddings=batch.tolist(),
+                       documents=[f"chunk {i + j}" for j in range(len(batch))],
+                       metadatas=[{"row": i + j} for j in range(len(batch))])
+        vdb = Chroma(client=client, collection_name="langchain")
+        flat = FlatIndex.from_collection(vdb)
+        # query = vektor data + noise, mirip pertanyaan yang dekat dengan satu chunk
+        picks = rng.integers(0, len(data), size=args.queries)
+        vectors = [(data[p] + rng.normal(scale=0.5, size=args.dim)).tolist() for p in picks]
+        print(f"[INFO] synthetic: {len(flat)} vektor dim={args.dim}, {len(vectors)} query")
+        _compare(vdb, flat, vectors, args.k, args.threads)
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", default=str(EVAL_FILE))
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--synthetic", type=int, default=0, help="jumlah vektor acak (0 = pakai index aktif)")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=11)
+    args = ap.parse_args()
+
+    if args.synthetic:
+        _run_synthetic(args)
+    else:
+        _run_index(args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,83 @@
+"""
+Burst test LLMGateway vs panggilan langsung ke model (perilaku lama).
+
+Upstream disimulasikan QuotaFakeChatModel: lebih dari --quota request per
+--window detik dibalas 429. Burst --requests pesan dikirim bersamaan dengan
+--distinct prompt berbeda (sisanya prompt kembar, mis. pertanyaan populer).
+
+Contoh:
+    python benchmarks/bench_gateway.py --requests 60 --distinct 20 --quota 10 --window 2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from harness import QuotaFakeChatModel, summarize_ms
+
+from llm_gateway import LLMGateway
+
+
+async def _burst(call, prompts: list) -> dict:
+    lat, ok = [], 0
+
+    async def one(p):
+        nonlocal ok
+        t0 = time.perf_counter()
+        try:
+            await call(p)
+            ok += 1
+            lat.append(time.perf_counter() - t0)
+        except Exception:
+            pass
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one(p) for p in prompts])
+    return {"answered": ok, "elapsed": time.perf_counter() - t0, "latency": summarize_ms(lat) if lat else None}
+
+
+def _report(name: str, r: dict, total: int, upstream: int, extra: str = "") -> None:
+    lat = r["latency"]
+    lat_s = f"p50={lat['p50']:.0f}ms p95={lat['p95']:.0f}ms" if lat else "-"
+    print(f"{name:<8} dijawab {r['answered']:>3}/{total} ({r['answered'] / total:.0%}) | {lat_s} | "
+          f"upstream calls={upstream} | {r['elapsed']:.1f}s {extra}")
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=60)
+    ap.add_argument("--distinct", type=int, default=20)
+    ap.add_argument("--quota", type=int, default=10, help="request per window yang diterima upstream")
+    ap.add_argument("--window", type=float, default=2.0)
+    ap.add_argument("--ttft-ms", type=float, default=200)
+    ap.add_argument("--queue-timeout", type=float, default=15)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    prompts = [f"pertanyaan #{rng.randrange(args.distinct)}" for _ in range(args.requests)]
+
+    async def run():
+        direct = QuotaFakeChatModel(quota=args.quota, window_s=args.window, ttft_ms=args.ttft_ms)
+        calls = {"n": 0}
+
+        async def call_direct(p):
+            calls["n"] += 1
+            return await direct.ainvoke(p)
+
+        _report("direct", await _burst(call_direct, prompts), len(prompts), calls["n"])
+
+        await asyncio.sleep(args.window)  # kuota upstream reset
+        upstream = QuotaFakeChatModel(quota=args.quota, window_s=args.window, ttft_ms=args.ttft_ms)
+        gw = LLMGateway(upstream, rpm=args.quota * 60 / args.window, tpm=0,
+                        queue_timeout=args.queue_timeout, timeout=30, first_token_timeout=30)
+        r = await _burst(gw.ainvoke, prompts)
+        st = gw.stats()
+        _report("gateway", r, len(prompts), st["calls"],
+                f"(coalesced={st['coalesced']} retries={st['retries']} 429={st['rate_limited']} ditolak={st['rejected']})")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,99 @@
+"""
+Bandingkan ukuran prompt lama (semua k chunk dimasukkan apa adanya) dengan
+prompt hasil prompt_assembly (dedupe + pangkas + budget token) pada eval set tetap.
+
+Kualitas diukur dengan eval_questions.jsonl: setiap pertanyaan punya potongan
+teks yang wajib ada (mis. harga). Tanpa --llm dicek di konteks yang dikirim
+(recall konteks); dengan --llm jawaban Groq asli ikut dibandingkan (butuh GROQ_API_KEY).
+
+Contoh:
+    python benchmarks/bench_prompt.py
+    python benchmarks/bench_prompt.py --budget 800 --llm
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import harness  # noqa: F401  (env offline + sys.path)
+
+import index_store
+import main
+import prompt_assembly
+from prompt_assembly import assemble_context, estimate_tokens
+
+EVAL_FILE = Path(__file__).resolve().parent / "eval_questions.jsonl"
+
+
+def _load_eval(path: Path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _has_all(text: str, expect: list) -> bool:
+    low = (text or "").lower()
+    return all(e.lower() in low for e in expect)
+
+
+def _ask(prompt_value) -> tuple:
+    t0 = time.perf_counter()
+    resp = main.llm.invoke(prompt_value)
+    return resp.content or "", time.perf_counter() - t0
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", default=str(EVAL_FILE))
+    ap.add_argument("--k", type=int, default=main.RETRIEVER_K)
+    ap.add_argument("--budget", type=int, default=prompt_assembly.PROMPT_CONTEXT_TOKENS)
+    ap.add_argument("--llm", action="store_true", help="panggil Groq asli untuk kedua versi prompt")
+    args = ap.parse_args()
+
+    from langchain_chroma import Chroma
+
+    main._init_models()
+    vdb = Chroma(persist_directory=str(index_store.current_index_dir()), embedding_function=main.embeddings)
+    prompt = main.get_prompt()
+    rows = []
+
+    for item in _load_eval(Path(args.eval)):
+        q, expect = item["question"], item["expect"]
+        docs = vdb.similarity_search_by_vector(main.embeddings.embed_query(q), k=args.k)
+
+        # perilaku lama: list Document di-str() langsung ke {context}, riwayat ikut di {question}
+        old_prompt = prompt.invoke({"context": docs, "question": q, "history": ""})
+        context, info = assemble_context(docs, q, max_tokens=args.budget)
+        new_prompt = prompt.invoke({"context": context, "question": q, "history": "(tidak ada)"})
+
+        row = {
+            "question": q,
+            "old_tokens": estimate_tokens(old_prompt.to_string()),
+            "new_tokens": estimate_tokens(new_prompt.to_string()),
+            "old_ctx_ok": _has_all(str(docs), expect),
+            "new_ctx_ok": _has_all(context, expect),
+            "info": info,
+        }
+        if args.llm:
+            old_ans, row["old_s"] = _ask(old_prompt)
+            new_ans, row["new_s"] = _ask(new_prompt)
+            row["old_ans_ok"] = _has_all(old_ans, expect)
+            row["new_ans_ok"] = _has_all(new_ans, expect)
+        rows.append(row)
+        print(f"{row['old_tokens']:>6} -> {row['new_tokens']:>5} tok | ctx ok {row['old_ctx_ok']!s:<5} -> "
+              f"{row['new_ctx_ok']!s:<5} | {q}")
+
+    n = len(rows)
+    old_mean = statistics.fmean(r["old_tokens"] for r in rows)
+    new_mean = statistics.fmean(r["new_tokens"] for r in rows)
+    print("=" * 60)
+    print(f"prompt tokens (estimasi) : {old_mean:.0f} -> {new_mean:.0f} ({(1 - new_mean / old_mean) * 100:.1f}% lebih kecil)")
+    print(f"recall konteks           : {sum(r['old_ctx_ok'] for r in rows)}/{n} -> {sum(r['new_ctx_ok'] for r in rows)}/{n}")
+    if args.llm:
+        print(f"jawaban benar            : {sum(r['old_ans_ok'] for r in rows)}/{n} -> {sum(r['new_ans_ok'] for r in rows)}/{n}")
+        print(f"latency LLM mean         : {statistics.fmean(r['old_s'] for r in rows):.2f}s -> "
+              f"{statistics.fmean(r['new_s'] for r in rows):.2f}s")
+
+
+if __name__ == "__main__":
+    main_cli()
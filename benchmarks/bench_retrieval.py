@@ -0,0 +1,58 @@
+"""
+Hit@k retrieval vector saja vs hybrid (vector + BM25, RRF) pada eval_questions.jsonl.
+
+"Hit" = minimal satu chunk di top-k berisi semua potongan teks `expect`.
+Memakai index aktif (snapshot CURRENT) dan model embedding asli.
+
+Contoh:
+    python benchmarks/bench_retrieval.py --k 3 6 10
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import harness  # noqa: F401  (env offline + sys.path)
+
+import index_store
+import main
+from lexical_index import LexicalIndex
+
+EVAL_FILE = Path(__file__).resolve().parent / "eval_questions.jsonl"
+
+
+def _hit(docs, expect) -> bool:
+    return any(all(e.lower() in d.page_content.lower() for e in expect) for d in docs)
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", default=str(EVAL_FILE))
+    ap.add_argument("--k", type=int, nargs="+", default=[3, 6, 10])
+    args = ap.parse_args()
+
+    from langchain_chroma import Chroma
+
+    main._init_models()
+    index_dir = index_store.current_index_dir()
+    vdb = Chroma(persist_directory=str(index_dir), embedding_function=main.embeddings)
+    lex = LexicalIndex.load(index_dir)
+    if not len(lex):
+        raise SystemExit(f"[ERROR] {index_dir} belum punya lexical_index.json, jalankan build_dataset.py dulu")
+
+    with open(args.eval, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+
+    for k in args.k:
+        main.RETRIEVER_K = k
+        for mode, retrieve in (("vector", main._make_retriever(vdb, None)),
+                               ("hybrid", main._make_retriever(vdb, lex))):
+            hits, t0 = 0, time.perf_counter()
+            for it in items:
+                hits += _hit(retrieve(it["question"]), it["expect"])
+            ms = (time.perf_counter() - t0) * 1000 / len(items)
+            print(f"k={k:<3} {mode:<7} hit={hits}/{len(items)}  {ms:6.1f}ms/query")
+
+
+if __name__ == "__main__":
+    main_cli()
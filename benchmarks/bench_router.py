@@ -0,0 +1,69 @@
+"""
+Simulasi ModelRouter: model utama melambat di tengah run, router harus pindah
+ke model fallback lalu kembali setelah statistik lama kedaluwarsa.
+
+Fase:
+  1. normal   : primary TTFT --fast-ms
+  2. degradasi: primary TTFT --slow-ms (melanggar SLO)
+  3. pulih    : primary normal lagi (butuh ROUTER_WINDOW_S agar sampel lambat hilang)
+
+Contoh:
+    ROUTER_WINDOW_S=3 python benchmarks/bench_router.py --per-phase 30
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from harness import FakeChatModel, summarize_ms
+
+from llm_gateway import LLMGateway
+from model_router import ROUTER_WINDOW_S, ModelRoute, ModelRouter
+
+LONG_PROMPT = "konteks dataset travel. " * 400  # > ROUTER_SMALL_PROMPT_TOKENS, jadi mulai dari primary
+
+
+async def _phase(router: ModelRouter, name: str, n: int, gap: float) -> None:
+    lat, picks = [], Counter()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        await router.ainvoke(LONG_PROMPT)
+        lat.append(time.perf_counter() - t0)
+        picks[router.recent[-1]["model"]] += 1
+        await asyncio.sleep(gap)
+    s = summarize_ms(lat)
+    print(f"{name:<10} p50={s['p50']:.0f}ms p95={s['p95']:.0f}ms | dipilih: {dict(picks)}")
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--per-phase", type=int, default=30)
+    ap.add_argument("--fast-ms", type=float, default=100)
+    ap.add_argument("--slow-ms", type=float, default=900)
+    ap.add_argument("--fallback-ms", type=float, default=150)
+    ap.add_argument("--slo-ms", type=float, default=500)
+    ap.add_argument("--gap", type=float, default=0.0, help="jeda antar request (detik)")
+    args = ap.parse_args()
+
+    primary = FakeChatModel(ttft_ms=args.fast_ms, tok_per_s=1000)
+    small = FakeChatModel(ttft_ms=args.fallback_ms, tok_per_s=1000)
+    router = ModelRouter([
+        ModelRoute("primary", LLMGateway(primary, rpm=0, tpm=0, coalesce=False), args.slo_ms / 1000),
+        ModelRoute("fallback", LLMGateway(small, rpm=0, tpm=0, coalesce=False), args.slo_ms / 1000),
+    ])
+
+    async def run():
+        await _phase(router, "normal", args.per_phase, args.gap)
+        primary.ttft_ms = args.slow_ms
+        await _phase(router, "degradasi", args.per_phase, args.gap)
+        primary.ttft_ms = args.fast_ms
+        print(f"[INFO] tunggu ROUTER_WINDOW_S={ROUTER_WINDOW_S:.0f}s sampai sampel lambat kedaluwarsa...")
+        await asyncio.sleep(ROUTER_WINDOW_S)
+        await _phase(router, "pulih", args.per_phase, args.gap)
+        print(f"[STAT] {router.stats()}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main_cli()
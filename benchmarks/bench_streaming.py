@@ -0,0 +1,136 @@
+"""
+Benchmark streaming jawaban (time-to-first-token yang dilihat user).
+
+LLM palsu mengeluarkan token dengan TTFT dan kecepatan yang bisa diatur.
+Dibandingkan:
+  - blocking : chain.ainvoke lalu reply_text sekali (STREAM_RESPONSES=0)
+  - stream   : placeholder + edit_message_text bertahap (STREAM_RESPONSES=1)
+
+Metrik per pesan:
+  first_text : kapan user pertama kali melihat potongan jawaban
+  total      : kapan jawaban final terkirim
+
+Jalankan:
+    python benchmarks/bench_streaming.py --users 8 --ttft-ms 300 --tokens 150 --tok-per-s 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "bench-dummy")
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import main
+
+
+class FakeStreamingChain:
+    """Pengganti chain: ainvoke/astream dengan TTFT + token rate."""
+
+    def __init__(self, ttft_ms: float, n_tokens: int, tok_per_s: float):
+        self.ttft = ttft_ms / 1000
+        self.n_tokens = n_tokens
+        self.gap = 1.0 / tok_per_s
+
+    def _tokens(self):
+        return [f"kata{i} " for i in range(self.n_tokens)]
+
+    async def ainvoke(self, x):
+        await asyncio.sleep(self.ttft + self.gap * self.n_tokens)
+        return AIMessage(content="".join(self._tokens()))
+
+    async def astream(self, x):
+        await asyncio.sleep(self.ttft)
+        for tok in self._tokens():
+            yield AIMessageChunk(content=tok)
+            await asyncio.sleep(self.gap)
+
+
+class _Recorder:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.first_text = None
+        self.done = None
+
+    def mark(self, text: str, final: bool):
+        now = time.perf_counter() - self.t0
+        if self.first_text is None and text != main.STREAM_PLACEHOLDER:
+            self.first_text = now
+        if final:
+            self.done = now
+
+
+class _FakeSent:
+    def __init__(self, rec: _Recorder):
+        self.rec = rec
+
+    async def edit_text(self, text, parse_mode=None):
+        await asyncio.sleep(0.02)  # RTT Telegram
+        self.rec.mark(text, final=parse_mode is not None)
+
+
+class _FakeMessage:
+    def __init__(self, text, rec: _Recorder):
+        self.text = text
+        self.rec = rec
+
+    async def reply_text(self, text, parse_mode=None):
+        await asyncio.sleep(0.02)
+        self.rec.mark(text, final=text != main.STREAM_PLACEHOLDER)
+        return _FakeSent(self.rec)
+
+
+class _FakeBot:
+    async def send_chat_action(self, *args, **kwargs):
+        return None
+
+
+async def _noop_ensure(force: bool = False):
+    return None
+
+
+async def _one(user_id: int) -> _Recorder:
+    rec = _Recorder()
+    upd = SimpleNamespace(message=_FakeMessage("harga paket bromo", rec), effective_chat=SimpleNamespace(id=user_id))
+    await main.handle_message(upd, SimpleNamespace(bot=_FakeBot()))
+    return rec
+
+
+def _fmt(vals):
+    vals = sorted(v * 1000 for v in vals)
+    return f"p50={statistics.median(vals):7.0f}ms p95={vals[int(0.95 * (len(vals) - 1))]:7.0f}ms"
+
+
+def main_cli():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=8)
+    ap.add_argument("--ttft-ms", type=float, default=300)
+    ap.add_argument("--tokens", type=int, default=150)
+    ap.add_argument("--tok-per-s", type=float, default=200)
+    args = ap.parse_args()
+
+    main.chain = FakeStreamingChain(args.ttft_ms, args.tokens, args.tok_per_s)
+    main.ensure_chain_latest = _noop_ensure
+    main._ready.set()
+    main.save_chatlog = lambda *a, **k: None
+    main.ANSWER_CACHE_ENABLED = False
+    main.print = lambda *a, **k: None
+
+    async def _run_all():
+        for mode in ("blocking", "stream"):
+            main.STREAM_RESPONSES = mode == "stream"
+            main.conversation_memory = main.create_memory("memory")
+            recs = await asyncio.gather(*[_one(uid) for uid in range(args.users)])
+            print(f"{mode:<9} first_text {_fmt([r.first_text for r in recs])} | total {_fmt([r.done for r in recs])}")
+
+    asyncio.run(_run_all())
+
+
+if __name__ == "__main__":
+    main_cli()
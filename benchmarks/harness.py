@@ -0,0 +1,297 @@
+"""
+Stand-in lokal untuk Telegram, Groq dan Postgres, dipakai oleh script benchmark.
+
+- FakeChatModel      : chat model LangChain dengan TTFT + token rate yang bisa diatur
+- QuotaFakeChatModel : FakeChatModel yang membalas 429 kalau kuota per window terlampaui
+- SQLiteChatlogWriter: writer ChatlogSink ke SQLite (file atau :memory:)
+- FakeUpdate/FakeContext: objek mirip telegram.Update/Context untuk handle_message
+- LoopLagMonitor     : ukur keterlambatan event loop (indikasi kode blocking)
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("GROQ_API_KEY", "bench-dummy")
+os.environ.setdefault("METRICS_PORT", "0")
+# model embedding diambil dari cache lokal HuggingFace, tanpa akses jaringan
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+SAMPLE_ANSWER = (
+    "Berikut pilihan paket yang tersedia:\n"
+    "1. **Open Trip Bromo**: Rp 350.000 per orang, minimal 2 orang\n"
+    "2. **Private Trip**: Rp 1.700.000 per trip (maks. 6 orang)\n"
+    "   - Fasilitas: Jeep Bromo, HTM penanjakan 1, antar jemput dari Kota Malang\n"
+)
+
+SAMPLE_QUESTIONS = [
+    "berapa harga paket trip bromo?",
+    "harga private trip bromo berapa?",
+    "sewa hi ace premio per hari berapa?",
+    "fasilitas private trip apa saja?",
+    "open trip bromo minimal berapa orang?",
+    "apakah ada paket wisata malang batu?",
+    "harga dokumentasi foto dan video?",
+    "bagaimana cara memesan paket?",
+]
+
+
+# ============================================================
+# LLM palsu
+# ============================================================
+class FakeChatModel(BaseChatModel):
+    """Chat model palsu: tunggu ttft_ms lalu keluarkan token dengan kecepatan tok_per_s."""
+
+    ttft_ms: float = 300.0
+    tok_per_s: float = 200.0
+    answer: str = SAMPLE_ANSWER
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bench"
+
+    def _tokens(self) -> List[str]:
+        words = self.answer.split(" ")
+        return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+    def _usage(self, messages: List[BaseMessage]) -> dict:
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(self._tokens())
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _total_delay(self) -> float:
+        return self.ttft_ms / 1000 + len(self._tokens()) / self.tok_per_s
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._total_delay())
+        msg = AIMessage(content=self.answer, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._total_delay())
+        msg = AIMessage(content=self.answer, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.ttft_ms / 1000)
+        for tok in self._tokens():
+            time.sleep(1.0 / self.tok_per_s)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=tok))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft_ms / 1000)
+        tokens = self._tokens()
+        for i, tok in enumerate(tokens):
+            await asyncio.sleep(1.0 / self.tok_per_s)
+            usage = self._usage(messages) if i == len(tokens) - 1 else None
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=tok, usage_metadata=usage))
+            if run_manager:
+                await run_manager.on_llm_new_token(tok, chunk=chunk)
+            yield chunk
+
+
+class FakeRateLimitError(Exception):
+    """Mirip groq.RateLimitError: status_code 429 + header retry-after."""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit reached, retry after {retry_after:.2f}s")
+        self.response = SimpleNamespace(status_code=429, headers={"retry-after": f"{retry_after:.2f}"})
+
+
+class QuotaFakeChatModel(FakeChatModel):
+    """FakeChatModel dengan kuota upstream: lebih dari `quota` request per `window_s` detik -> 429."""
+
+    quota: int = 10
+    window_s: float = 2.0
+    _calls: Any = PrivateAttr(default_factory=deque)
+
+    def _admit(self) -> None:
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] >= self.window_s:
+            self._calls.popleft()
+        if len(self._calls) >= self.quota:
+            raise FakeRateLimitError(self.window_s - (now - self._calls[0]))
+        self._calls.append(now)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._admit()
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        self._admit()
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+# ============================================================
+# Chatlog ke SQLite
+# ============================================================
+class SQLiteChatlogWriter:
+    """Writer untuk chatlog_db.ChatlogSink: tulis batch ke tabel h_chatlog di SQLite."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = None
+
+    def _connect(self):
+        # dibuat di thread writer (pertama kali write dipanggil)
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS h_chatlog ("
+                "id INTEGER PRIMARY KEY, question TEXT, answer TEXT, user_id TEXT, status INTEGER,"
+                "created_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+            )
+        return self._conn
+
+    def write(self, rows: list) -> None:
+        conn = self._connect()
+        conn.executemany("INSERT INTO h_chatlog (question, answer, user_id, status) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM h_chatlog").fetchone()[0]
+
+    def close(self) -> None:
+        # koneksi dibiarkan terbuka supaya count() masih bisa dibaca setelah sink ditutup
+        pass
+
+
+# ============================================================
+# Telegram palsu
+# ============================================================
+class FakeSentMessage:
+    def __init__(self, owner: "FakeMessage", text: str):
+        self.owner = owner
+        self.text = text
+
+    async def edit_text(self, text, parse_mode=None, **kwargs):
+        await asyncio.sleep(self.owner.rtt)
+        self.text = text
+        self.owner.record(text, final=parse_mode is not None)
+        return self
+
+
+class FakeMessage:
+    """Mirip telegram.Message; mencatat kapan teks pertama & final terlihat user."""
+
+    def __init__(self, text: str, rtt: float = 0.0, placeholder: str = None):
+        self.text = text
+        self.rtt = rtt
+        self.placeholder = placeholder
+        self.t0 = time.perf_counter()
+        self.first_text_at = None
+        self.final_at = None
+        self.replies = []
+        self.last_text = None  # teks terakhir yang terlihat user (reply atau hasil edit)
+
+    def record(self, text: str, final: bool):
+        now = time.perf_counter() - self.t0
+        self.last_text = text
+        if self.first_text_at is None and text != self.placeholder:
+            self.first_text_at = now
+        if final:
+            self.final_at = now
+
+    async def reply_text(self, text, parse_mode=None, **kwargs):
+        await asyncio.sleep(self.rtt)
+        self.replies.append(text)
+        self.record(text, final=text != self.placeholder)
+        return FakeSentMessage(self, text)
+
+
+class FakeBot:
+    async def send_chat_action(self, *args, **kwargs):
+        return None
+
+
+def fake_update(user_id: int, text: str, rtt: float = 0.0, placeholder: str = None):
+    msg = FakeMessage(text, rtt=rtt, placeholder=placeholder)
+    return SimpleNamespace(
+        message=msg,
+        effective_chat=SimpleNamespace(id=user_id),
+        effective_user=SimpleNamespace(id=user_id),
+    )
+
+
+def fake_context():
+    return SimpleNamespace(bot=FakeBot())
+
+
+# ============================================================
+# Event loop lag
+# ============================================================
+class LoopLagMonitor:
+    """Task yang tidur interval detik; selisih bangun vs jadwal = lag event loop."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - t - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+# ============================================================
+# Statistik
+# ============================================================
+def percentile(values, q: float) -> float:
+    data = sorted(values)
+    if not data:
+        return 0.0
+    return data[min(len(data) - 1, int(q * len(data)))]
+
+
+def summarize_ms(values) -> dict:
+    ms = [v * 1000 for v in values if v is not None]
+    if not ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    return {
+        "p50": percentile(ms, 0.50),
+        "p95": percentile(ms, 0.95),
+        "p99": percentile(ms, 0.99),
+        "max": max(ms),
+        "mean": statistics.fmean(ms),
+    }
+
+
+async def noop_ensure(force: bool = False):
+    return None
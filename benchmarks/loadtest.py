@@ -0,0 +1,185 @@
+"""
+Load test offline untuk main.handle_message.
+
+Memakai index Chroma asli (hasil build_dataset.py) dan model embedding asli,
+tetapi Telegram, Groq dan Postgres diganti stand-in lokal (lihat harness.py).
+Bisa jalan di mesin Linux biasa tanpa kredensial, asalkan model
+sentence-transformers/all-MiniLM-L6-v2 sudah ada di cache HuggingFace.
+
+Contoh:
+    python benchmarks/loadtest.py --users 20 --msgs 10 --ttft-ms 300 --tok-per-s 250
+    python benchmarks/loadtest.py --users 50 --json bench_output.json --max-p95-ms 3000
+
+Exit code 1 jika --max-p95-ms / --min-msg-per-s tidak terpenuhi (untuk cek regresi sebelum deploy).
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import harness
+from harness import (
+    FakeChatModel,
+    LoopLagMonitor,
+    SQLiteChatlogWriter,
+    SAMPLE_QUESTIONS,
+    fake_context,
+    fake_update,
+    noop_ensure,
+    summarize_ms,
+)
+
+import chatlog_db
+import main
+from llm_gateway import LLMGateway
+
+
+async def _user(uid: int, args, rng: random.Random, results: list):
+    ctx = fake_context()
+    for _ in range(args.msgs):
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, args.think_ms) / 1000)
+        question = rng.choice(SAMPLE_QUESTIONS)
+        if not args.cache:
+            # bikin unik supaya tidak kena answer cache
+            question = f"{question} ({uid}-{rng.randrange(1_000_000)})"
+        upd = fake_update(uid, question, rtt=args.telegram_rtt_ms / 1000, placeholder=main.STREAM_PLACEHOLDER)
+        t0 = time.perf_counter()
+        await main.handle_message(upd, ctx)
+        results.append({
+            "latency": time.perf_counter() - t0,
+            "first_text": upd.message.first_text_at,
+            # semua balasan error bot diawali "⚠️ Maaf" (termasuk saat placeholder streaming diedit)
+            "error": (upd.message.last_text or "").startswith("⚠️"),
+        })
+
+
+async def run(args) -> dict:
+    fake = FakeChatModel(
+        ttft_ms=args.ttft_ms,
+        tok_per_s=args.tok_per_s,
+        callbacks=[main._LLMMetricsCallback()],
+    )
+    # lewat gateway seperti produksi; kuota default tidak dibatasi supaya yang diukur bot-nya
+    main.llm = LLMGateway(fake, rpm=args.rpm, tpm=args.tpm)
+    main.STREAM_RESPONSES = args.stream
+    main.ANSWER_CACHE_ENABLED = args.cache
+    main.FACT_FASTPATH = args.facts
+    if args.quiet:
+        main.print = lambda *a, **k: None
+
+    writer = SQLiteChatlogWriter(args.sqlite)
+    chatlog_db.set_chatlog_sink(chatlog_db.ChatlogSink(writer=writer))
+
+    asyncio.get_running_loop().set_default_executor(main._blocking_executor)
+
+    # warm-up seperti startup bot (model embedding + index Chroma asli), lalu matikan cek dataset per pesan
+    t0 = time.perf_counter()
+    await main._warmup()
+    load_s = time.perf_counter() - t0
+    if main.chain is None:
+        raise SystemExit(f"[ERROR] Warm-up gagal: {main._startup['error']}")
+    if args.skip_reload_check:
+        main.ensure_chain_latest = noop_ensure
+
+    if args.warmup:
+        await main.handle_message(fake_update(-1, "warmup harga bromo"), fake_context())
+
+    rng = random.Random(args.seed)
+    results = []
+    lag = LoopLagMonitor()
+    lag.start()
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_user(uid, args, random.Random(rng.random()), results) for uid in range(args.users)])
+    elapsed = time.perf_counter() - t0
+    await lag.stop()
+
+    chatlog_db.get_chatlog_sink().flush(10)
+
+    return {
+        "users": args.users,
+        "messages": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "elapsed_s": elapsed,
+        "msg_per_s": len(results) / elapsed if elapsed else 0.0,
+        "latency_ms": summarize_ms([r["latency"] for r in results]),
+        "first_text_ms": summarize_ms([r["first_text"] for r in results]),
+        "loop_lag_ms": summarize_ms(lag.samples),
+        "index_load_s": load_s,
+        "import_s": main._startup["import_s"],
+        "chatlog_rows": writer.count(),
+        "cache": main.answer_cache.stats(),
+        "config": {
+            "stream": args.stream,
+            "cache": args.cache,
+            "facts": args.facts,
+            "ttft_ms": args.ttft_ms,
+            "tok_per_s": args.tok_per_s,
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "max_concurrent_chains": main.MAX_CONCURRENT_CHAINS,
+            "blocking_workers": main.BLOCKING_WORKERS,
+        },
+    }
+
+
+def _print_report(r: dict):
+    lat, ft, lag = r["latency_ms"], r["first_text_ms"], r["loop_lag_ms"]
+    print("=" * 60)
+    print(f"users={r['users']} messages={r['messages']} errors={r['errors']} elapsed={r['elapsed_s']:.2f}s")
+    print(f"throughput      : {r['msg_per_s']:.2f} msg/s")
+    print(f"latency         : p50={lat['p50']:.0f}ms p95={lat['p95']:.0f}ms p99={lat['p99']:.0f}ms max={lat['max']:.0f}ms")
+    print(f"first text      : p50={ft['p50']:.0f}ms p95={ft['p95']:.0f}ms")
+    print(f"event loop lag  : p50={lag['p50']:.1f}ms p99={lag['p99']:.1f}ms max={lag['max']:.1f}ms")
+    print(f"startup         : import={r['import_s']:.2f}s warm-up={r['index_load_s']:.2f}s | chatlog rows: {r['chatlog_rows']}")
+    print(f"cache           : hit_rate={r['cache']['hit_rate']:.1%}")
+    print("-" * 60)
+    print(main.metrics.summary_text())
+    print("=" * 60)
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--users", type=int, default=10)
+    ap.add_argument("--msgs", type=int, default=5, help="pesan per user")
+    ap.add_argument("--think-ms", type=float, default=0, help="jeda acak maks antar pesan per user")
+    ap.add_argument("--ttft-ms", type=float, default=300)
+    ap.add_argument("--tok-per-s", type=float, default=250)
+    ap.add_argument("--rpm", type=float, default=0, help="kuota request/menit di LLMGateway (0 = tanpa batas)")
+    ap.add_argument("--tpm", type=float, default=0, help="kuota token/menit di LLMGateway (0 = tanpa batas)")
+    ap.add_argument("--telegram-rtt-ms", type=float, default=20)
+    ap.add_argument("--stream", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--cache", action=argparse.BooleanOptionalAction, default=False)
+    ap.add_argument("--facts", action=argparse.BooleanOptionalAction, default=True,
+                    help="fast path harga dari fact_index.json (tanpa LLM)")
+    ap.add_argument("--warmup", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--skip-reload-check", action="store_true", help="jangan stat dataset tiap pesan")
+    ap.add_argument("--sqlite", default=":memory:", help="file SQLite untuk chatlog (default in-memory)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--quiet", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--json", help="simpan hasil ke file JSON")
+    ap.add_argument("--max-p95-ms", type=float, help="gagal jika latency p95 melebihi nilai ini")
+    ap.add_argument("--min-msg-per-s", type=float, help="gagal jika throughput di bawah nilai ini")
+    args = ap.parse_args()
+
+    result = asyncio.run(run(args))
+    _print_report(result)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    failed = []
+    if args.max_p95_ms is not None and result["latency_ms"]["p95"] > args.max_p95_ms:
+        failed.append(f"p95 {result['latency_ms']['p95']:.0f}ms > {args.max_p95_ms:.0f}ms")
+    if args.min_msg_per_s is not None and result["msg_per_s"] < args.min_msg_per_s:
+        failed.append(f"throughput {result['msg_per_s']:.2f} < {args.min_msg_per_s:.2f} msg/s")
+    if failed:
+        print("❌ REGRESI:", "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
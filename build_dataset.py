@@ -1,76 +1,560 @@
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-import os, json
-
-DATA_DIR = "data"
-CHROMA_DIR = "chroma_db"
-PROCESSED_FILE = "processed_files.json"
-
-# Inisialisasi model embedding
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-# Membaca daftar file yang sudah diproses sebelumnya
-if os.path.exists(PROCESSED_FILE):
-    with open(PROCESSED_FILE, "r") as f:
-        processed_files = set(json.load(f))
-else:
-    processed_files = set()
-
-def load_documents():
-    docs = []
-    for file in os.listdir(DATA_DIR):
-        # Lewati file yang sudah pernah diproses
-        if file in processed_files:
-            print(f"[INFO] Lewati {file} (sudah pernah diproses)")
-            continue
+from embedding_service import get_embeddings, EMBED_BATCH_SIZE
+import index_store
+from lexical_index import LexicalIndex
+from fact_index import FactIndex, extract_facts
+from flat_index import FlatIndex, collection_count
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import os, json, hashlib, time
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_DIR = BASE_DIR / "data"
+CHROMA_DIR = index_store.LEGACY_CHROMA_DIR
+PROCESSED_FILE = BASE_DIR / "processed_files.json"
+MANIFEST_FILE = index_store.LEGACY_MANIFEST_FILE
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+SUPPORTED_EXT = (".pdf", ".txt")
+MANIFEST_VERSION = 1
+COLLECTION_NAME = "langchain"  # default langchain_chroma.Chroma
+
+# Worker parse/split paralel dan ukuran batch embed+tulis ke Chroma
+BUILD_WORKERS = int(os.getenv("BUILD_WORKERS", str(min(4, os.cpu_count() or 1))))
+BUILD_BATCH_SIZE = int(os.getenv("BUILD_BATCH_SIZE", str(EMBED_BATCH_SIZE)))
+# Index flat (flat_vectors.npy) hanya dipelihara kalau bot memakai RETRIEVER_BACKEND=flat;
+# dengan backend chroma file-nya tidak dibuat (salinan basi dari snapshot lama dihapus)
+FLAT_INDEX = os.getenv("RETRIEVER_BACKEND", "chroma").strip().lower() == "flat"
+
+
+# ============================================================
+# Manifest (hash per file & per chunk)
+# ============================================================
+# Bentuk index_manifest.json:
+# {
+#   "version": 1,
+#   "files": {
+#     "Paket_Trip_Bromo.pdf": {
+#       "size": 12345, "mtime_ns": 1700000000000000000, "sha256": "...",
+#       "chunks": {"<chunk_id>": "<sha256 teks chunk>", ...}
+#     }
+#   }
+# }
+def load_manifest(path: Path = MANIFEST_FILE) -> dict:
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION:
+                return data
+        except Exception as e:
+            print(f"[WARN] Manifest rusak, dibuat ulang: {e}")
+    return {"version": MANIFEST_VERSION, "files": {}}
+
+
+def _atomic_write_json(path: Path, data) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def save_manifest(manifest: dict, path: Path = MANIFEST_FILE) -> None:
+    _atomic_write_json(path, manifest)
+
+
+def load_processed_files(path: Path = PROCESSED_FILE) -> set:
+    if path.exists():
+        try:
+            return set(json.loads(path.read_text(encoding="utf-8")))
+        except Exception:
+            return set()
+    return set()
+
+
+def save_processed_files(processed, path: Path = PROCESSED_FILE) -> bool:
+    """
+    Tulis processed_files.json hanya kalau isinya berubah: mtime file ini ikut
+    signature dataset bot, jadi tulis ulang tanpa perubahan memicu reload.
+    """
+    if load_processed_files(path) == set(processed):
+        return False
+    _atomic_write_json(path, sorted(processed))
+    return True
+
+
+def file_sha256(path: Path, bufsize: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# Load + split (jalan di worker process)
+# ============================================================
+def load_pages(path: Path, file: str) -> list:
+    if file.lower().endswith(".pdf"):
+        loader = PyPDFLoader(str(path))
+    else:
+        loader = TextLoader(str(path))
+
+    loaded = loader.load()
+    for d in loaded:
+        # Tambahkan metadata agar bisa dihapus per-file dari Chroma
+        d.metadata["dataset_file"] = file
+        d.metadata["source"] = str(Path("data") / file)
+    return loaded
+
 
-        path = os.path.join(DATA_DIR, file)
-        if file.endswith(".pdf"):
-            loader = PyPDFLoader(path)
-        elif file.endswith(".txt"):
-            loader = TextLoader(path)
+def split_pages(loaded: list, file: str) -> list:
+    """Pecah halaman jadi chunk; tiap chunk diberi chunk_id berbasis isi."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    chunks = splitter.split_documents(loaded)
+
+    # ID stabil: hash isi chunk (+ urutan kemunculan kalau ada chunk kembar),
+    # jadi chunk yang tidak berubah tetap punya ID yang sama walau posisinya bergeser.
+    seen = {}
+    for c in chunks:
+        h = text_sha256(c.page_content)
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        c.metadata["chunk_hash"] = h
+        c.metadata["chunk_id"] = hashlib.sha1(f"{file}|{h}|{n}".encode("utf-8")).hexdigest()
+    return chunks
+
+
+def load_and_split(path: Path, file: str) -> list:
+    """Parse satu file lalu pecah jadi chunk."""
+    return split_pages(load_pages(path, file), file)
+
+
+def _parse_worker(path_str: str, file: str) -> dict:
+    """Dipanggil di process pool; hasil dibuat plain (tuple/dict) supaya murah di-pickle."""
+    t0 = time.perf_counter()
+    loaded = load_pages(Path(path_str), file)
+    chunks = split_pages(loaded, file)
+    pages = len({c.metadata.get("page", 0) for c in chunks})
+    return {
+        "file": file,
+        "pages": pages,
+        "seconds": time.perf_counter() - t0,
+        "chunks": [(c.metadata["chunk_id"], c.metadata["chunk_hash"], c.page_content, c.metadata) for c in chunks],
+        # fakta harga diambil dari teks utuh (bukan per chunk) supaya baris tabel tidak terpotong
+        "facts": extract_facts("\n".join(d.page_content for d in loaded), file),
+    }
+
+
+# ============================================================
+# Chroma collection (tanpa wrapper LangChain)
+# ============================================================
+def open_collection(chroma_dir: Path = CHROMA_DIR, space: str = "l2"):
+    """Collection yang sama dengan yang dibaca langchain_chroma.Chroma (nama default "langchain")."""
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(chroma_dir))
+    # l2 = default Chroma; metric lain hanya dipakai collection hasil import pack
+    metadata = {"hnsw:space": space} if space != "l2" else None
+    return client.get_or_create_collection(COLLECTION_NAME, metadata=metadata)
+
+
+# ============================================================
+# Build incremental + pipelined
+# ============================================================
+class _StageStats:
+    def __init__(self):
+        self.seconds = {"hash": 0.0, "parse": 0.0, "embed": 0.0, "write": 0.0}
+        self.items = {"hash": 0, "parse": 0, "embed": 0, "write": 0}
+
+    def add(self, stage: str, seconds: float, items: int) -> None:
+        self.seconds[stage] += seconds
+        self.items[stage] += items
+
+    def report(self) -> dict:
+        out = {}
+        units = {"hash": "files", "parse": "pages", "embed": "chunks", "write": "chunks"}
+        for k, sec in self.seconds.items():
+            rate = self.items[k] / sec if sec > 0 else 0.0
+            out[k] = {"seconds": round(sec, 3), units[k]: self.items[k], "per_s": round(rate, 1)}
+        return out
+
+
+def _list_data_files(data_dir: Path) -> list:
+    files = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.lower().endswith(SUPPORTED_EXT):
+            files.append(name)
         else:
-            print(f"[ERROR] Format file tidak didukung: {file}")
+            print(f"[ERROR] Format file tidak didukung: {name}")
+    return files
+
+
+def _delete_legacy_chunks(collection, file: str) -> None:
+    """File yang di-index sebelum ada manifest: chunk-nya ber-ID acak, hapus berdasarkan metadata."""
+    try:
+        collection.delete(where={"dataset_file": file})
+    except Exception as e:
+        print(f"[WARN] Gagal hapus chunk lama {file}: {e}")
+
+
+def _sync_lexical(lex: LexicalIndex, collection, manifest: dict, batch: int = 500) -> int:
+    """
+    Samakan index lexical dengan manifest: buang chunk yang sudah tidak ada dan
+    isi chunk yang belum ter-index (mis. index lama sebelum ada BM25) dari Chroma.
+    """
+    expected = {cid for entry in manifest["files"].values() for cid in entry["chunks"]}
+    extra = [cid for cid in lex.docs if cid not in expected]
+    lex.remove(extra)
+    missing = [cid for cid in expected if cid not in lex.docs]
+    for i in range(0, len(missing), batch):
+        got = collection.get(ids=missing[i:i + batch], include=["documents"])
+        for cid, text in zip(got["ids"], got["documents"]):
+            lex.add(cid, text or "")
+    return len(missing) + len(extra)
+
+
+def _no_progress(**counters) -> None:
+    pass
+
+
+def _embed_and_write(collection, embeddings, rows: list, stage: _StageStats, progress=_no_progress,
+                     written: list = None) -> None:
+    """
+    Embed per batch BUILD_BATCH_SIZE lalu langsung upsert; tidak ada list besar yang ditahan.
+    Kalau `written` diberikan, tiap batch (ids, vectors, texts, metadatas) ikut dicatat
+    untuk update index flat tanpa export ulang dari Chroma.
+    """
+    for i in range(0, len(rows), BUILD_BATCH_SIZE):
+        batch = rows[i:i + BUILD_BATCH_SIZE]
+        texts = [r[2] for r in batch]
+
+        t0 = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        stage.add("embed", time.perf_counter() - t0, len(batch))
+        progress(chunks_embedded=len(batch))
+
+        t0 = time.perf_counter()
+        collection.upsert(
+            ids=[r[0] for r in batch],
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[r[3] for r in batch],
+        )
+        stage.add("write", time.perf_counter() - t0, len(batch))
+        progress(chunks_written=len(batch))
+        if written is not None:
+            written.append(([r[0] for r in batch], np.asarray(vectors, dtype=np.float32), texts, [r[3] for r in batch]))
+
+
+def _update_flat(index_dir: Path, collection, removed: list, written: list, full: bool = False):
+    """
+    Perbarui flat_vectors.npy di index_dir: baris chunk yang dihapus dibuang dan vektor
+    yang baru di-embed ditambahkan. Export penuh dari Chroma hanya kalau file belum ada,
+    ada chunk yang dihapus tanpa ID (`full`), atau jumlah baris tidak cocok dengan collection.
+    Return jumlah vektor, atau None kalau index flat tidak dipakai (RETRIEVER_BACKEND != flat).
+    """
+    if not FLAT_INDEX:
+        FlatIndex.discard(index_dir)
+        return None
+    flat = None if full else FlatIndex.load(index_dir)
+    if flat is not None:
+        flat = flat.update(
+            removed,
+            [cid for ids, _v, _t, _m in written for cid in ids],
+            np.vstack([vectors for _i, vectors, _t, _m in written]) if written else [],
+            [text for _i, _v, texts, _m in written for text in texts],
+            [meta for _i, _v, _t, metas in written for meta in metas],
+        )
+    if flat is None or len(flat) != collection_count(collection):
+        flat = FlatIndex.from_collection(collection)
+    flat.save(index_dir)
+    return len(flat)
+
+
+def _iter_parsed(jobs: list, workers: int, pool=None):
+    """
+    Parse file paralel (process pool) dengan jumlah job in-flight terbatas.
+    pool bisa diberikan dari luar (mis. build worker yang hidup lama) supaya tidak dibuat ulang.
+    """
+    if pool is None and (workers <= 1 or len(jobs) <= 1):
+        for path, file in jobs:
+            yield _parse_worker(str(path), file)
+        return
+
+    if pool is None:
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            yield from _iter_parsed(jobs, workers, own_pool)
+        return
+
+    pending = set()
+    it = iter(jobs)
+    for path, file in it:
+        pending.add(pool.submit(_parse_worker, str(path), file))
+        if len(pending) >= max(1, workers) * 2:
+            break
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            yield fut.result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.add(pool.submit(_parse_worker, str(nxt[0]), nxt[1]))
+
+
+def run_build(collection=None, embeddings=None, data_dir: Path = DATA_DIR, workers: int = None, pool=None,
+              progress=_no_progress, index_dir: Path = None) -> dict:
+    """
+    Update index di index_dir (default chroma_db lama) secara in-place; dipakai
+    build_snapshot() terhadap snapshot staging. Index ulang hanya yang berubah:
+      - file dengan size+mtime sama seperti di manifest dilewati tanpa dibuka
+      - file yang isinya (sha256) sama hanya diperbarui stat-nya
+      - file berubah: di-parse & di-split paralel (process pool), chunk baru saja
+        yang di-embed & di-upsert per batch, chunk yang sudah tidak ada dihapus
+      - file yang hilang dari data/: semua chunk-nya dihapus, kecuali file hasil import
+        pack (entry "imported" di manifest) yang memang tidak pernah ada di data/ lokal
+      - fakta harga (fact_index.json) ikut diperbarui per file; file yang belum
+        punya fakta (index lama) di-parse ulang tanpa embed ulang chunk
+
+    progress(**counters) dipanggil dengan penambahan counter (files_total, files_done,
+    pages_parsed, chunks_embedded, chunks_written) untuk laporan progres job.
+    """
+    t0 = time.perf_counter()
+    index_dir = CHROMA_DIR if index_dir is None else index_dir
+    manifest_path = index_dir / index_store.MANIFEST_NAME if index_dir != CHROMA_DIR else MANIFEST_FILE
+    manifest = load_manifest(manifest_path)
+    processed = load_processed_files()
+    files_state = manifest["files"]
+    stage = _StageStats()
+    stats = {"skipped": 0, "rehashed": 0, "indexed_files": 0, "removed_files": 0, "kept_imported": 0,
+             "chunks_added": 0, "chunks_deleted": 0, "chunks_kept": 0, "facts_updated": 0}
+
+    if collection is None:
+        collection = open_collection(index_dir)
+    if embeddings is None:
+        embeddings = get_embeddings()
+    workers = BUILD_WORKERS if workers is None else workers
+    lex = LexicalIndex.load(index_dir)
+    facts = FactIndex.load(index_dir)
+    # perubahan vektor untuk index flat (hanya kalau RETRIEVER_BACKEND=flat)
+    flat_removed, flat_written = [], ([] if FLAT_INDEX else None)
+    flat_full = False
+
+    # 1) tentukan file yang perlu di-parse (stat dulu, hash hanya kalau stat berubah)
+    present = _list_data_files(data_dir)
+    to_parse = []
+    file_info = {}
+    for file in present:
+        path = data_dir / file
+        st = path.stat()
+        entry = files_state.get(file)
+
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns \
+                and file in facts.files:
+            stats["skipped"] += 1
             continue
 
-        print(f"[INFO] Memuat {file} ...")
-        loaded = loader.load()
-        # Tambahkan metadata agar bisa dihapus per-file dari Chroma
-        for d in loaded:
-            try:
-                d.metadata["dataset_file"] = file
-            except Exception:
-                pass
-        docs.extend(loaded)
-
-        # Tambahkan ke daftar file yang sudah diproses
-        processed_files.add(file)
-
-    return docs
-
-print("[INFO] Memuat dokumen...")
-documents = load_documents()
-print(f"[OK] Ditemukan {len(documents)} dokumen baru.")
-
-if len(documents) > 0:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    texts = splitter.split_documents(documents)
-    print(f"[INFO] Terbagi menjadi {len(texts)} potongan teks.")
-
-    print("[INFO] Menyimpan ke ChromaDB...")
-    db = Chroma(
-        persist_directory=CHROMA_DIR,
-        embedding_function=embeddings
-    )
-    db.add_documents(texts)
-    # db.persist()
-
-    # Simpan daftar file yang sudah diproses
-    with open(PROCESSED_FILE, "w") as f:
-        json.dump(list(processed_files), f)
-
-    print("[OK] Dataset berhasil diperbarui tanpa duplikasi.")
-else:
-    print("[OK] Tidak ada file baru untuk diproses.")
\ No newline at end of file
+        th = time.perf_counter()
+        digest = file_sha256(path)
+        stage.add("hash", time.perf_counter() - th, 1)
+        if entry and entry["sha256"] == digest and file in facts.files:
+            # isi sama (mis. di-touch / di-copy ulang), cukup update stat
+            entry["size"], entry["mtime_ns"] = st.st_size, st.st_mtime_ns
+            entry.pop("imported", None)  # file hasil import pack sekarang ada di data/ lokal
+            stats["rehashed"] += 1
+            continue
+
+        file_info[file] = (st, digest)
+        to_parse.append((path, file))
+
+    # 2) parse paralel -> per file: hapus chunk basi, embed + tulis chunk baru
+    progress(files_total=len(to_parse))
+    if to_parse:
+        print(f"[INFO] Memproses {len(to_parse)} file dengan {max(1, workers)} worker ...")
+    for parsed in _iter_parsed(to_parse, workers, pool):
+        file = parsed["file"]
+        rows = parsed["chunks"]
+        stage.add("parse", parsed["seconds"], parsed["pages"])
+        progress(pages_parsed=parsed["pages"])
+        st, digest = file_info[file]
+        entry = files_state.get(file)
+
+        new_map = {r[0]: r[1] for r in rows}
+        old_map = entry["chunks"] if entry else {}
+
+        if entry is None and file in processed:
+            _delete_legacy_chunks(collection, file)
+            flat_full = True  # ID chunk lama tidak diketahui
+
+        to_add = [r for r in rows if r[0] not in old_map]
+        stale = [cid for cid in old_map if cid not in new_map]
+
+        if stale:
+            collection.delete(ids=stale)
+        _embed_and_write(collection, embeddings, to_add, stage, progress, flat_written)
+        flat_removed.extend(stale)
+        lex.remove(stale)
+        for cid, _h, text, _meta in to_add:
+            lex.add(cid, text)
+        if facts.files.get(file) != parsed["facts"]:
+            facts.set_file(file, parsed["facts"])
+            stats["facts_updated"] += 1
+        progress(files_done=1)
+
+        print(f"[INFO] {file}: +{len(to_add)} chunk baru, -{len(stale)} chunk lama, "
+              f"{len(new_map) - len(to_add)} tidak berubah, {len(parsed['facts'])} fakta harga")
+        stats["indexed_files"] += 1
+        stats["chunks_added"] += len(to_add)
+        stats["chunks_deleted"] += len(stale)
+        stats["chunks_kept"] += len(new_map) - len(to_add)
+
+        files_state[file] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest, "chunks": new_map}
+        processed.add(file)
+        # simpan per file supaya kalau build terhenti, file yang sudah selesai tidak diulang
+        save_manifest(manifest, manifest_path)
+
+    # 3) file yang sudah tidak ada
+    imported = {f for f in files_state if f not in present and files_state[f].get("imported")}
+    if imported:
+        # replika dari import pack: file-nya tidak pernah ada di sini, chunk-nya jangan dihapus
+        # (hapus satu per satu lewat remove_from_index / DELETE dataset kalau memang dibuang)
+        print(f"[WARN] {len(imported)} file hasil import pack tidak ada di data/, chunk-nya dipertahankan")
+        stats["kept_imported"] = len(imported)
+    for file in [f for f in files_state if f not in present and f not in imported]:
+        stale = list(files_state[file]["chunks"])
+        if stale:
+            collection.delete(ids=stale)
+            lex.remove(stale)
+            flat_removed.extend(stale)
+        print(f"[INFO] {file} tidak ada lagi di data/, {len(stale)} chunk dihapus")
+        del files_state[file]
+        processed.discard(file)
+        if facts.remove_file(file):
+            stats["facts_updated"] += 1
+        stats["removed_files"] += 1
+        stats["chunks_deleted"] += len(stale)
+
+    save_manifest(manifest, manifest_path)
+    if index_dir == CHROMA_DIR:
+        # mode lama (in-place, tanpa snapshot): bot membaca chroma_db langsung
+        save_processed_files(processed)
+    # mode snapshot: ditulis build_snapshot() setelah publish
+    stats["processed"] = sorted(processed)
+
+    # index lexical (BM25) ikut di folder index yang sama
+    stats["lexical_synced"] = _sync_lexical(lex, collection, manifest)
+    lex.save(index_dir)
+    # index fakta harga (fast path tanpa LLM) juga per snapshot
+    for file in [f for f in facts.files if f not in files_state]:
+        facts.remove_file(file)
+        stats["facts_updated"] += 1
+    facts.save(index_dir)
+    stats["facts"] = len(facts)
+
+    changed = stats["chunks_added"] or stats["chunks_deleted"] or stats["lexical_synced"] or stats["facts_updated"]
+    # snapshot vektor untuk RETRIEVER_BACKEND=flat: diperbarui incremental dari vektor build ini
+    if changed or (FLAT_INDEX and not FlatIndex.exists(index_dir)):
+        n_flat = _update_flat(index_dir, collection, flat_removed, flat_written or [], flat_full)
+        if n_flat is not None:
+            stats["flat_vectors"] = n_flat
+    stats["changed"] = bool(changed)
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    stats["stages"] = stage.report()
+    return stats
+
+
+def build_snapshot(embeddings=None, data_dir: Path = DATA_DIR, workers: int = None, pool=None,
+                   progress=_no_progress) -> dict:
+    """
+    Build blue/green: snapshot aktif disalin, run_build() menulis ke salinan,
+    lalu pointer CURRENT dipindah kalau ada perubahan. Bot tidak pernah membaca
+    index yang sedang ditulis.
+    """
+    with index_store.staging() as snap:
+        collection = open_collection(snap.path)
+        stats = run_build(collection=collection, embeddings=embeddings, data_dir=data_dir,
+                          workers=workers, pool=pool, progress=progress, index_dir=snap.path)
+        processed = stats.pop("processed")
+        if stats["changed"]:
+            snap.publish({k: v for k, v in stats.items() if k != "stages"})
+            stats["snapshot"] = snap.name
+        else:
+            stats["snapshot"] = snap.parent
+    # setelah CURRENT pindah (dan hanya kalau berubah), supaya tidak memicu reload snapshot lama
+    save_processed_files(processed)
+    return stats
+
+
+def remove_from_index(file: str) -> dict:
+    """
+    Hapus satu dataset dari index tanpa model embedding: ID chunk diambil dari
+    manifest lalu dihapus dalam satu panggilan collection.delete(ids=...) di
+    snapshot baru. File lama yang belum tercatat di manifest dihapus lewat
+    metadata dataset_file.
+    """
+    t0 = time.perf_counter()
+    processed = load_processed_files()
+    in_processed = file in processed
+    manifest = load_manifest(index_store.current_manifest_path())
+    entry = manifest["files"].get(file)
+    if entry is None and not in_processed:
+        return {"in_manifest": False, "in_processed": False, "method": "none",
+                "chunks_deleted": 0, "snapshot": index_store.current_name(),
+                "seconds": round(time.perf_counter() - t0, 4)}
+
+    with index_store.staging() as snap:
+        manifest = load_manifest(snap.manifest_path)
+        entry = manifest["files"].pop(file, None)
+        collection = open_collection(snap.path)
+
+        ids = list(entry["chunks"]) if entry else []
+        if ids:
+            collection.delete(ids=ids)
+            lex = LexicalIndex.load(snap.path)
+            lex.remove(ids)
+            lex.save(snap.path)
+            method = "ids"
+        else:
+            _delete_legacy_chunks(collection, file)
+            method = "metadata"
+
+        facts = FactIndex.load(snap.path)
+        if facts.remove_file(file):
+            facts.save(snap.path)
+        _update_flat(snap.path, collection, ids, [], full=not ids)
+
+        save_manifest(manifest, snap.manifest_path)
+        snap.publish({"removed_file": file, "chunks_deleted": len(ids)})
+
+    if in_processed:
+        processed.discard(file)
+        save_processed_files(processed)
+
+    return {
+        "in_manifest": entry is not None,
+        "in_processed": in_processed,
+        "method": method,
+        "chunks_deleted": len(ids),
+        "snapshot": snap.name,
+        "seconds": round(time.perf_counter() - t0, 4),
+    }
+
+
+def main():
+    print("[INFO] Memeriksa dataset...")
+    stats = build_snapshot()
+    for name, st in stats.pop("stages").items():
+        print(f"[STAT] {name:<6} {st}")
+    if stats["changed"]:
+        print(f"[OK] Dataset berhasil diperbarui tanpa duplikasi: {stats}")
+    else:
+        print(f"[OK] Tidak ada perubahan untuk diproses: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from filelock import FileLock
+
+import build_dataset
+from embedding_service import get_embeddings
+
+BASE_DIR = Path(__file__).resolve().parent
+LOCK_FILE = BASE_DIR / ".build.lock"
+
+# Lock antar-proses (mis. build_dataset.py dijalankan manual bersamaan)
+BUILD_LOCK_TIMEOUT = float(os.getenv("BUILD_LOCK_TIMEOUT", "300"))
+# Jumlah job terakhir yang statusnya masih bisa ditanyakan lewat API
+BUILD_JOB_HISTORY = int(os.getenv("BUILD_JOB_HISTORY", "500"))
+
+PROGRESS_KEYS = ("files_total", "files_done", "pages_parsed", "chunks_embedded", "chunks_written")
+
+
+class BuildJob:
+    def __init__(self, kind: str = "build", **params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.progress = {k: 0 for k in PROGRESS_KEYS}
+        self.coalesced_with = []  # job lain yang ikut diselesaikan oleh build yang sama
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def add_progress(self, **counters) -> None:
+        for k, v in counters.items():
+            self.progress[k] = self.progress.get(k, 0) + v
+
+    def to_dict(self) -> dict:
+        now = time.time()
+        started = self.started_at or now
+        finished = self.finished_at or now
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "coalesced_with": list(self.coalesced_with),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": {
+                "queued_s": round(started - self.created_at, 3),
+                "run_s": round(finished - started, 3) if self.started_at else 0.0,
+            },
+        }
+
+
+class BuildWorker:
+    """
+    Worker build yang hidup selama proses dataset API berjalan.
+
+    Model embedding dan process pool parse dibuat sekali lalu dipakai ulang;
+    job diambil satu per satu dari antrean lalu build_snapshot() menjalankan
+    upsert incremental ke snapshot baru. Job "delete" (hapus satu dataset)
+    lewat antrean + lock yang sama, jadi request HTTP tidak ikut menunggu.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = build_dataset.BUILD_WORKERS if workers is None else workers
+        self._queue = queue.Queue()
+        self._next = None  # job non-build yang sudah diambil saat menggabung build, dijalankan berikutnya
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._embeddings = None
+        self._pool = None
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self.ready = threading.Event()
+
+    # ---------- lifecycle ----------
+    def start(self) -> "BuildWorker":
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="build-worker", daemon=True)
+                self._thread.start()
+        return self
+
+    def _warm(self) -> None:
+        t0 = time.perf_counter()
+        self._embeddings = get_embeddings()
+        self._embeddings.embed_documents(["warmup"])
+        if self.workers > 1:
+            # spawn: aman dipakai dari proses yang sudah punya banyak thread (Flask + torch)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        self.ready.set()
+        print(f"[INFO] Build worker siap dalam {time.perf_counter() - t0:.2f}s")
+
+    # ---------- producer ----------
+    def submit(self, kind: str = "build", **params) -> BuildJob:
+        self.start()
+        job = BuildJob(kind, **params)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > BUILD_JOB_HISTORY:
+                self._jobs.popitem(last=False)
+        self._queue.put(job)
+        return job
+
+    def get_job(self, job_id: str):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 50) -> list:
+        with self._jobs_lock:
+            jobs = list(self._jobs.values())[-limit:]
+        return [j.to_dict() for j in reversed(jobs)]
+
+    def queue_size(self) -> int:
+        return self._queue.qsize() + (self._next is not None)
+
+    def run_sync(self, kind: str = "build", timeout: float = None, **params) -> BuildJob:
+        job = self.submit(kind, **params)
+        job.done.wait(timeout)
+        return job
+
+    # ---------- consumer ----------
+    def _execute(self, job: BuildJob, group: list) -> dict:
+        if job.kind == "build":
+            def _progress(**counters):
+                for j in group:
+                    j.add_progress(**counters)
+
+            return build_dataset.build_snapshot(
+                embeddings=self._embeddings,
+                workers=self.workers,
+                pool=self._pool,
+                progress=_progress,
+            )
+        if job.kind == "delete":
+            return self._delete(job.params["filename"])
+        raise ValueError(f"jenis job tidak dikenal: {job.kind}")
+
+    @staticmethod
+    def _delete(filename: str) -> dict:
+        """
+        Hapus file dari data/ lalu chunk-nya dari index (tanpa model embedding), di
+        snapshot baru; entry manifest & processed_files.json ikut dibuang supaya file
+        dengan nama sama bisa di-upload ulang.
+        """
+        file_path = build_dataset.DATA_DIR / filename
+        file_deleted = file_path.exists()
+        if file_deleted:
+            file_path.unlink()
+        return {"filename": filename, "file_deleted": file_deleted, **build_dataset.remove_from_index(filename)}
+
+    def _take_group(self, job: BuildJob) -> list:
+        """
+        Job build yang mengantre tepat di belakang digabung ke build ini: satu run_build
+        sudah memproses semua file baru di data/, jadi cukup satu kali update index.
+        Berhenti di job lain (mis. delete) supaya urutan upload/hapus file yang sama terjaga.
+        """
+        group = [job]
+        if job.kind != "build":
+            return group
+        while True:
+            try:
+                nxt = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if nxt.kind != "build":
+                self._next = nxt
+                break
+            group.append(nxt)
+        return group
+
+    def _run(self) -> None:
+        try:
+            self._warm()
+        except Exception as e:
+            print(f"❌ Build worker gagal warm-up (akan dicoba lagi saat job pertama): {e}")
+            traceback.print_exc()
+
+        while True:
+            job, self._next = self._next or self._queue.get(), None
+            group = self._take_group(job)
+            now = time.time()
+            for j in group:
+                j.status = "running"
+                j.started_at = now
+                j.coalesced_with = [o.id for o in group if o is not j]
+            if len(group) > 1:
+                print(f"[INFO] {len(group)} job build digabung jadi satu update index")
+
+            result, error = None, None
+            try:
+                if job.kind == "build" and not self.ready.is_set():
+                    self._warm()
+                with FileLock(str(LOCK_FILE)).acquire(timeout=BUILD_LOCK_TIMEOUT):
+                    result = self._execute(job, group)
+            except Exception as e:
+                error = str(e)
+                traceback.print_exc()
+            finally:
+                now = time.time()
+                for j in group:
+                    j.result = result
+                    j.error = error
+                    j.status = "failed" if error else "done"
+                    j.finished_at = now
+                    j.done.set()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_build_worker() -> BuildWorker:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = BuildWorker().start()
+        return _worker
@@ -1,45 +1,285 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
 import psycopg2
 from psycopg2 import sql
-import os
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 # === Load .env file ===
 load_dotenv()
 
+# === Konfigurasi chatlog sink ===
+# CHATLOG_OVERFLOW: apa yang dilakukan kalau antrean penuh
+#   drop_oldest (default) -> buang baris paling lama, simpan yang baru
+#   drop_new              -> buang baris yang baru masuk
+#   block                 -> tunggu maks CHATLOG_BLOCK_TIMEOUT detik, lalu buang
+CHATLOG_QUEUE_SIZE = int(os.getenv("CHATLOG_QUEUE_SIZE", "10000"))
+CHATLOG_BATCH_SIZE = int(os.getenv("CHATLOG_BATCH_SIZE", "200"))
+CHATLOG_FLUSH_INTERVAL = float(os.getenv("CHATLOG_FLUSH_INTERVAL", "1.0"))
+CHATLOG_OVERFLOW = os.getenv("CHATLOG_OVERFLOW", "drop_oldest").strip().lower()
+CHATLOG_BLOCK_TIMEOUT = float(os.getenv("CHATLOG_BLOCK_TIMEOUT", "0.05"))
+CHATLOG_POOL_MIN = int(os.getenv("CHATLOG_POOL_MIN", "1"))
+CHATLOG_POOL_MAX = int(os.getenv("CHATLOG_POOL_MAX", "4"))
+CHATLOG_MAX_RETRIES = int(os.getenv("CHATLOG_MAX_RETRIES", "3"))
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+
+
+def _db_params() -> dict:
+    return dict(
+        host=os.getenv("DB_HOST", "localhost"),
+        dbname=os.getenv("DB_NAME", "your_database_name"),
+        user=os.getenv("DB_USER", "your_user"),
+        password=os.getenv("DB_PASSWORD", "your_password"),
+    )
+
+
 # === Koneksi Database PostgreSQL ===
 def get_db_connection():
     try:
-        connection = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            dbname=os.getenv("DB_NAME", "your_database_name"),
-            user=os.getenv("DB_USER", "your_user"),
-            password=os.getenv("DB_PASSWORD", "your_password"),
-        )
+        connection = psycopg2.connect(**_db_params())
         return connection
     except Exception as e:
         print(f"❌ Koneksi ke database gagal: {e}")
         return None
 
-# === Simpan Chat Log ke Database ===
-def save_chatlog(question: str, answer: str, user_id: str, status: int):
-    connection = get_db_connection()
-    if connection is None:
-        return
 
-    cursor = connection.cursor()
-    
-    try:
-        query = sql.SQL("""
-            INSERT INTO public.h_chatlog (question, answer, user_id, status)
-            VALUES (%s, %s, %s, %s)
-        """)
-        
-        cursor.execute(query, (question, answer, user_id, status))
-        connection.commit()
-        print("✅ Chatlog berhasil disimpan ke database.")
-    except Exception as e:
-        print(f"❌ Gagal menyimpan chatlog: {e}")
-    finally:
-        cursor.close()
-        connection.close()
+# === Writer Postgres (pool + multi-row INSERT) ===
+class PostgresChatlogWriter:
+    """Tulis batch baris chatlog ke public.h_chatlog memakai connection pool."""
+
+    INSERT_SQL = sql.SQL("""
+        INSERT INTO public.h_chatlog (question, answer, user_id, status)
+        VALUES %s
+    """)
+
+    def __init__(self, minconn: int = CHATLOG_POOL_MIN, maxconn: int = CHATLOG_POOL_MAX):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        # dibuat lazy supaya import modul ini tidak langsung konek ke DB
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, **_db_params())
+            return self._pool
+
+    def write(self, rows: list) -> None:
+        pool = self._get_pool()
+        connection = pool.getconn()
+        broken = False
+        try:
+            with connection.cursor() as cursor:
+                execute_values(cursor, self.INSERT_SQL.as_string(connection), rows, page_size=len(rows))
+            connection.commit()
+        except Exception:
+            broken = True
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            # koneksi yang error dibuang dari pool, nanti pool buka yang baru
+            pool.putconn(connection, close=broken)
+
+    def close(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+
+# === Sink asinkron: antrean terbatas + background writer ===
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_TICK = object()  # penanda flush_interval habis
+
+
+class ChatlogSink:
+    """
+    Antrean chatlog in-process yang dikuras thread background.
+
+    submit() tidak pernah menunggu DB; baris ditulis per batch saat jumlahnya
+    mencapai batch_size atau saat flush_interval lewat, dan saat close().
+    """
+
+    def __init__(
+        self,
+        writer=None,
+        maxsize: int = CHATLOG_QUEUE_SIZE,
+        batch_size: int = CHATLOG_BATCH_SIZE,
+        flush_interval: float = CHATLOG_FLUSH_INTERVAL,
+        overflow: str = CHATLOG_OVERFLOW,
+        block_timeout: float = CHATLOG_BLOCK_TIMEOUT,
+        max_retries: int = CHATLOG_MAX_RETRIES,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"CHATLOG_OVERFLOW tidak dikenal: {overflow} (pilih {OVERFLOW_POLICIES})")
+
+        self.writer = writer or PostgresChatlogWriter()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
 
+        self._thread = threading.Thread(target=self._run, name="chatlog-writer", daemon=True)
+        self._thread.start()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # ---------- producer ----------
+    def submit(self, question: str, answer: str, user_id, status: int) -> bool:
+        if self._closed:
+            self._count("dropped")
+            return False
+
+        row = (question, answer, str(user_id), status)
+        self._count("submitted")
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow == "block":
+            try:
+                self._queue.put(row, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                self._count("dropped")
+                return False
+
+        if self.overflow == "drop_oldest":
+            try:
+                old = self._queue.get_nowait()
+                if isinstance(old, _FlushRequest):
+                    # jangan buang permintaan flush, kembalikan lagi
+                    self._queue.put_nowait(old)
+                else:
+                    self._count("dropped")
+                self._queue.put_nowait(row)
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+
+        self._count("dropped")
+        return False
+
+    def flush(self, timeout: float = None) -> bool:
+        """Tunggu sampai semua baris yang sudah masuk antrean tertulis."""
+        if not self._thread.is_alive():
+            return False
+        req = _FlushRequest()
+        self._queue.put(req)
+        return req.done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        close = getattr(self.writer, "close", None)
+        if close:
+            close()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    # ---------- consumer ----------
+    def _write_batch(self, batch: list) -> None:
+        if not batch:
+            return
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.writer.write(batch)
+                self._count("written", len(batch))
+                self._count("batches")
+                return
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    print(f"❌ Gagal menyimpan {len(batch)} chatlog: {e}")
+                    self._count("failed", len(batch))
+                    return
+                time.sleep(min(2.0, 0.1 * (2 ** attempt)))
+
+    def _run(self) -> None:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _TICK
+            if item is None:
+                self._write_batch(batch)
+                return
+
+            if isinstance(item, tuple):
+                batch.append(item)
+                if len(batch) < self.batch_size:
+                    continue
+
+            self._write_batch(batch)
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_chatlog_sink() -> ChatlogSink:
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = ChatlogSink()
+        return _sink
+
+
+def set_chatlog_sink(sink: ChatlogSink) -> None:
+    """Ganti sink global (mis. untuk benchmark pakai writer SQLite/in-memory)."""
+    global _sink
+    with _sink_lock:
+        old, _sink = _sink, sink
+    if old is not None and old is not sink:
+        old.close()
+
+
+def close_chatlog_sink(timeout: float = 10.0) -> None:
+    with _sink_lock:
+        sink = _sink
+    if sink is not None:
+        sink.close(timeout)
+
+
+atexit.register(close_chatlog_sink)
+
+
+# === Simpan Chat Log ke Database ===
+def save_chatlog(question: str, answer: str, user_id: str, status: int):
+    """Masukkan chatlog ke antrean (non-blocking); ditulis batch oleh background writer."""
+    get_chatlog_sink().submit(question, answer, user_id, status)
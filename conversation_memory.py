@@ -0,0 +1,262 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# === Konfigurasi memori percakapan ===
+# MEMORY_BACKEND:
+#   memory   (default) -> hanya di RAM proses ini, hilang saat restart
+#   sqlite             -> tabel di MEMORY_SQLITE_PATH (bisa dibagi beberapa proses di 1 host)
+#   postgres           -> tabel public.h_conversation_memory (DB yang sama dengan chatlog)
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "memory").strip().lower()
+MEMORY_MAX_USERS = int(os.getenv("MEMORY_MAX_USERS", "10000"))
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "5"))  # 1 turn = pertanyaan + jawaban
+MEMORY_TTL = float(os.getenv("MEMORY_TTL", "86400"))  # detik sejak pesan terakhir
+MEMORY_SQLITE_PATH = Path(os.getenv("MEMORY_SQLITE_PATH", str(BASE_DIR / "conversation_memory.sqlite3")))
+# Hapus baris kedaluwarsa di backend setiap N kali append
+MEMORY_PRUNE_EVERY = int(os.getenv("MEMORY_PRUNE_EVERY", "500"))
+
+BACKENDS = ("memory", "sqlite", "postgres")
+
+
+def render_turns(turns) -> str:
+    """Format riwayat yang dimasukkan ke prompt (sama seperti format lama)."""
+    return "\n".join(f"Pengguna: {q}\nBot: {a}" for q, a in turns)
+
+
+# === Backend persisten ===
+class SQLiteMemoryBackend:
+    def __init__(self, path: Path = MEMORY_SQLITE_PATH):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_turns ("
+            " user_id TEXT NOT NULL, ts REAL NOT NULL, question TEXT NOT NULL, answer TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_turns_user_ts ON conversation_turns (user_id, ts)")
+        self._lock = threading.Lock()
+
+    def load(self, user_id: str, limit: int, since: float) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question, answer FROM conversation_turns WHERE user_id = ? AND ts >= ?"
+                " ORDER BY ts DESC LIMIT ?",
+                (user_id, since, limit),
+            ).fetchall()
+        return rows[::-1]
+
+    def append(self, user_id: str, ts: float, question: str, answer: str, keep: int) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO conversation_turns (user_id, ts, question, answer) VALUES (?, ?, ?, ?)",
+                (user_id, ts, question, answer),
+            )
+            # ring buffer di DB: sisakan `keep` turn terakhir per user
+            self._conn.execute(
+                "DELETE FROM conversation_turns WHERE user_id = ? AND ts < ("
+                " SELECT ts FROM conversation_turns WHERE user_id = ? ORDER BY ts DESC LIMIT 1 OFFSET ?)",
+                (user_id, user_id, keep - 1),
+            )
+            self._conn.execute("COMMIT")
+
+    def clear(self, user_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM conversation_turns WHERE user_id = ?", (user_id,))
+
+    def prune(self, before: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM conversation_turns WHERE ts < ?", (before,)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PostgresMemoryBackend:
+    """Riwayat di Postgres supaya beberapa replika bot melihat percakapan yang sama."""
+
+    def __init__(self, minconn: int = 1, maxconn: int = 4):
+        from psycopg2.pool import ThreadedConnectionPool
+        from chatlog_db import _db_params
+
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **_db_params())
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS public.h_conversation_memory ("
+            " user_id TEXT NOT NULL, ts DOUBLE PRECISION NOT NULL,"
+            " question TEXT NOT NULL, answer TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS ix_conv_mem_user_ts ON public.h_conversation_memory (user_id, ts)"
+        )
+
+    def _execute(self, query: str, params=None, fetch: bool = False):
+        connection = self._pool.getconn()
+        broken = False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                rows = cursor.fetchall() if fetch else cursor.rowcount
+            connection.commit()
+            return rows
+        except Exception:
+            broken = True
+            try:
+                connection.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            self._pool.putconn(connection, close=broken)
+
+    def load(self, user_id: str, limit: int, since: float) -> list:
+        rows = self._execute(
+            "SELECT question, answer FROM public.h_conversation_memory"
+            " WHERE user_id = %s AND ts >= %s ORDER BY ts DESC LIMIT %s",
+            (user_id, since, limit),
+            fetch=True,
+        )
+        return rows[::-1]
+
+    def append(self, user_id: str, ts: float, question: str, answer: str, keep: int) -> None:
+        self._execute(
+            "INSERT INTO public.h_conversation_memory (user_id, ts, question, answer) VALUES (%s, %s, %s, %s);"
+            "DELETE FROM public.h_conversation_memory WHERE user_id = %s AND ts < ("
+            " SELECT ts FROM public.h_conversation_memory WHERE user_id = %s"
+            " ORDER BY ts DESC LIMIT 1 OFFSET %s)",
+            (user_id, ts, question, answer, user_id, user_id, keep - 1),
+        )
+
+    def clear(self, user_id: str) -> None:
+        self._execute("DELETE FROM public.h_conversation_memory WHERE user_id = %s", (user_id,))
+
+    def prune(self, before: float) -> int:
+        return self._execute("DELETE FROM public.h_conversation_memory WHERE ts < %s", (before,))
+
+    def close(self) -> None:
+        self._pool.closeall()
+
+
+def _make_backend(name: str):
+    if name not in BACKENDS:
+        raise ValueError(f"MEMORY_BACKEND tidak dikenal: {name} (pilih {BACKENDS})")
+    if name == "sqlite":
+        return SQLiteMemoryBackend()
+    if name == "postgres":
+        return PostgresMemoryBackend()
+    return None
+
+
+# === Memori percakapan ===
+class _Conversation:
+    __slots__ = ("turns", "last_seen")
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.last_seen = time.time()
+
+
+class ConversationMemory:
+    """
+    Riwayat percakapan per chat: maksimal max_users chat (LRU), dibuang setelah
+    ttl detik tanpa pesan, dan per chat hanya max_turns turn terakhir (deque).
+
+    Dengan backend (sqlite/postgres) riwayat dibaca dari & ditulis ke DB setiap
+    kali, jadi tahan restart dan bisa dipakai bersama beberapa replika bot;
+    method-nya blocking, panggil dari executor.
+    """
+
+    def __init__(self, max_users: int = MEMORY_MAX_USERS, max_turns: int = MEMORY_MAX_TURNS,
+                 ttl: float = MEMORY_TTL, backend=None):
+        self.max_users = max(1, max_users)
+        self.max_turns = max(1, max_turns)
+        self.ttl = ttl
+        self.backend = backend
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._appends = 0
+        self.evicted = 0
+        self.expired = 0
+
+    @property
+    def is_local(self) -> bool:
+        return self.backend is None
+
+    def _expire(self, now: float) -> None:
+        # OrderedDict urut dari yang paling lama tidak aktif -> cukup cek dari depan
+        if self.ttl <= 0:
+            return
+        while self._local:
+            key, conv = next(iter(self._local.items()))
+            if now - conv.last_seen < self.ttl:
+                break
+            self._local.popitem(last=False)
+            self.expired += 1
+
+    def get_turns(self, user_id) -> list:
+        now = time.time()
+        if self.backend is not None:
+            since = now - self.ttl if self.ttl > 0 else 0.0
+            return [tuple(r) for r in self.backend.load(str(user_id), self.max_turns, since)]
+
+        with self._lock:
+            self._expire(now)
+            conv = self._local.get(user_id)
+            return list(conv.turns) if conv else []
+
+    def get_context(self, user_id) -> str:
+        return render_turns(self.get_turns(user_id))
+
+    def add_turn(self, user_id, question: str, answer: str) -> None:
+        now = time.time()
+        if self.backend is not None:
+            self.backend.append(str(user_id), now, question, answer, self.max_turns)
+            self._appends += 1
+            if self.ttl > 0 and self._appends % MEMORY_PRUNE_EVERY == 0:
+                self.backend.prune(now - self.ttl)
+            return
+
+        with self._lock:
+            conv = self._local.get(user_id)
+            if conv is None:
+                conv = self._local[user_id] = _Conversation(self.max_turns)
+            conv.turns.append((question, answer))
+            conv.last_seen = now
+            self._local.move_to_end(user_id)
+            self._expire(now)
+            while len(self._local) > self.max_users:
+                self._local.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self, user_id) -> None:
+        if self.backend is not None:
+            self.backend.clear(str(user_id))
+            return
+        with self._lock:
+            self._local.pop(user_id, None)
+
+    def close(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._local)
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else "memory",
+            "users": size,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+
+def create_memory(backend: str = MEMORY_BACKEND) -> ConversationMemory:
+    return ConversationMemory(backend=_make_backend(backend))
@@ -1,25 +1,35 @@
 import os
-import sys
 import re
-import subprocess
 import json
+import hashlib
+import multiprocessing
+import time
+import zipfile
 from pathlib import Path
-from filelock import FileLock, Timeout
 from flask import Flask, request, jsonify
 
+from build_worker import get_build_worker
+from build_dataset import load_manifest
+from index_store import current_manifest_path
+
 app = Flask(__name__)
 
 # ==== Konfigurasi ====
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
-BUILD_SCRIPT = BASE_DIR / "build_dataset.py"
-LOCK_FILE = BASE_DIR / ".build.lock"
 
 API_TOKEN = os.getenv("DATASET_API_TOKEN", "CHANGE_ME")
 
 # Batasi ukuran upload (contoh 50MB)
 app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024
 
+# Bulk upload (banyak file / zip) punya batas sendiri
+BULK_MAX_CONTENT_LENGTH = int(os.getenv("BULK_MAX_CONTENT_LENGTH", str(500 * 1024 * 1024)))
+BULK_MAX_UNCOMPRESSED = int(os.getenv("BULK_MAX_UNCOMPRESSED", str(2 * 1024 * 1024 * 1024)))
+BULK_WAIT_TIMEOUT = float(os.getenv("BULK_WAIT_TIMEOUT", "600"))
+STREAM_CHUNK = 1024 * 1024
+ALLOWED_EXT = (".pdf", ".txt")
+
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 PROCESSED_FILE = BASE_DIR / "processed_files.json"
@@ -60,81 +70,20 @@ def _unique_path(dest: Path) -> Path:
         i += 1
 
 
-def _run_build() -> dict:
+def _enqueue_build(**params):
     """
-    Menjalankan build_dataset.py (incremental karena ada processed_files.json).
+    Masukkan job ingest ke build worker (model embedding, client Chroma dan
+    process pool sudah warm). Request HTTP tidak menunggu embedding selesai.
     """
-    if not BUILD_SCRIPT.exists():
-        raise FileNotFoundError(f"build script not found: {BUILD_SCRIPT}")
-
-    # Jalankan pakai python env yang sama
-    proc = subprocess.run(
-        [sys.executable, str(BUILD_SCRIPT)],
-        cwd=str(BASE_DIR),
-        capture_output=True,
-        text=True
-    )
-
-    return {
-        "returncode": proc.returncode,
-        "stdout": proc.stdout[-8000:],  # potong biar response tidak kebesaran
-        "stderr": proc.stderr[-8000:],
-    }
-
-
-def _save_processed_files(processed: set) -> None:
-    PROCESSED_FILE.write_text(
-        json.dumps(sorted(list(processed)), ensure_ascii=False),
-        encoding="utf-8"
-    )
-
-
-def _delete_from_chroma(filename: str) -> dict:
-    chroma_dir = BASE_DIR / "chroma_db"
-
-    # lazy import supaya flask tetap ringan kalau endpoint ini tidak dipakai
-    try:
-        from langchain_huggingface import HuggingFaceEmbeddings
-        from langchain_chroma import Chroma
-    except Exception as e:
-        return {"ok": False, "error": f"Chroma/LangChain import failed: {e}"}
-
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    db = Chroma(persist_directory=str(chroma_dir), embedding_function=embeddings)
-
-    rel_source = str(Path("data") / filename)
-    abs_source = str((DATA_DIR / filename).resolve())
-
-    # Variasi path untuk jaga-jaga (Linux/Windows)
-    candidates = list(dict.fromkeys([
-        rel_source,
-        rel_source.replace("/", "\\"),
-        abs_source,
-        abs_source.replace("/", "\\"),
-    ]))
-
-    errors = []
-    # Metadata baru (jika build_dataset.py sudah ditambah)
-    try:
-        db.delete(where={"dataset_file": filename})
-    except Exception as e:
-        errors.append(f"delete(where=dataset_file) failed: {e}")
+    return get_build_worker().submit("build", **params)
 
-    # Metadata bawaan loader (source)
-    for src in candidates:
-        try:
-            db.delete(where={"source": src})
-        except Exception as e:
-            errors.append(f"delete(where=source={src}) failed: {e}")
-
-    # Persist jika method tersedia
-    try:
-        if hasattr(db, "persist"):
-            db.persist()
-    except Exception as e:
-        errors.append(f"persist failed: {e}")
 
-    return {"ok": True, "attempted_sources": candidates, "errors": errors}
+def _enqueue_delete(filename: str):
+    """
+    Hapus dataset lewat build worker (antrean + lock build yang sama): membuat snapshot
+    baru tanpa chunk file ini, jadi request HTTP tidak menunggu salinan snapshot / build lain.
+    """
+    return get_build_worker().submit("delete", filename=filename)
 
 
 @app.get("/health")
@@ -169,25 +118,194 @@ def upload_dataset():
             "already_built": (filename in processed),
         }), 409
 
-    # jika lolos cek, baru simpan & build
+    # jika lolos cek, baru simpan & antrekan build
     f.save(file_path)
 
-    lock = FileLock(str(LOCK_FILE))
     try:
-        with lock.acquire(timeout=300):
-            build_result = _run_build()
-    except Timeout:
-        return jsonify({"ok": False, "error": "Build is busy (lock timeout). Try again."}), 429
+        job = _enqueue_build(files=[filename])
     except Exception as e:
         return jsonify({"ok": False, "error": str(e), "file_saved": filename}), 500
 
-    status = 200 if build_result["returncode"] == 0 else 500
     return jsonify({
-        "ok": build_result["returncode"] == 0,
-        "message": "uploaded & build executed",
+        "ok": True,
+        "message": "uploaded, ingest job queued",
         "saved_as": filename,
-        "build": build_result
-    }), status
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "job": job.to_dict(),
+    }), 202
+
+
+@app.get("/jobs/<job_id>")
+def job_status(job_id):
+    if not _auth_or_401():
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    job = get_build_worker().get_job(job_id)
+    if job is None:
+        return jsonify({"ok": False, "error": "job not found", "job_id": job_id}), 404
+    return jsonify({"ok": True, "job": job.to_dict()}), 200
+
+
+@app.get("/jobs")
+def list_jobs():
+    if not _auth_or_401():
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    limit = request.args.get("limit", default=50, type=int)
+    worker = get_build_worker()
+    return jsonify({
+        "ok": True,
+        "queue_size": worker.queue_size(),
+        "worker_ready": worker.ready.is_set(),
+        "jobs": worker.list_jobs(limit),
+    }), 200
+
+
+def _stream_to_data_dir(src, filename: str, known_hashes: dict, max_bytes: int = None) -> dict:
+    """
+    Salin stream ke DATA_DIR sambil menghitung sha256 (satu kali baca).
+    File ditulis ke .part dulu; kalau ternyata duplikat, .part dihapus.
+    """
+    tmp = DATA_DIR / f".{filename}.{os.getpid()}.part"
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, "wb") as out:
+            for block in iter(lambda: src.read(STREAM_CHUNK), b""):
+                size += len(block)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError("ukuran file melebihi batas")
+                h.update(block)
+                out.write(block)
+        digest = h.hexdigest()
+
+        if digest in known_hashes:
+            tmp.unlink()
+            return {"filename": filename, "status": "duplicate", "bytes": size,
+                    "sha256": digest, "duplicate_of": known_hashes[digest]}
+
+        os.replace(tmp, DATA_DIR / filename)
+        known_hashes[digest] = filename
+        return {"filename": filename, "status": "saved", "bytes": size, "sha256": digest}
+    except Exception:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+
+
+def _iter_bulk_sources():
+    """Hasilkan (nama, stream, batas_bytes) dari field 'files' (boleh berisi .zip) dan 'archive'."""
+    uploads = request.files.getlist("files") + request.files.getlist("archive")
+    budget = [BULK_MAX_UNCOMPRESSED]
+    for up in uploads:
+        name = up.filename or ""
+        if not name.lower().endswith(".zip"):
+            yield name, up.stream, None
+            continue
+
+        with zipfile.ZipFile(up.stream) as zf:
+            for info in zf.infolist():
+                base = os.path.basename(info.filename)
+                if info.is_dir() or not base or info.filename.startswith("__MACOSX/"):
+                    continue
+                if info.file_size > budget[0]:
+                    yield base, None, "zip melebihi BULK_MAX_UNCOMPRESSED"
+                    continue
+                budget[0] -= info.file_size
+                with zf.open(info) as member:
+                    # batas = ukuran yang diklaim header zip (jaga-jaga zip bomb)
+                    yield base, member, info.file_size
+
+
+@app.post("/datasets/upload/bulk")
+def upload_bulk():
+    """
+    Upload banyak file sekaligus (multipart field 'files', boleh berisi .zip,
+    atau field 'archive'). Semua file baru diproses oleh SATU job build.
+    Query ?wait=1 menunggu build selesai dan melaporkan throughput ingest.
+    """
+    if not _auth_or_401():
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    request.max_content_length = BULK_MAX_CONTENT_LENGTH
+    if not request.files.getlist("files") and not request.files.getlist("archive"):
+        return jsonify({"ok": False, "error": "files or archive is required"}), 400
+
+    # satu kali baca manifest + processed untuk cek duplikat (nama & isi)
+    processed = _load_processed_files()
+    manifest_files = load_manifest(current_manifest_path())["files"]
+    known_hashes = {e["sha256"]: name for name, e in manifest_files.items() if e.get("sha256")}
+    seen_names = set()
+
+    t0 = time.perf_counter()
+    results, saved, total_bytes, saved_bytes = [], [], 0, 0
+    for raw_name, stream, limit in _iter_bulk_sources():
+        filename = _safe_filename(raw_name)
+        if stream is None:
+            results.append({"filename": filename, "status": "rejected", "error": limit})
+            continue
+        if not filename.lower().endswith(ALLOWED_EXT):
+            results.append({"filename": filename, "status": "rejected", "error": "Only .pdf or .txt allowed"})
+            continue
+        if filename in seen_names or filename in processed or (DATA_DIR / filename).exists():
+            results.append({"filename": filename, "status": "duplicate", "error": "file sudah ada"})
+            continue
+        seen_names.add(filename)
+
+        try:
+            r = _stream_to_data_dir(stream, filename, known_hashes, max_bytes=limit)
+        except Exception as e:
+            results.append({"filename": filename, "status": "failed", "error": str(e)})
+            continue
+        results.append(r)
+        total_bytes += r["bytes"]
+        if r["status"] == "saved":
+            saved.append(filename)
+            saved_bytes += r["bytes"]
+    upload_s = time.perf_counter() - t0
+
+    body = {
+        "ok": True,
+        "files": results,
+        "saved": len(saved),
+        "upload": {
+            "bytes": total_bytes,
+            "seconds": round(upload_s, 3),
+            "mb_per_s": round(total_bytes / 1e6 / upload_s, 2) if upload_s > 0 else 0.0,
+        },
+    }
+    if not saved:
+        body["message"] = "tidak ada file baru"
+        return jsonify(body), 200
+
+    job = _enqueue_build(files=saved)
+    body["job_id"] = job.id
+    body["status_url"] = f"/jobs/{job.id}"
+
+    if request.args.get("wait") not in ("1", "true", "yes"):
+        body["message"] = "uploaded, ingest job queued"
+        body["job"] = job.to_dict()
+        return jsonify(body), 202
+
+    job.done.wait(BULK_WAIT_TIMEOUT)
+    info = job.to_dict()
+    body["job"] = info
+    if info["status"] != "done":
+        body["ok"] = info["status"] != "failed"
+        return jsonify(body), 202 if body["ok"] else 500
+
+    total_s = time.perf_counter() - t0
+    chunks = info["progress"]["chunks_written"]
+    body["ingest"] = {
+        "seconds": round(total_s, 3),
+        "files_per_s": round(len(saved) / total_s, 2),
+        "pages_per_s": round(info["progress"]["pages_parsed"] / total_s, 1),
+        "chunks_per_s": round(chunks / total_s, 1),
+        "mb_per_s": round(saved_bytes / 1e6 / total_s, 2),
+    }
+    body["message"] = "uploaded & indexed"
+    return jsonify(body), 200
 
 
 @app.post("/datasets/delete")
@@ -203,53 +321,41 @@ def delete_dataset():
     filename = _safe_filename(filename)
     file_path = DATA_DIR / filename
 
-    lock = FileLock(str(LOCK_FILE))
-    try:
-        with lock.acquire(timeout=300):
-            # 1) hapus file fisik (kalau ada)
-            file_deleted = False
-            if file_path.exists():
-                try:
-                    file_path.unlink()
-                    file_deleted = True
-                except Exception as e:
-                    return jsonify({"ok": False, "error": f"failed to delete file: {e}", "filename": filename}), 500
-
-            # 2) hapus dari processed_files.json supaya bisa upload ulang dengan nama sama
-            processed = _load_processed_files()
-            was_in_processed = filename in processed
-            if was_in_processed:
-                processed.discard(filename)
-                _save_processed_files(processed)
-
-            # 3) hapus dari ChromaDB berdasarkan metadata source / dataset_file
-            chroma_result = _delete_from_chroma(filename)
-
-    except Timeout:
-        return jsonify({"ok": False, "error": "Build is busy (lock timeout). Try again."}), 429
-    except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
-
-    # Jika tidak ada apa-apa yang bisa dihapus, berikan 404
-    if (not file_deleted) and (not was_in_processed):
+    # Jika tidak ada apa-apa yang bisa dihapus, berikan 404 (tanpa antre job)
+    in_processed = filename in _load_processed_files()
+    in_manifest = filename in load_manifest(current_manifest_path())["files"]
+    if not file_path.exists() and not in_processed and not in_manifest:
         return jsonify({
             "ok": False,
             "message": "dataset tidak ditemukan (file tidak ada dan tidak tercatat di processed_files.json)",
             "filename": filename,
-            "chroma": chroma_result
         }), 404
 
+    # hapus file + chunk (entry manifest & processed_files.json ikut) dikerjakan build worker
+    try:
+        job = _enqueue_delete(filename)
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e), "filename": filename}), 500
+
     return jsonify({
         "ok": True,
-        "message": "dataset deleted",
+        "message": "delete job queued",
         "filename": filename,
-        "file_deleted": file_deleted,
-        "was_in_processed": was_in_processed,
-        "chroma": chroma_result
-    }), 200
+        "exists_in_data_dir": file_path.exists(),
+        "was_in_processed": in_processed or in_manifest,
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "job": job.to_dict(),
+    }), 202
+
+
 
 
 
+# model embedding + Chroma langsung di-warm saat API start, bukan saat upload pertama
+# (tidak di child process pool parse, yang ikut meng-import modul ini saat spawn)
+if os.getenv("BUILD_WORKER_WARM", "1") == "1" and multiprocessing.parent_process() is None:
+    get_build_worker()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+# Jeda tenang setelah event terakhir sebelum reload dipicu (build menulis beberapa file berurutan)
+DATASET_WATCH_DEBOUNCE = float(os.getenv("DATASET_WATCH_DEBOUNCE", "2.0"))
+# Interval cek stat() kalau inotify (watchfiles) tidak tersedia
+DATASET_WATCH_POLL = float(os.getenv("DATASET_WATCH_POLL", "5.0"))
+# auto | inotify | poll
+DATASET_WATCH_MODE = os.getenv("DATASET_WATCH_MODE", "auto").strip().lower()
+
+
+class DatasetWatcher:
+    """
+    Pantau file penanda dataset di thread background.
+
+    `version` adalah nilai signature_fn() terakhir yang sudah stabil, jadi di jalur
+    request cukup membandingkan satu integer di memori. Begitu versi naik,
+    on_change(version) dipanggil dari thread watcher (bukan dari handler pesan).
+    """
+
+    def __init__(self, paths, signature_fn, on_change=None,
+                 debounce: float = DATASET_WATCH_DEBOUNCE, poll_interval: float = DATASET_WATCH_POLL,
+                 mode: str = DATASET_WATCH_MODE):
+        self.paths = [Path(p) for p in paths]
+        self.signature_fn = signature_fn
+        self.on_change = on_change
+        self.debounce = max(0.0, debounce)
+        self.poll_interval = max(0.1, poll_interval)
+        self.mode = mode
+        self.backend = None
+        self.version = 0
+        self.events = 0
+        self.changes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- lifecycle ----------
+    def start(self) -> "DatasetWatcher":
+        if self._thread is not None:
+            return self
+        self.version = self.signature_fn()
+        self.backend = self._pick_backend()
+        target = self._run_inotify if self.backend == "inotify" else self._run_poll
+        self._thread = threading.Thread(target=target, name="dataset-watcher", daemon=True)
+        self._thread.start()
+        print(f"[INFO] Dataset watcher aktif ({self.backend}, debounce={self.debounce}s)")
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _pick_backend(self) -> str:
+        if self.mode == "poll":
+            return "poll"
+        try:
+            import watchfiles  # noqa: F401
+            return "inotify"
+        except ImportError:
+            if self.mode == "inotify":
+                print("[WARN] watchfiles tidak terpasang, dataset watcher pakai polling")
+            return "poll"
+
+    # ---------- deteksi perubahan ----------
+    def _commit(self) -> None:
+        """Baca signature sekali lagi; kalau naik, umumkan versi baru."""
+        sig = self.signature_fn()
+        if sig <= self.version:
+            return
+        self.version = sig
+        self.changes += 1
+        if self.on_change is not None:
+            try:
+                self.on_change(sig)
+            except Exception as e:
+                print(f"[WARN] Callback dataset watcher gagal: {e}")
+
+    def _run_inotify(self) -> None:
+        from watchfiles import watch
+
+        # yang dipantau file penanda (ditulis di akhir build), jadi cukup folder induknya
+        # secara non-rekursif lalu disaring per nama file
+        names = {p.resolve() for p in self.paths}
+        dirs = sorted({str(p.parent) for p in names if p.parent.exists()})
+
+        def _relevant(change, path: str) -> bool:
+            return Path(path).resolve() in names
+
+        try:
+            for changes in watch(
+                *dirs,
+                watch_filter=_relevant,
+                recursive=False,
+                step=int(self.debounce * 1000) or 50,       # tunggu sampai tidak ada event baru
+                debounce=int(max(self.debounce * 10, 1) * 1000),  # batas atas pengelompokan event
+                stop_event=self._stop,
+                yield_on_timeout=False,
+            ):
+                self.events += len(changes)
+                self._commit()
+        except Exception as e:
+            if self._stop.is_set():
+                return
+            print(f"[WARN] inotify watcher berhenti ({e}), pindah ke polling")
+            self.backend = "poll"
+            self._run_poll()
+
+    def _run_poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            sig = self.signature_fn()
+            if sig <= self.version:
+                continue
+            self.events += 1
+            # tunggu sampai signature berhenti berubah (build masih menulis)
+            while not self._stop.wait(self.debounce):
+                nxt = self.signature_fn()
+                if nxt == sig:
+                    break
+                sig = nxt
+            self._commit()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "version": self.version,
+            "events": self.events,
+            "changes": self.changes,
+        }
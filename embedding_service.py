@@ -0,0 +1,99 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+load_dotenv()
+
+# === Konfigurasi embedding ===
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0"))  # 0 = biarkan default torch
+
+
+def normalize_query(text: str) -> str:
+    # MiniLM-L6-v2 uncased -> huruf besar/kecil dan spasi berlebih tidak mengubah embedding
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Bungkus model embedding dengan LRU cache untuk embed_query dan
+    embed_documents yang di-batch (batch_size bisa diatur).
+    """
+
+    def __init__(self, base: Embeddings, cache_size: int = EMBED_CACHE_SIZE, batch_size: int = EMBED_BATCH_SIZE):
+        self.base = base
+        self.cache_size = cache_size
+        self.batch_size = max(1, batch_size)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        with self._lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return list(vec)
+            self.misses += 1
+
+        vec = tuple(self.base.embed_query(key))
+        with self._lock:
+            self._cache[key] = vec
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(vec)
+
+    def embed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        bs = max(1, batch_size or self.batch_size)
+        out = []
+        for i in range(0, len(texts), bs):
+            out.extend(self.base.embed_documents(list(texts[i:i + bs])))
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._cache)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def _load_base(model_name: str, batch_size: int, threads: int) -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if threads > 0:
+        import torch
+        torch.set_num_threads(threads)
+
+    print(f"[INFO] Memuat model embedding {model_name} ...")
+    return HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": batch_size})
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """Satu instance model embedding per proses (dipakai bot, build dan API)."""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                base = _load_base(EMBEDDING_MODEL, EMBED_BATCH_SIZE, EMBED_THREADS)
+                _instance = CachedEmbeddings(base)
+    return _instance
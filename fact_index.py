@@ -0,0 +1,299 @@
+import json
+import os
+import re
+from pathlib import Path
+
+# File index fakta harga disimpan di folder index yang sama dengan data Chroma (per snapshot)
+FACT_NAME = "fact_index.json"
+FACT_VERSION = 1
+
+# ============================================================
+# Ekstraksi fakta (dipanggil build_dataset saat parse file)
+# ============================================================
+# Pola harga yang dikenali di dataset:
+#   - Harga OPEN TRIP: Rp 350.000 / orang              -> nama dari "Harga X:"
+#   1. Hi-Ace Premio / - Harga: Rp 1.250.000 / hari      -> nama dari heading bernomor
+#   - Dokumentasi: / - Foto: Rp 250.000 / trip          -> heading + sub-heading + label
+#   Innova Reborn / 7 seat / Rp 900.000 / hari           -> baris tabel PDF (sel per baris)
+# Harga di tengah kalimat (FAQ, add-on, biaya tambahan) sengaja tidak diambil.
+_PRICE_RE = re.compile(r"Rp\s*([\d.]+)\s*(?:/|per)\s*([A-Za-z]+)(.*)$", re.IGNORECASE)
+_HARGA_LINE_RE = re.compile(r"^-?\s*Harga\s*([^:]*?)\s*:\s*Rp", re.IGNORECASE)
+_LABEL_LINE_RE = re.compile(r"^-\s*([^:]+?)\s*:\s*Rp", re.IGNORECASE)
+_SUBHEAD_RE = re.compile(r"^-\s*([^:]+?)\s*:\s*$")
+_NUMBERED_RE = re.compile(r"^\d+[.)]\s+(.+?)\s*:?\s*$")
+_CELL_RE = re.compile(r"^(\d+\s*(seat|hari|pax|orang|malam)|\d+H\d+M|\d+\s*jam)$", re.IGNORECASE)
+_NOTE_RE = re.compile(r"^(min|max)\b.*(orang|pax)", re.IGNORECASE)
+_FACILITY_HEAD_RE = re.compile(r"^-?\s*fasilitas\s*:\s*$", re.IGNORECASE)
+
+UNIT_ALIASES = {"pax": "orang", "org": "orang"}
+
+
+def _clean_lines(text: str) -> list:
+    lines = [ln.strip() for ln in (text or "").splitlines()]
+    lines = [ln for ln in lines if ln]
+    # sel tabel PDF yang terpotong: "Rp 650.000 /" + "hari"
+    out = []
+    for ln in lines:
+        if out and out[-1].endswith("/") and "Rp" in out[-1]:
+            out[-1] = f"{out[-1]} {ln}"
+        else:
+            out.append(ln)
+    return out
+
+
+def _parse_price(raw: str) -> int:
+    return int(raw.replace(".", ""))
+
+
+def _is_heading(ln: str) -> bool:
+    if _NUMBERED_RE.match(ln) and "Rp" not in ln:
+        return True
+    letters = [c for c in ln if c.isalpha()]
+    return len(letters) >= 6 and all(c.isupper() for c in letters) and "Rp" not in ln
+
+
+def _heading_name(ln: str) -> str:
+    m = _NUMBERED_RE.match(ln)
+    name = m.group(1) if m else ln
+    return re.sub(r"\s*\(.*?\)\s*$", "", name).rstrip(":").strip()
+
+
+def _table_name(lines: list, i: int) -> str:
+    """Nama paket untuk baris tabel yang diawali 'Rp': sel sebelum kolom durasi/kapasitas."""
+    j = i - 1
+    while j >= 0 and _CELL_RE.match(lines[j]):
+        j -= 1
+    if j < 0 or ":" in lines[j] or "Rp" in lines[j]:
+        return ""
+    name = lines[j]
+    # nama paket yang terbungkus 2 baris ("Open Trip Malang Batu 2 Hari 1" + "Malam")
+    if j > 0 and (len(name.split()) == 1 or name[0] in "&(" or name[0].islower()):
+        prev = lines[j - 1]
+        if ":" not in prev and "Rp" not in prev:
+            name = f"{prev} {name}"
+    return name
+
+
+def extract_facts(text: str, file: str) -> list:
+    """
+    Ambil fakta harga dari teks satu dokumen.
+    Return list dict {name, price, unit, note, section, facilities, file}.
+    """
+    lines = _clean_lines(text)
+    facts = []
+    section, subhead = "", ""
+    facility_owner = None
+
+    for i, ln in enumerate(lines):
+        if facility_owner is not None:
+            if ln.startswith("-") and not _SUBHEAD_RE.match(ln) and "Rp" not in ln:
+                facility_owner["facilities"].append(ln.lstrip("- ").strip())
+                continue
+            facility_owner = None
+
+        if _FACILITY_HEAD_RE.match(ln):
+            # fasilitas milik paket utama section ini (nama = heading), kalau tidak ada fakta terakhirnya
+            owners = [f for f in facts if f["section"] == section]
+            facility_owner = next((f for f in owners if f["name"] == section), owners[-1] if owners else None)
+            continue
+
+        if _is_heading(ln):
+            section, subhead = _heading_name(ln), ""
+            continue
+
+        m = _PRICE_RE.search(ln)
+        if not m:
+            sub = _SUBHEAD_RE.match(ln)
+            if sub:
+                subhead = sub.group(1)
+            continue
+
+        name = ""
+        harga = _HARGA_LINE_RE.match(ln)
+        label = _LABEL_LINE_RE.match(ln)
+        if harga:
+            name = harga.group(1) or section
+        elif label:
+            name = " ".join(p for p in (section, subhead, label.group(1)) if p)
+        elif ln.startswith("Rp"):
+            name = _table_name(lines, i)
+        if not name:
+            continue
+
+        note = m.group(3).strip().strip("()").strip()
+        if not note and i + 1 < len(lines) and _NOTE_RE.match(lines[i + 1]):
+            note = lines[i + 1]
+        unit = m.group(2).lower()
+        facts.append({
+            "name": re.sub(r"\s+", " ", name).strip(),
+            "price": _parse_price(m.group(1)),
+            "unit": UNIT_ALIASES.get(unit, unit),
+            "note": note,
+            "section": section,
+            "facilities": [],
+            "file": file,
+        })
+    return facts
+
+
+# ============================================================
+# Pencocokan pertanyaan
+# ============================================================
+_WORD_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+_DURATION_RE = re.compile(r"\b(\d+)\s*h\s*(\d+)\s*m\b", re.IGNORECASE)
+# Harus ada kata harga eksplisit; "berapa" saja belum tentu soal harga ("minimal berapa orang",
+# "berapa lama") -> hanya dianggap harga kalau dekat "sewa" atau satuan harga ("per orang")
+_PRICE_INTENT_RE = re.compile(
+    r"\b(harga\w*|biaya\w*|tarif\w*|ongkos\w*|hrg)\b"
+    r"|\b(berapa(an)?|brp)\b.*\bper\s+(orang|pax|org|hari|jeep|trip)\b"
+    r"|\bper\s+(orang|pax|org|hari|jeep|trip)\b.*\b(berapa(an)?|brp)\b"
+    r"|\bsewa\b.*\b(berapa(an)?|brp)\b"
+)
+# Pertanyaan tentang hal lain (fasilitas, jadwal, cara pesan, jumlah peserta, durasi, ...) tetap lewat RAG
+_OTHER_INTENT_RE = re.compile(
+    r"\b(fasilitas|include|exclude|termasuk|jadwal|jam|kapan|cara|pesan|booking|gambar|link|"
+    r"bayar|dp|refund|batal|pembatalan|kontak|alamat|lokasi|itinerary|rute|diskon|promo|beda|banding|"
+    r"minimal|min|maks|maksimal|max|lama|durasi|kuota|kapasitas|muat)\b"
+    r"|\b(berapa|brp)\s+(orang|org|pax|peserta)\b"
+)
+_QTY_RE = re.compile(r"\b(\d+)\s*(orang|pax|org|hari|jeep|trip|malam|unit)\b")
+# kata di nama paket yang boleh tidak disebut user
+_OPTIONAL_WORDS = {"only", "paket", "harga", "tarif", "dummy"}
+_FILE_STOPWORDS = {"paket", "trip", "pdf", "txt", "dataset", "data"}
+
+
+def _norm(text: str) -> str:
+    # "2H1M" ditulis sama dengan "2 hari 1 malam"
+    return _DURATION_RE.sub(r"\1 hari \2 malam", (text or "").lower())
+
+
+def _tokens(text: str) -> set:
+    return set(_WORD_RE.findall(_norm(text)))
+
+
+def _name_aliases(name: str) -> list:
+    """'Avanza / Xenia' cukup disebut salah satunya."""
+    aliases = [name]
+    parts = [p.strip() for p in re.split(r"\s+/\s+", name) if p.strip()]
+    if len(parts) > 1:
+        aliases.extend(parts)
+    return [_tokens(a) - _OPTIONAL_WORDS for a in aliases]
+
+
+def _file_tokens(file: str) -> set:
+    return _tokens(os.path.splitext(file)[0].replace("_", " ")) - _FILE_STOPWORDS
+
+
+def format_rupiah(value: int) -> str:
+    return "Rp " + f"{value:,}".replace(",", ".")
+
+
+class FactIndex:
+    """
+    Index fakta harga per file dataset (nama paket, harga satuan, satuan, catatan,
+    fasilitas). answer() hanya menjawab pertanyaan harga/perkalian yang cocok
+    dengan tepat satu harga; selain itu return None supaya lanjut ke RAG.
+    """
+
+    def __init__(self, files: dict = None):
+        self.files = files or {}  # dataset_file -> [fact, ...]
+        self._entries = None
+
+    # ---------- build ----------
+    @classmethod
+    def load(cls, index_dir: Path) -> "FactIndex":
+        path = Path(index_dir) / FACT_NAME
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data.get("version") == FACT_VERSION:
+                    return cls(data["files"])
+            except Exception as e:
+                print(f"[WARN] Index fakta rusak, dibuat ulang: {e}")
+        return cls()
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / FACT_NAME).exists()
+
+    def save(self, index_dir: Path) -> None:
+        path = Path(index_dir) / FACT_NAME
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": FACT_VERSION, "files": self.files}, ensure_ascii=False),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+
+    def set_file(self, file: str, facts: list) -> None:
+        self.files[file] = facts
+        self._entries = None
+
+    def remove_file(self, file: str) -> bool:
+        self._entries = None
+        return self.files.pop(file, None) is not None
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.files.values())
+
+    # ---------- query ----------
+    def _prepare(self) -> None:
+        self._entries = []
+        for file, facts in self.files.items():
+            ftoks = _file_tokens(file)
+            for f in facts:
+                self._entries.append((f, _name_aliases(f["name"]), _tokens(f["section"]), ftoks))
+        self._all_file_tokens = set().union(*(e[3] for e in self._entries)) if self._entries else set()
+
+    def lookup(self, question: str) -> list:
+        """Fakta yang semua kata nama paketnya disebut di pertanyaan, paling spesifik dulu."""
+        if self._entries is None:
+            self._prepare()
+        q = _tokens(question)
+        best, best_score = [], (0, 0)
+        for fact, aliases, stoks, ftoks in self._entries:
+            # user menyebut dataset lain (mis. "malang" untuk fakta Bromo) -> bukan fakta ini
+            if (q & self._all_file_tokens) - ftoks:
+                continue
+            hit = [a for a in aliases if a and a <= q]
+            if not hit:
+                continue
+            # skor: kata pertanyaan yang tercakup nama + section, lalu panjang nama
+            score = (max(len((a | stoks) & q) for a in hit), max(len(a) for a in hit))
+            if score < best_score:
+                continue
+            if score > best_score:
+                best, best_score = [], score
+            best.append(fact)
+        return best
+
+    def answer(self, question: str):
+        """Return teks jawaban, atau None kalau bukan pertanyaan harga langsung / ambigu."""
+        text = _norm(question)
+        if not _PRICE_INTENT_RE.search(text) or _OTHER_INTENT_RE.search(text):
+            return None
+        matches = self.lookup(question)
+        if not matches:
+            return None
+        if len({(f["price"], f["unit"]) for f in matches}) > 1:
+            return None  # beberapa paket cocok dengan harga berbeda -> biar LLM yang menjelaskan
+        fact = matches[0]
+
+        name_text = _norm(fact["name"])
+        qty = [(int(n), UNIT_ALIASES.get(u, u)) for n, u in _QTY_RE.findall(text)
+               if f"{n} {u}" not in name_text]
+        label = fact["name"]
+        if fact["section"] and fact["section"].lower() not in label.lower():
+            label = f"{label} ({fact['section']})"
+        price_line = f"Harga {label}: {format_rupiah(fact['price'])} / {fact['unit']}"
+        if fact["note"]:
+            price_line += f" ({fact['note']})"
+        lines = [price_line + "."]
+
+        if qty:
+            if len(qty) > 1 or qty[0][1] != fact["unit"]:
+                return None  # satuan tidak sama (mis. "4 orang" untuk harga per trip) -> RAG
+            n = qty[0][0]
+            # hanya total, sama dengan aturan prompt RAG (proses perhitungan tidak ditampilkan)
+            lines.append(f"Total untuk {n} {fact['unit']}: {format_rupiah(n * fact['price'])}.")
+        if fact["facilities"]:
+            lines.append("Fasilitas: " + ", ".join(fact["facilities"]) + ".")
+        return "\n".join(lines)
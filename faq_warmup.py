@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from answer_cache import normalize_question
+from chatlog_db import get_db_connection
+
+load_dotenv()
+
+# === Konfigurasi warm-up FAQ ===
+# Setiap kali index baru dimuat (reload dataset / build selesai), pertanyaan populer dijawab
+# dulu memakai index baru dan hasilnya dimasukkan ke answer cache sebelum index dipakai user.
+# Sumber pertanyaan: daftar kurasi (FAQ_WARMUP_FILE, satu pertanyaan per baris, '#' = komentar)
+# + FAQ_WARMUP_TOP_N pertanyaan paling sering di h_chatlog (status=1).
+# Hanya saat DATASET_WATCH=1 (reload di background, termasuk /reload); startup pertama tidak ditunda.
+FAQ_WARMUP = os.getenv("FAQ_WARMUP", "1") == "1"
+FAQ_WARMUP_TOP_N = int(os.getenv("FAQ_WARMUP_TOP_N", "20"))
+FAQ_WARMUP_FILE = Path(os.getenv("FAQ_WARMUP_FILE", str(Path(__file__).resolve().parent / "faq_warmup.txt")))
+FAQ_WARMUP_CONCURRENCY = int(os.getenv("FAQ_WARMUP_CONCURRENCY", "2"))
+# Batas total waktu warm-up; lewat dari ini index tetap di-swap dengan jawaban yang sudah jadi
+FAQ_WARMUP_TIMEOUT = float(os.getenv("FAQ_WARMUP_TIMEOUT", "120"))
+# Warm-up memakai kuota Groq yang sama dengan user (GROQ_RPM/GROQ_TPM). Pertanyaan berikutnya hanya
+# dikirim kalau kuota masih menyisakan bagian ini (0..1) untuk user; kalau tidak, warm-up berhenti
+# dan sisa pertanyaan dijawab normal saat user bertanya. Tanpa batas kuota (0) tidak berpengaruh.
+FAQ_WARMUP_QUOTA_RESERVE = float(os.getenv("FAQ_WARMUP_QUOTA_RESERVE", "0.75"))
+
+class WarmupBudgetExhausted(Exception):
+    """Dilempar warm_one saat sisa kuota LLM sudah menjadi jatah user; warm-up berhenti."""
+
+
+TOP_QUESTIONS_SQL = """
+    SELECT MIN(question), COUNT(*) AS n
+    FROM public.h_chatlog
+    WHERE status = 1 AND question IS NOT NULL AND LENGTH(TRIM(question)) > 0
+    GROUP BY LOWER(TRIM(question))
+    ORDER BY n DESC
+    LIMIT %s
+"""
+
+
+def load_curated(path: Path = FAQ_WARMUP_FILE) -> list:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def top_questions(limit: int = FAQ_WARMUP_TOP_N, connect=get_db_connection) -> list:
+    """Pertanyaan terjawab (status=1) paling sering di h_chatlog. Blocking (psycopg2)."""
+    if limit <= 0:
+        return []
+    connection = connect()
+    if connection is None:
+        return []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(TOP_QUESTIONS_SQL, (limit,))
+            return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        print(f"⚠️ Gagal ambil pertanyaan populer dari h_chatlog: {e}")
+        return []
+    finally:
+        connection.close()
+
+
+def collect_questions(top_n: int = FAQ_WARMUP_TOP_N, curated_path: Path = FAQ_WARMUP_FILE, connect=get_db_connection) -> list:
+    """Daftar kurasi dulu, lalu pertanyaan populer; duplikat (setelah normalisasi) dibuang."""
+    seen, out = set(), []
+    for q in load_curated(curated_path) + top_questions(top_n, connect):
+        key = normalize_question(q)
+        if key and key not in seen:
+            seen.add(key)
+            out.append(q)
+    return out
+
+
+async def run_warmup(questions: list, warm_one, concurrency: int = FAQ_WARMUP_CONCURRENCY,
+                     timeout: float = FAQ_WARMUP_TIMEOUT) -> dict:
+    """
+    Jalankan `await warm_one(question)` untuk tiap pertanyaan (maks `concurrency` bersamaan).
+    warm_one return True kalau jawabannya disimpan, False kalau dilewati, atau melempar
+    WarmupBudgetExhausted -> pertanyaan sisanya tidak dikirim (dihitung di `budget`).
+    Pertanyaan yang belum selesai saat `timeout` habis dibatalkan.
+    """
+    stats = {"questions": len(questions), "warmed": 0, "skipped": 0, "failed": 0, "budget": 0,
+             "timed_out": 0, "seconds": 0.0}
+    if not questions:
+        return stats
+
+    t0 = time.perf_counter()
+    sem = asyncio.Semaphore(max(1, concurrency))
+    exhausted = asyncio.Event()
+
+    async def _one(q: str):
+        async with sem:
+            if exhausted.is_set():
+                stats["budget"] += 1
+                return
+            try:
+                stats["warmed" if await warm_one(q) else "skipped"] += 1
+            except asyncio.CancelledError:
+                raise
+            except WarmupBudgetExhausted:
+                stats["budget"] += 1
+                exhausted.set()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"⚠️ Warm-up FAQ gagal untuk {q!r}: {e}")
+
+    tasks = [asyncio.create_task(_one(q)) for q in questions]
+    _, pending = await asyncio.wait(tasks, timeout=timeout if timeout > 0 else None)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    stats["timed_out"] = len(pending)
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
@@ -0,0 +1,182 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Snapshot vektor per folder index (di samping data Chroma, lexical_index.json, fact_index.json):
+#   flat_vectors.npy : matrix float32 [n_chunk, dim], dibaca lewat mmap
+#   flat_meta.json   : ids / documents / metadatas dengan urutan baris yang sama
+FLAT_VECTORS_NAME = "flat_vectors.npy"
+FLAT_META_NAME = "flat_meta.json"
+FLAT_VERSION = 1
+EXPORT_BATCH = 1000
+
+
+def _collection_space(source) -> str:
+    """Metric HNSW collection Chroma (default l2), supaya urutan hasil sama persis dengan Chroma."""
+    col = getattr(source, "_collection", source)
+    meta = getattr(col, "metadata", None) or {}
+    return meta.get("hnsw:space", "l2")
+
+
+def collection_count(source) -> int:
+    col = getattr(source, "_collection", source)
+    return col.count()
+
+
+class FlatIndex:
+    """
+    Exact nearest-neighbour di memori: semua embedding chunk dalam satu matrix
+    float32 (mmap dari flat_vectors.npy), top-k = satu dot product + argpartition.
+    Metric mengikuti collection Chroma:
+      l2     -> skor = 2·q·x - |x|²  (urutan sama dengan jarak L2 terkecil)
+      cosine -> baris dinormalisasi saat export, skor = q̂·x̂
+      ip     -> skor = q·x
+    Interface similarity_search_by_vector / get meniru Chroma, jadi bisa
+    langsung dipakai main._make_retriever.
+    """
+
+    def __init__(self, matrix, ids: list, documents: list, metadatas: list, space: str = "l2"):
+        self.matrix = matrix
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.space = space
+        self._row = {cid: i for i, cid in enumerate(ids)}
+        self._sq_norms = np.einsum("ij,ij->i", matrix, matrix) if space == "l2" and len(ids) else None
+
+    # ---------- export / load ----------
+    @classmethod
+    def from_collection(cls, source, batch: int = EXPORT_BATCH) -> "FlatIndex":
+        """Ambil semua embedding + dokumen dari collection Chroma (raw atau wrapper LangChain)."""
+        space = _collection_space(source)
+        ids, documents, metadatas, vectors = [], [], [], []
+        offset = 0
+        while True:
+            got = source.get(include=["embeddings", "documents", "metadatas"], limit=batch, offset=offset)
+            if not got["ids"]:
+                break
+            ids.extend(got["ids"])
+            documents.extend(got["documents"])
+            metadatas.extend(m or {} for m in got["metadatas"])
+            vectors.append(np.asarray(got["embeddings"], dtype=np.float32))
+            offset += len(got["ids"])
+            if len(got["ids"]) < batch:
+                break
+
+        matrix = np.ascontiguousarray(np.vstack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+        if space == "cosine" and len(ids):
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms > 0, norms, 1.0)
+        return cls(matrix, ids, documents, metadatas, space)
+
+    def update(self, remove_ids=(), ids=(), vectors=(), documents=(), metadatas=()) -> "FlatIndex":
+        """
+        FlatIndex baru: baris `remove_ids` dibuang, baris baru (vektor mentah dari model
+        embedding, sama seperti yang di-upsert ke Chroma) ditambah di akhir. ID yang
+        ditambah ulang menggantikan baris lamanya. Tanpa membaca ulang collection.
+        """
+        drop = set(remove_ids) | set(ids)
+        keep = [i for i, cid in enumerate(self.ids) if cid not in drop]
+        matrix = np.asarray(self.matrix, dtype=np.float32)[keep] if keep else None
+        new = np.array(vectors, dtype=np.float32) if len(ids) else None
+        if new is not None and self.space == "cosine":
+            norms = np.linalg.norm(new, axis=1, keepdims=True)
+            new /= np.where(norms > 0, norms, 1.0)
+        parts = [m for m in (matrix, new) if m is not None]
+        matrix = np.ascontiguousarray(np.vstack(parts)) if parts else np.zeros((0, 0), dtype=np.float32)
+        return FlatIndex(
+            matrix,
+            [self.ids[i] for i in keep] + list(ids),
+            [self.documents[i] for i in keep] + list(documents),
+            [self.metadatas[i] for i in keep] + [m or {} for m in metadatas],
+            self.space,
+        )
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / FLAT_VECTORS_NAME).exists() and (Path(index_dir) / FLAT_META_NAME).exists()
+
+    @classmethod
+    def load(cls, index_dir: Path):
+        """Return FlatIndex (matrix di-mmap read-only) atau None kalau belum ada / versi lain / rusak."""
+        index_dir = Path(index_dir)
+        if not cls.exists(index_dir):
+            return None
+        try:
+            meta = json.loads((index_dir / FLAT_META_NAME).read_text(encoding="utf-8"))
+            if meta.get("version") != FLAT_VERSION:
+                return None
+            matrix = np.load(index_dir / FLAT_VECTORS_NAME, mmap_mode="r")
+            if matrix.shape[0] != len(meta["ids"]):
+                raise ValueError(f"jumlah baris {matrix.shape[0]} != {len(meta['ids'])} id")
+            return cls(matrix, meta["ids"], meta["documents"], meta["metadatas"], meta.get("space", "l2"))
+        except Exception as e:
+            print(f"[WARN] Index flat rusak, diabaikan: {e}")
+            return None
+
+    @staticmethod
+    def discard(index_dir: Path) -> bool:
+        """Hapus file index flat dari folder index (kalau ada)."""
+        removed = False
+        for name in (FLAT_META_NAME, FLAT_VECTORS_NAME):
+            path = Path(index_dir) / name
+            if path.exists():
+                path.unlink()
+                removed = True
+        return removed
+
+    def save(self, index_dir: Path) -> None:
+        index_dir = Path(index_dir)
+        # np.save menambah .npy kalau nama file tidak berakhiran .npy
+        tmp_vec = index_dir / f"{FLAT_VECTORS_NAME}.tmp.npy"
+        np.save(tmp_vec, np.asarray(self.matrix, dtype=np.float32))
+        tmp_meta = index_dir / f"{FLAT_META_NAME}.tmp"
+        tmp_meta.write_text(json.dumps({
+            "version": FLAT_VERSION,
+            "space": self.space,
+            "ids": self.ids,
+            "documents": self.documents,
+            "metadatas": self.metadatas,
+        }, ensure_ascii=False), encoding="utf-8")
+        # meta terakhir: load() menolak pasangan yang jumlah barisnya tidak cocok
+        os.replace(tmp_vec, index_dir / FLAT_VECTORS_NAME)
+        os.replace(tmp_meta, index_dir / FLAT_META_NAME)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- query ----------
+    def search(self, embedding, k: int = 4) -> list:
+        """Return [(baris, skor)] urut skor tertinggi (exact, bukan ANN)."""
+        n = len(self.ids)
+        if not n or k <= 0:
+            return []
+        q = np.asarray(embedding, dtype=np.float32)
+        if self.space == "cosine":
+            qn = float(np.linalg.norm(q))
+            if qn > 0:
+                q = q / qn
+        scores = self.matrix @ q
+        if self._sq_norms is not None:
+            scores = 2.0 * scores - self._sq_norms
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self.documents[row] or "", metadata=self.metadatas[row] or {}, id=self.ids[row])
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs) -> list:
+        return [self._document(row) for row, _ in self.search(embedding, k)]
+
+    def get(self, ids=None, include=None, **kwargs) -> dict:
+        rows = [self._row[cid] for cid in (ids if ids is not None else self.ids) if cid in self._row]
+        return {
+            "ids": [self.ids[r] for r in rows],
+            "documents": [self.documents[r] for r in rows],
+            "metadatas": [self.metadatas[r] for r in rows],
+        }
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from embedding_service import EMBEDDING_MODEL
+
+BASE_DIR = Path(__file__).resolve().parent
+LEGACY_CHROMA_DIR = BASE_DIR / "chroma_db"
+LEGACY_MANIFEST_FILE = BASE_DIR / "index_manifest.json"
+VERSION_FILE = BASE_DIR / ".dataset_version"
+
+# Snapshot index: chroma_snapshots/<versi>/ berisi data Chroma + index_manifest.json
+# + snapshot.json. File CURRENT menunjuk versi yang dibaca bot.
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", str(BASE_DIR / "chroma_snapshots")))
+CURRENT_FILE = SNAPSHOT_DIR / "CURRENT"
+MANIFEST_NAME = "index_manifest.json"
+META_NAME = "snapshot.json"
+# Jumlah snapshot siap pakai yang disimpan (untuk rollback)
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "3"))
+
+
+# ============================================================
+# Pointer CURRENT
+# ============================================================
+def current_name():
+    try:
+        name = CURRENT_FILE.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return name if name and (SNAPSHOT_DIR / name / META_NAME).exists() else None
+
+
+def current_index_dir() -> Path:
+    """Folder Chroma yang aktif. Sebelum ada snapshot pertama: chroma_db lama."""
+    name = current_name()
+    return SNAPSHOT_DIR / name if name else LEGACY_CHROMA_DIR
+
+
+def current_meta() -> dict:
+    """snapshot.json milik CURRENT ({} kalau masih pakai chroma_db lama)."""
+    name = current_name()
+    if not name:
+        return {}
+    try:
+        return json.loads((SNAPSHOT_DIR / name / META_NAME).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def current_manifest_path() -> Path:
+    name = current_name()
+    return SNAPSHOT_DIR / name / MANIFEST_NAME if name else LEGACY_MANIFEST_FILE
+
+
+def set_current(name: str) -> None:
+    """Pindahkan pointer secara atomik (tulis file sementara lalu os.replace)."""
+    if not (SNAPSHOT_DIR / name / META_NAME).exists():
+        raise ValueError(f"snapshot {name} tidak ada / belum selesai")
+    tmp = CURRENT_FILE.with_suffix(".tmp")
+    tmp.write_text(name, encoding="utf-8")
+    os.replace(tmp, CURRENT_FILE)
+    # sinyal ke bot (dipantau dataset watcher)
+    VERSION_FILE.write_text(str(time.time_ns()), encoding="utf-8")
+
+
+def list_snapshots() -> list:
+    """Snapshot yang sudah selesai (punya snapshot.json), urut dari yang paling lama."""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    out = []
+    for d in sorted(p for p in SNAPSHOT_DIR.iterdir() if p.is_dir()):
+        meta = d / META_NAME
+        if meta.exists():
+            try:
+                out.append(json.loads(meta.read_text(encoding="utf-8")))
+            except Exception:
+                continue
+    return out
+
+
+def rollback(name: str = None) -> str:
+    """Kembali ke snapshot sebelumnya (atau ke `name`). Cukup memindah pointer."""
+    names = [s["name"] for s in list_snapshots()]
+    cur = current_name()
+    if name is None:
+        older = [n for n in names if cur is None or n < cur]
+        if not older:
+            raise ValueError("tidak ada snapshot sebelumnya")
+        name = older[-1]
+    set_current(name)
+    return name
+
+
+def prune(keep: int = SNAPSHOT_KEEP) -> list:
+    """Hapus snapshot lama (selalu sisakan CURRENT) dan folder build yang tidak selesai."""
+    if not SNAPSHOT_DIR.exists():
+        return []
+    cur = current_name()
+    ready = [s["name"] for s in list_snapshots()]
+    keep_set = set(ready[-max(1, keep):]) | {cur}
+    removed = []
+    for d in SNAPSHOT_DIR.iterdir():
+        if not d.is_dir() or d.name in keep_set:
+            continue
+        if d.name in ready or d.name.startswith("."):
+            shutil.rmtree(d, ignore_errors=True)
+            removed.append(d.name)
+    return removed
+
+
+# ============================================================
+# Staging (build ke snapshot baru)
+# ============================================================
+class StagingSnapshot:
+    def __init__(self, name: str, path: Path, parent):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.published = False
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / MANIFEST_NAME
+
+    def publish(self, stats: dict = None, imported: bool = False) -> None:
+        # model embedding dicatat supaya export/import snapshot bisa menolak model yang berbeda;
+        # imported = isi snapshot berasal dari file pack, file dataset-nya tidak ada di data/ lokal
+        meta = {"name": self.name, "parent": self.parent, "created_at": time.time(),
+                "embedding_model": EMBEDDING_MODEL, "imported": imported, "stats": stats or {}}
+        (self.path / META_NAME).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        set_current(self.name)
+        self.published = True
+
+
+@contextmanager
+def staging(copy: bool = True):
+    """
+    Salin snapshot aktif ke folder baru lalu yield StagingSnapshot untuk ditulisi.
+    Bot tetap membaca snapshot lama; baru setelah publish() pointer CURRENT
+    dipindah. Kalau tidak di-publish (error / tidak ada perubahan), folder dibuang.
+    copy=False -> folder staging kosong (mis. import snapshot dari file pack).
+    """
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    name = str(time.time_ns())
+    tmp = SNAPSHOT_DIR / f".{name}"
+    src_dir = current_index_dir()
+    src_manifest = current_manifest_path()
+
+    t0 = time.perf_counter()
+    if copy and src_dir.exists():
+        shutil.copytree(src_dir, tmp, ignore=shutil.ignore_patterns(META_NAME, "*.tmp"))
+    else:
+        tmp.mkdir()
+    if copy and src_manifest.exists() and src_manifest.parent != src_dir:
+        shutil.copy2(src_manifest, tmp / MANIFEST_NAME)
+    # folder baru belum punya snapshot.json -> tidak mungkin dipilih sebagai CURRENT
+    path = SNAPSHOT_DIR / name
+    os.replace(tmp, path)
+    if copy:
+        print(f"[INFO] Snapshot staging {name} disalin dari {src_dir.name} ({time.perf_counter() - t0:.2f}s)")
+
+    snap = StagingSnapshot(name, path, current_name())
+    try:
+        yield snap
+    finally:
+        if not snap.published:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            removed = prune()
+            if removed:
+                print(f"[INFO] Snapshot lama dihapus: {', '.join(removed)}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kelola snapshot index Chroma")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    rb = sub.add_parser("rollback")
+    rb.add_argument("name", nargs="?")
+    pr = sub.add_parser("prune")
+    pr.add_argument("--keep", type=int, default=SNAPSHOT_KEEP)
+    args = parser.parse_args()
+
+    if args.cmd == "list":
+        cur = current_name()
+        for s in list_snapshots():
+            mark = "*" if s["name"] == cur else " "
+            origin = "  (import pack)" if s.get("imported") else ""
+            print(f"{mark} {s['name']}  parent={s.get('parent')}{origin}  {s.get('stats', {})}")
+    elif args.cmd == "rollback":
+        try:
+            print(f"[OK] CURRENT -> {rollback(args.name)}")
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            raise SystemExit(1)
+    elif args.cmd == "prune":
+        print(f"[OK] Dihapus: {prune(args.keep)}")
+
+
+if __name__ == "__main__":
+    main()
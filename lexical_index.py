@@ -0,0 +1,118 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+# File index lexical disimpan di folder index yang sama dengan data Chroma (per snapshot)
+LEXICAL_NAME = "lexical_index.json"
+LEXICAL_VERSION = 1
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+_STOPWORDS = {
+    "yang", "dan", "di", "ke", "dari", "untuk", "dengan", "ini", "itu", "ada", "apa", "apakah",
+    "berapa", "saya", "aku", "mau", "bisa", "dong", "kak", "min", "tolong", "atau", "juga", "nya",
+}
+
+
+def tokenize(text: str) -> list:
+    """
+    Token kata (lowercase, angka ikut) + bigram kata berurutan, supaya frasa
+    seperti "per hari" atau "hi ace" cocok sebagai satu term.
+    """
+    words = [w for w in _TOKEN_RE.findall((text or "").lower()) if w not in _STOPWORDS]
+    tokens = list(words)
+    tokens.extend(f"{a}_{b}" for a, b in zip(words, words[1:]))
+    return tokens
+
+
+class LexicalIndex:
+    """
+    Inverted index BM25 per chunk. Yang disimpan ke disk hanya term frequency per
+    chunk_id (bisa di-update per chunk saat build incremental); posting list dan
+    statistik BM25 disusun ulang di memori saat dimuat.
+    """
+
+    def __init__(self, docs: dict = None):
+        self.docs = docs or {}  # chunk_id -> {"len": int, "tf": {term: count}}
+        self._postings = None
+
+    # ---------- build ----------
+    @classmethod
+    def load(cls, index_dir: Path) -> "LexicalIndex":
+        path = Path(index_dir) / LEXICAL_NAME
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data.get("version") == LEXICAL_VERSION:
+                    return cls(data["docs"])
+            except Exception as e:
+                print(f"[WARN] Index lexical rusak, dibuat ulang: {e}")
+        return cls()
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / LEXICAL_NAME).exists()
+
+    def save(self, index_dir: Path) -> None:
+        path = Path(index_dir) / LEXICAL_NAME
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": LEXICAL_VERSION, "docs": self.docs}, ensure_ascii=False),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+
+    def add(self, chunk_id: str, text: str) -> None:
+        tokens = tokenize(text)
+        self.docs[chunk_id] = {"len": len(tokens), "tf": dict(Counter(tokens))}
+        self._postings = None
+
+    def remove(self, chunk_ids) -> None:
+        for cid in chunk_ids:
+            self.docs.pop(cid, None)
+        self._postings = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # ---------- query ----------
+    def _prepare(self) -> None:
+        postings = defaultdict(list)
+        total = 0
+        for cid, d in self.docs.items():
+            total += d["len"]
+            for term, tf in d["tf"].items():
+                postings[term].append((cid, tf))
+        self._avgdl = total / len(self.docs) if self.docs else 0.0
+        self._postings = dict(postings)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """Return [(chunk_id, skor)] urut skor BM25 tertinggi."""
+        if self._postings is None:
+            self._prepare()
+        if not self.docs:
+            return []
+        n = len(self.docs)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self._postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for cid, tf in plist:
+                dl = self.docs[cid]["len"]
+                scores[cid] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / self._avgdl))
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+def rrf_fuse(rankings, k: int = RRF_K) -> list:
+    """Reciprocal Rank Fusion: rankings = list urutan id; return id urut skor gabungan."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,372 @@
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from metrics import metrics
+from prompt_assembly import estimate_tokens
+
+load_dotenv()
+
+# === Konfigurasi gateway LLM ===
+# Kuota Groq per API key, isi sesuai tier akun (mis. free tier llama-3.1-8b-instant:
+# GROQ_RPM=30, GROQ_TPM=6000). Default 0 = tidak dibatasi di bot; 429 dari Groq tetap
+# ditangani retry + retry-after. Kuota aktif dicetak saat startup (lihat limits_text).
+GROQ_RPM = float(os.getenv("GROQ_RPM", "0"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "0"))
+# Perkiraan token jawaban yang ikut dihitung ke TPM saat reservasi
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "300"))
+# Maksimal menunggu jatah kuota sebelum request ditolak (detik)
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Timeout per percobaan (total) dan sampai token pertama (streaming)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_FIRST_TOKEN_TIMEOUT = float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Prompt identik yang sedang jalan bersamaan cukup 1 panggilan ke Groq
+LLM_COALESCE = os.getenv("LLM_COALESCE", "1") == "1"
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APITimeoutError", "APIConnectionError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError"}
+
+
+def limits_text(rpm: float = GROQ_RPM, tpm: float = GROQ_TPM) -> str:
+    def fmt(v):
+        return f"{v:g}" if v > 0 else "tanpa batas"
+
+    return f"RPM={fmt(rpm)} TPM={fmt(tpm)} antre maks {LLM_QUEUE_TIMEOUT:g}s"
+
+
+class LLMUnavailable(Exception):
+    """LLM tidak bisa menjawab (kuota habis / retry habis / timeout) - bukan bug di bot."""
+
+
+# ============================================================
+# Token bucket (RPM + TPM)
+# ============================================================
+class TokenBucket:
+    """
+    Bucket berbasis reservasi: reserve(n) langsung memotong saldo (boleh minus)
+    dan mengembalikan lama tunggu sampai saldo cukup, jadi antrean FIFO dan
+    aman dipakai dari thread maupun event loop.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._tokens = per_minute
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, n: float) -> float:
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (min(n, self.capacity) - self._tokens) / self.rate)
+
+    def reserve(self, n: float) -> float:
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= min(n, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+    def has_headroom(self, n: float, reserve: float) -> bool:
+        """True kalau setelah memakai n saldo masih >= reserve (0..1) x kapasitas."""
+        if not self.enabled:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens - min(n, self.capacity) >= reserve * self.capacity
+
+
+# ============================================================
+# Klasifikasi error
+# ============================================================
+def _status_code(e: Exception) -> Optional[int]:
+    code = getattr(e, "status_code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _retry_after(e: Exception) -> float:
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_retryable(e: Exception) -> bool:
+    if isinstance(e, asyncio.TimeoutError):
+        return True
+    if type(e).__name__ in RETRYABLE_ERRORS:
+        return True
+    return _status_code(e) in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int, e: Exception = None) -> float:
+    """Full jitter, tapi tidak lebih cepat dari header retry-after dari Groq."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
+    if e is not None:
+        delay = max(delay, _retry_after(e))
+    return delay
+
+
+def prompt_text(value) -> str:
+    if hasattr(value, "to_string"):
+        return value.to_string()
+    return str(value)
+
+
+# ============================================================
+# Gateway
+# ============================================================
+class LLMGateway(Runnable):
+    """
+    Pembungkus chat model (ChatGroq) yang dipakai sebagai langkah terakhir chain:
+      - jatah RPM/TPM lewat token bucket; request menunggu giliran, bukan kena 429
+      - maksimal max_concurrency panggilan ke Groq bersamaan
+      - timeout per percobaan (task dibatalkan) dan retry terbatas dengan jitter
+      - prompt identik yang sedang diproses digabung jadi satu panggilan
+    Kuota lokal penuh, timeout dan retry habis dilempar sebagai LLMUnavailable;
+    error yang tidak bisa diulang (401, 400, bug) dilempar apa adanya.
+    """
+
+    def __init__(self, base, rpm: float = GROQ_RPM, tpm: float = GROQ_TPM,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, timeout: float = LLM_TIMEOUT,
+                 first_token_timeout: float = LLM_FIRST_TOKEN_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT, coalesce: bool = LLM_COALESCE):
+        self.base = base
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.first_token_timeout = first_token_timeout
+        self.max_retries = max(0, max_retries)
+        self.queue_timeout = queue_timeout
+        self.coalesce = coalesce
+        self._semaphore = None  # dibuat di event loop yang memakai gateway
+        self._sync_semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._inflight = {}  # key prompt -> Future[AIMessage]
+        self.stats_counter = {"calls": 0, "coalesced": 0, "retries": 0, "timeouts": 0,
+                              "rate_limited": 0, "rejected": 0, "failed": 0, "errors": 0}
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.base, "model_name", type(self.base).__name__)
+
+    def _count(self, name: str) -> None:
+        self.stats_counter[name] += 1
+        metrics.inc(f"llm_{name}")
+
+    # ---------- kuota ----------
+    def queue_wait(self, prompt: str) -> float:
+        """Perkiraan lama menunggu kuota untuk prompt ini (dipakai router untuk menilai beban)."""
+        need = estimate_tokens(prompt) + LLM_EXPECTED_COMPLETION_TOKENS
+        return max(self.requests.wait_time(1), self.tokens.wait_time(need))
+
+    def has_headroom(self, prompt: str, reserve: float) -> bool:
+        """
+        True kalau prompt ini bisa jalan tanpa antre dan kuota masih menyisakan
+        `reserve` (0..1) dari RPM/TPM. Dipakai pekerjaan latar (warm-up FAQ)
+        supaya tidak menghabiskan kuota milik user.
+        """
+        need = estimate_tokens(prompt) + LLM_EXPECTED_COMPLETION_TOKENS
+        return self.requests.has_headroom(1, reserve) and self.tokens.has_headroom(need, reserve)
+
+    def _reserve(self, prompt: str) -> float:
+        """Reservasi 1 request + perkiraan token; lempar LLMUnavailable kalau antrean melebihi queue_timeout."""
+        need = estimate_tokens(prompt) + LLM_EXPECTED_COMPLETION_TOKENS
+        wait = self.queue_wait(prompt)
+        if wait > self.queue_timeout:
+            self._count("rejected")
+            raise LLMUnavailable(f"kuota Groq penuh (perlu tunggu {wait:.1f}s)")
+        wait = max(self.requests.reserve(1), self.tokens.reserve(need))
+        metrics.observe("llm_queue_wait_seconds", wait)
+        return wait
+
+    def _sem(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _key(self, input, kwargs) -> str:
+        raw = f"{self.model_name}|{sorted(kwargs.items())!r}|{prompt_text(input)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _give_up(self, e: Exception) -> LLMUnavailable:
+        self._count("failed")
+        return LLMUnavailable(f"{type(e).__name__}: {e or 'timeout'}")
+
+    def _raise_fatal(self, e: Exception) -> None:
+        """
+        Error yang tidak bisa diulang (401 API key salah, 400 prompt kepanjangan, bug)
+        dilempar apa adanya, bukan LLMUnavailable, supaya tidak terlihat seperti beban
+        dan traceback-nya tetap masuk log.
+        """
+        if not is_retryable(e):
+            self._count("errors")
+            raise e
+
+    def _on_error(self, e: Exception, attempt: int) -> float:
+        """Return jeda sebelum retry; lempar LLMUnavailable kalau retry habis."""
+        if isinstance(e, asyncio.TimeoutError):
+            self._count("timeouts")
+        if _status_code(e) == 429:
+            self._count("rate_limited")
+        self._raise_fatal(e)
+        if attempt >= self.max_retries:
+            raise self._give_up(e) from e
+        self._count("retries")
+        return backoff_delay(attempt, e)
+
+    # ---------- sync ----------
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        prompt = prompt_text(input)
+        attempt = 0
+        while True:
+            time.sleep(self._reserve(prompt))
+            self._count("calls")
+            try:
+                with self._sync_semaphore:
+                    return self.base.invoke(input, config, **kwargs)
+            except Exception as e:
+                time.sleep(self._on_error(e, attempt))
+                attempt += 1
+
+    def stream(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[AIMessageChunk]:
+        yield self.invoke(input, config, **kwargs)
+
+    # ---------- async ----------
+    async def _ainvoke_upstream(self, input, config, **kwargs) -> AIMessage:
+        prompt = prompt_text(input)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve(prompt))
+            self._count("calls")
+            try:
+                async with self._sem():
+                    # wait_for membatalkan request HTTP yang sedang jalan saat timeout
+                    return await asyncio.wait_for(self.base.ainvoke(input, config, **kwargs), self.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await asyncio.sleep(self._on_error(e, attempt))
+                attempt += 1
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        if not self.coalesce:
+            return await self._ainvoke_upstream(input, config, **kwargs)
+
+        key = self._key(input, kwargs)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self._count("coalesced")
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await self._ainvoke_upstream(input, config, **kwargs)
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e if isinstance(e, Exception) else LLMUnavailable("dibatalkan"))
+            fut.exception()  # tandai sudah dibaca kalau tidak ada follower
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _astream_upstream(self, input, config, **kwargs) -> AsyncIterator[AIMessageChunk]:
+        prompt = prompt_text(input)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve(prompt))
+            self._count("calls")
+            emitted = False
+            try:
+                async with self._sem():
+                    it = self.base.astream(input, config, **kwargs).__aiter__()
+                    deadline = time.monotonic() + self.timeout
+                    try:
+                        while True:
+                            limit = deadline - time.monotonic()
+                            if not emitted:
+                                limit = min(limit, self.first_token_timeout)
+                            try:
+                                chunk = await asyncio.wait_for(it.__anext__(), max(0.0, limit))
+                            except StopAsyncIteration:
+                                return
+                            emitted = True
+                            yield chunk
+                    finally:
+                        await it.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if emitted:
+                    # sebagian jawaban sudah terkirim ke user -> tidak bisa diulang dari awal
+                    self._raise_fatal(e)
+                    raise self._give_up(e) from e
+                await asyncio.sleep(self._on_error(e, attempt))
+                attempt += 1
+
+    async def astream(self, input, config: Optional[RunnableConfig] = None,
+                      **kwargs: Any) -> AsyncIterator[AIMessageChunk]:
+        if not self.coalesce:
+            async for chunk in self._astream_upstream(input, config, **kwargs):
+                yield chunk
+            return
+
+        key = self._key(input, kwargs)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            # follower: tunggu jawaban lengkap dari stream yang sudah jalan
+            self._count("coalesced")
+            result = await asyncio.shield(fut)
+            yield AIMessageChunk(content=result.content)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        parts = []
+        try:
+            async for chunk in self._astream_upstream(input, config, **kwargs):
+                parts.append(chunk.content or "")
+                yield chunk
+            fut.set_result(AIMessage(content="".join(parts)))
+        except BaseException as e:
+            if not fut.done():
+                fut.set_exception(e if isinstance(e, Exception) else LLMUnavailable("dibatalkan"))
+                fut.exception()
+            raise
+        finally:
+            if not fut.done():
+                # stream ditutup konsumen sebelum selesai
+                fut.set_exception(LLMUnavailable("stream dihentikan"))
+                fut.exception()
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"model": self.model_name, "inflight": len(self._inflight), **self.stats_counter}
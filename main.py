@@ -1,22 +1,46 @@
+import time
+
+_PROCESS_T0 = time.perf_counter()
+
 import os
 import re
 import asyncio
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.constants import ChatAction
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
 
-from chatlog_db import save_chatlog
-
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain_core.runnables import RunnablePassthrough
-from langchain_groq import ChatGroq
+from chatlog_db import save_chatlog, close_chatlog_sink, get_chatlog_sink
+from answer_cache import AnswerCache
+from conversation_memory import create_memory
+from prompt_assembly import assemble_context, fit_history
+from lexical_index import LexicalIndex, rrf_fuse
+from fact_index import FactIndex
+from flat_index import FlatIndex, collection_count
+from llm_gateway import GROQ_RPM, GROQ_TPM, LLMGateway, LLMUnavailable, limits_text
+from model_router import MODEL_LADDER, ModelRoute, ModelRouter, parse_ladder
+import faq_warmup
+from metrics import metrics, start_metrics_server, SIZE_BUCKETS
+from embedding_service import get_embeddings
+from dataset_watcher import DatasetWatcher
+import index_store
+
+from langchain_core.documents import Document
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
 from prompt_template import get_prompt
 
+# Chroma (chromadb), Groq client dan model sentence-transformers baru di-import /
+# dimuat saat warm-up (lihat _init_models / _open_vectordb), bukan saat import main.py.
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
+
 
 # ============================================================
 # ENV
@@ -30,27 +54,186 @@ MODEL_NAME = os.getenv("MODEL_NAME", "llama-3.1-8b-instant")
 # Project kamu (sesuai screenshot) => semua ada 1 folder yang sama
 BASE_DIR = Path(__file__).resolve().parent
 
-# ✅ PENTING: ini harus sama persis dengan folder kamu: "chroma_db"
-CHROMA_DIR = BASE_DIR / "chroma_db"
+# Index aktif ada di chroma_snapshots/<versi>/ (ditunjuk file CURRENT);
+# chroma_db hanya dipakai sebelum snapshot pertama dibuat.
+CHROMA_DIR = index_store.LEGACY_CHROMA_DIR
 PROCESSED_FILE = BASE_DIR / "processed_files.json"
 VERSION_FILE = BASE_DIR / ".dataset_version"  # opsional (kalau ada)
 
+# Retrieval hybrid: top HYBRID_FETCH_K dari vector + BM25 digabung (RRF), diambil RETRIEVER_K teratas.
+# RETRIEVER_MODE=vector mematikan BM25 (juga otomatis kalau index belum punya lexical_index.json).
+RETRIEVER_K = int(os.getenv("RETRIEVER_K", "6"))
+RETRIEVER_MODE = os.getenv("RETRIEVER_MODE", "hybrid").strip().lower()
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+# Backend pencarian vektor: chroma (default) atau flat = exact top-k di memori (matrix NumPy
+# mmap dari flat_vectors.npy, lihat flat_index.py), tanpa client Chroma/SQLite/HNSW per query.
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma").strip().lower()
+
+# Fast path: pertanyaan harga langsung / perkalian dijawab dari fact_index.json tanpa LLM
+FACT_FASTPATH = os.getenv("FACT_FASTPATH", "1") == "1"
+
+# (opsional) batasi siapa yang boleh /stats
+# isi .env: ADMIN_IDS=123456789,987654321
+ADMIN_IDS = {
+    int(x.strip()) for x in os.getenv("ADMIN_IDS", "").split(",")
+    if x.strip().isdigit()
+}
+
+# Endpoint Prometheus (GET /metrics). METRICS_PORT=0 untuk mematikan.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8002"))
+
+# Batas concurrency:
+# - MAX_CONCURRENT_UPDATES: jumlah update Telegram yang diproses paralel
+# - MAX_CONCURRENT_CHAINS : jumlah retrieve->prompt->LLM yang boleh jalan bersamaan
+# - BLOCKING_WORKERS      : ukuran thread pool untuk kerja blocking (Chroma, embedding)
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "64"))
+MAX_CONCURRENT_CHAINS = int(os.getenv("MAX_CONCURRENT_CHAINS", "8"))
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", "8"))
+
+# Cache jawaban (exact + near-duplicate). ANSWER_CACHE_SIM_THRESHOLD=0 mematikan tier semantic.
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "500"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIM_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIM_THRESHOLD", "0.92"))
+
+# Streaming jawaban: kirim placeholder lalu edit bertahap.
+# STREAM_EDIT_INTERVAL dijaga >= 1 detik per chat supaya aman dari rate limit Telegram.
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") == "1"
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+STREAM_MIN_CHARS = int(os.getenv("STREAM_MIN_CHARS", "20"))
+STREAM_PLACEHOLDER = "⏳ Sedang mencari jawaban..."
+TELEGRAM_MAX_CHARS = 4096
+# Edit final yang kena RetryAfter diulang maks sekian kali, lalu dikirim sebagai pesan baru
+FINAL_EDIT_ATTEMPTS = int(os.getenv("FINAL_EDIT_ATTEMPTS", "3"))
+
+# Reload dataset dipicu watcher background (inotify / polling), bukan stat() tiap pesan.
+# DATASET_WATCH=0 kembali ke cek signature di setiap pesan.
+DATASET_WATCH = os.getenv("DATASET_WATCH", "1") == "1"
+
+# Startup: LAZY_STARTUP=1 -> polling Telegram langsung jalan, model embedding + Chroma + chain
+# di-warm-up di background; pesan yang masuk sebelum siap menunggu (maks STARTUP_WAIT_TIMEOUT detik).
+# LAZY_STARTUP=0 -> warm-up diselesaikan dulu sebelum polling dimulai.
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "1") == "1"
+STARTUP_WAIT_TIMEOUT = float(os.getenv("STARTUP_WAIT_TIMEOUT", "180"))
+
 _reload_lock = asyncio.Lock()
+_chain_semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHAINS)
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="rag-blocking")
 _last_sig_ns = 0
+_active_index_dir = None
+dataset_watcher = None
 
 vectordb = None
 chain = None
+fact_index = None
+embeddings = None
+llm = None
+
+# status startup (dilaporkan di log, /debug dan /stats)
+_ready = asyncio.Event()
+_startup = {"import_s": None, "warmup_s": None, "first_answer_s": None, "error": None}
+
+answer_cache = AnswerCache(
+    max_entries=ANSWER_CACHE_SIZE,
+    ttl=ANSWER_CACHE_TTL,
+    similarity_threshold=ANSWER_CACHE_SIM_THRESHOLD,
+)
 
 
 # ============================================================
-# Heavy init
+# Metrics LLM (durasi, TTFT, token)
 # ============================================================
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-llm = ChatGroq(
-    groq_api_key=GROQ_API_KEY,
-    model_name=MODEL_NAME,
-    temperature=0.3,
-)
+class _LLMMetricsCallback(BaseCallbackHandler):
+    run_inline = True  # cukup ringan, tidak perlu dilempar ke executor
+
+    def __init__(self):
+        self._runs = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._runs[run_id] = [time.perf_counter(), False]
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run and not run[1]:
+            run[1] = True
+            metrics.observe("llm_ttft_seconds", time.perf_counter() - run[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run:
+            metrics.observe("llm_seconds", time.perf_counter() - run[0])
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        if prompt_tokens is None:
+            try:
+                meta = response.generations[0][0].message.usage_metadata or {}
+                prompt_tokens = meta.get("input_tokens")
+                completion_tokens = meta.get("output_tokens")
+            except (AttributeError, IndexError):
+                pass
+        if prompt_tokens is not None:
+            metrics.observe("prompt_tokens", prompt_tokens, SIZE_BUCKETS)
+            metrics.inc("prompt_tokens", prompt_tokens)
+        if completion_tokens is not None:
+            metrics.observe("completion_tokens", completion_tokens, SIZE_BUCKETS)
+            metrics.inc("completion_tokens", completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
+        metrics.inc("llm_errors")
+
+
+# ============================================================
+# Heavy init (lazy, dipanggil dari warm-up)
+# ============================================================
+def _make_llm():
+    from langchain_groq import ChatGroq
+
+    # satu gateway per model (kuota Groq per model); retry & timeout diatur LLMGateway, bukan client Groq
+    routes = []
+    for name, slo_s in parse_ladder(MODEL_LADDER or MODEL_NAME):
+        model = ChatGroq(
+            groq_api_key=GROQ_API_KEY,
+            model_name=name,
+            temperature=0.3,
+            max_retries=0,
+            callbacks=[_LLMMetricsCallback()],
+        )
+        routes.append(ModelRoute(name, LLMGateway(model), slo_s))
+    print(f"[INFO] Ladder model: {' -> '.join(f'{r.name} (SLO {r.slo_s:.1f}s)' for r in routes)}")
+    print(f"[INFO] Kuota LLM per model: {limits_text()}")
+    if not (GROQ_RPM or GROQ_TPM):
+        print("[WARN] GROQ_RPM/GROQ_TPM belum di-set: kuota tidak dijaga bot, hanya mengandalkan retry 429")
+    return ModelRouter(routes)
+
+
+def _init_models() -> None:
+    """Muat model embedding (dipakai bersama, LRU untuk query berulang) dan client Groq sekali per proses."""
+    global embeddings, llm
+    if embeddings is None:
+        with metrics.timer("init_embeddings"):
+            embeddings = get_embeddings()
+    if llm is None:
+        with metrics.timer("init_llm"):
+            llm = _make_llm()
+
+
+def _open_vectordb(index_dir: Path) -> "Chroma":
+    from langchain_chroma import Chroma
+
+    return Chroma(persist_directory=str(index_dir), embedding_function=embeddings)
+
+
+# ============================================================
+# Blocking helper (event loop jangan sampai freeze)
+# ============================================================
+async def _run_blocking(fn, *args, **kwargs):
+    """Jalankan fungsi blocking di thread pool terbatas agar event loop tidak nge-freeze."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, lambda: fn(*args, **kwargs))
 
 
 # ============================================================
@@ -64,6 +247,9 @@ def _mtime_ns(p: Path) -> int:
 
 
 def _chroma_mtime_ns() -> int:
+    # snapshot tidak pernah ditulis setelah aktif -> cukup lihat pointer CURRENT
+    if index_store.current_name():
+        return _mtime_ns(index_store.CURRENT_FILE)
     if not CHROMA_DIR.exists():
         return 0
 
@@ -88,43 +274,222 @@ def dataset_signature_ns() -> int:
     return sig
 
 
-def _build_chain(vdb: Chroma):
-    retriever = vdb.as_retriever(search_kwargs={"k": 10})
+def _dataset_version() -> int:
+    # watcher aktif -> cukup baca integer di memori
+    if dataset_watcher is not None:
+        return dataset_watcher.version
+    return dataset_signature_ns()
+
+
+def _doc_key(doc: Document):
+    return doc.metadata.get("chunk_id") or doc.id or doc.page_content
+
+
+def _make_retriever(vdb, lex: LexicalIndex = None):
+    def _retrieve(query: str):
+        # dipisah manual (bukan as_retriever) supaya embedding & search terukur sendiri-sendiri
+        with metrics.timer("embed_query"):
+            vec = embeddings.embed_query(query)
+        with metrics.timer("retrieve"):
+            docs = vdb.similarity_search_by_vector(vec, k=HYBRID_FETCH_K if lex else RETRIEVER_K)
+        if not lex:
+            return docs
+
+        with metrics.timer("retrieve_lexical"):
+            hits = lex.search(query, k=HYBRID_FETCH_K)
+            by_key = {_doc_key(d): d for d in docs}
+            fused = rrf_fuse([list(by_key), [cid for cid, _ in hits]])[:RETRIEVER_K]
+            # chunk yang hanya ditemukan BM25 diambil dari Chroma berdasarkan ID
+            missing = [key for key in fused if key not in by_key]
+            if missing:
+                got = vdb.get(ids=missing, include=["documents", "metadatas"])
+                for cid, text, meta in zip(got["ids"], got["documents"], got["metadatas"]):
+                    by_key[cid] = Document(page_content=text or "", metadata=meta or {}, id=cid)
+        metrics.inc("retrieve_lexical_only", len(missing))
+        return [by_key[key] for key in fused if key in by_key]
+
+    return _retrieve
+
+
+def _build_chain(vdb, lex: LexicalIndex = None, model=None):
+    """
+    Input chain: {"question", "query", "history"}.
+    `vdb` = Chroma atau FlatIndex (interface similarity_search_by_vector / get sama).
+    `query` (tanpa jawaban bot) dipakai retriever; `history` hanya masuk ke prompt.
+    `model` = pengganti langkah LLM (default `llm`), mis. _warmup_llm untuk warm-up FAQ.
+    """
+    _retrieve = _make_retriever(vdb, lex)
+
+    def _assemble(inputs: dict) -> dict:
+        docs = _retrieve(inputs.get("query") or inputs["question"])
+        with metrics.timer("prompt_assembly"):
+            context, info = assemble_context(docs, inputs["question"])
+        metrics.observe("context_tokens", info["tokens"], SIZE_BUCKETS)
+        metrics.inc("context_chunks_dropped", info["dropped"] + info["deduped"])
+        return {
+            "context": context,
+            "question": inputs["question"],
+            "history": inputs.get("history") or "(tidak ada)",
+        }
+
+    def _record_prompt(prompt_value):
+        metrics.observe("prompt_chars", len(prompt_value.to_string()), SIZE_BUCKETS)
+        return prompt_value
+
     prompt = get_prompt()
     return (
-        {"context": retriever, "question": RunnablePassthrough()}
+        RunnableLambda(_assemble)
         | prompt
-        | llm
+        | RunnableLambda(_record_prompt)
+        | (model or llm)
     )
 
 
-async def ensure_chain_latest(force: bool = False):
-    global vectordb, chain, _last_sig_ns
+def _warm_vectordb(vdb) -> None:
+    vdb.similarity_search_by_vector(embeddings.embed_query("warmup"), k=1)
+
+
+def _load_flat(index_dir: Path, vdb: "Chroma") -> FlatIndex:
+    flat = FlatIndex.load(index_dir)
+    if flat is None or len(flat) != collection_count(vdb):
+        # snapshot tanpa flat_vectors.npy (build dengan backend chroma) / tidak cocok: export ke
+        # memori saja; snapshot yang sudah dipublish tidak pernah ditulis (lihat index_store)
+        print(f"[WARN] Index flat tidak ada / tidak cocok di {index_dir.name}, export dari Chroma ke memori "
+              f"(set RETRIEVER_BACKEND=flat juga untuk build_dataset.py)")
+        flat = FlatIndex.from_collection(vdb)
+    return flat
+
+
+def _load_lexical(index_dir: Path):
+    if RETRIEVER_MODE != "hybrid" or not LexicalIndex.exists(index_dir):
+        return None
+    lex = LexicalIndex.load(index_dir)
+    lex.search("warmup", k=1)  # susun posting list sekarang, bukan saat pesan pertama
+    return lex
+
+
+def _load_facts(index_dir: Path):
+    if not FACT_FASTPATH or not FactIndex.exists(index_dir):
+        return None
+    facts = FactIndex.load(index_dir)
+    facts.lookup("warmup")
+    return facts
+
+
+async def _warmup_llm(prompt_value):
+    """
+    Langkah LLM untuk warm-up FAQ: hanya dikirim kalau kuota masih menyisakan
+    FAQ_WARMUP_QUOTA_RESERVE untuk user, jadi warm-up tidak pernah membuat user
+    antre sampai LLM_QUEUE_TIMEOUT. Cek dan reservasi kuota terjadi tanpa await
+    di antaranya, jadi warm-up yang jalan bersamaan tidak bisa sama-sama lolos.
+    """
+    has_headroom = getattr(llm, "has_headroom", None)
+    if has_headroom is not None and not has_headroom(prompt_value.to_string(), faq_warmup.FAQ_WARMUP_QUOTA_RESERVE):
+        raise faq_warmup.WarmupBudgetExhausted("kuota LLM tinggal jatah user")
+    return await llm.ainvoke(prompt_value)
+
+
+async def _warm_faq(new_chain, new_facts) -> tuple:
+    """
+    Jawab pertanyaan populer memakai chain baru (belum terlihat user).
+    Return (entries, stats); entries = [(pertanyaan, jawaban, embedding)] untuk answer cache.
+    """
+    questions = await _run_blocking(faq_warmup.collect_questions)
+    entries = []
+
+    async def _one(question: str) -> bool:
+        # harga langsung sudah dijawab index fakta; pertanyaan lanjutan tidak pernah di-cache
+        if _is_followup(question) or (new_facts is not None and new_facts.answer(question) is not None):
+            return False
+        vec = None
+        if ANSWER_CACHE_SIM_THRESHOLD > 0:
+            vec = await _run_blocking(embeddings.embed_query, question)
+        async with _chain_semaphore:
+            response = await new_chain.ainvoke({"question": question, "query": question, "history": fit_history([])})
+        answer = (response.content or "").strip()
+        if classify_answer_status(answer) != 1:
+            return False
+        entries.append((question, answer, vec))
+        return True
+
+    stats = await faq_warmup.run_warmup(questions, _one)
+    return entries, stats
+
+
+async def ensure_chain_latest(force: bool = False, from_watcher: bool = False):
+    global vectordb, chain, fact_index, _last_sig_ns, _active_index_dir
 
-    sig = dataset_signature_ns()
+    with metrics.timer("signature_check"):
+        sig = _dataset_version()
     need_reload = force or (chain is None) or (sig > _last_sig_ns)
     if not need_reload:
         return
+    if chain is not None and dataset_watcher is not None and not (force or from_watcher):
+        # reload dikerjakan watcher di background, pesan tetap dilayani chain lama
+        return
 
     async with _reload_lock:
-        sig2 = dataset_signature_ns()
+        sig2 = _dataset_version()
         need_reload2 = force or (chain is None) or (sig2 > _last_sig_ns)
         if not need_reload2:
             return
 
-        if not CHROMA_DIR.exists() or not any(CHROMA_DIR.iterdir()):
-            raise Exception(f"❌ ChromaDB tidak ditemukan di: {CHROMA_DIR}")
+        index_dir = index_store.current_index_dir()
+        if not index_dir.exists() or not any(index_dir.iterdir()):
+            raise Exception(f"❌ ChromaDB tidak ditemukan di: {index_dir}")
 
+        t0 = time.perf_counter()
         try:
-            new_vdb = Chroma(persist_directory=str(CHROMA_DIR), embedding_function=embeddings)
-            new_chain = _build_chain(new_vdb)
-
+            if embeddings is None or llm is None:
+                await _run_blocking(_init_models)
+            new_vdb = await _run_blocking(_open_vectordb, index_dir)
+            new_search = new_vdb
+            if RETRIEVER_BACKEND == "flat":
+                new_search = await _run_blocking(_load_flat, index_dir, new_vdb)
+            # warm-up snapshot baru (muat index ke memori) sebelum dipakai user
+            await _run_blocking(_warm_vectordb, new_search)
+            new_lex = await _run_blocking(_load_lexical, index_dir)
+            new_facts = await _run_blocking(_load_facts, index_dir)
+            new_chain = _build_chain(new_search, new_lex)
+
+            # reload di background (chain lama masih melayani) -> jawab FAQ dulu dengan index baru,
+            # supaya user pertama setelah update katalog langsung kena cache
+            warm_entries, warm_info = [], ""
+            if (faq_warmup.FAQ_WARMUP and ANSWER_CACHE_ENABLED
+                    and chain is not None and dataset_watcher is not None):
+                warm_chain = _build_chain(new_search, new_lex, model=RunnableLambda(_warmup_llm))
+                warm_entries, warm = await _warm_faq(warm_chain, new_facts)
+                metrics.observe("faq_warmup_seconds", warm["seconds"])
+                metrics.inc("faq_warmup_answers", warm["warmed"])
+                metrics.inc("faq_warmup_budget_skipped", warm["budget"])
+                warm_info = (f" | FAQ warm-up {warm['warmed']}/{warm['questions']} "
+                             f"({warm['seconds']:.1f}s, gagal={warm['failed']}, kuota={warm['budget']}, "
+                             f"timeout={warm['timed_out']})")
+
+            # swap; request yang sedang jalan tetap memegang chain lama sampai selesai,
+            # setelah itu snapshot lama dilepas GC (drain)
             vectordb = new_vdb
             chain = new_chain
+            fact_index = new_facts
             _last_sig_ns = sig2
-
-            print(f"🔄 Reload OK | sig={sig2}")
+            _active_index_dir = index_dir
+
+            # jawaban lama dibuat dari index lama -> buang, lalu isi jawaban FAQ dari index baru
+            # (tanpa await di antaranya, jadi tidak ada pesan yang melihat cache kosong)
+            dropped = answer_cache.invalidate()
+            for question, answer, vec in warm_entries:
+                answer_cache.put(question, sig2, answer, vec)
+            metrics.observe("reload_seconds", time.perf_counter() - t0)
+            metrics.inc("reloads")
+
+            mode = f"hybrid ({len(new_lex)} chunk BM25)" if new_lex else "vector"
+            if new_search is not new_vdb:
+                mode += f" | flat ({len(new_search)} vektor)"
+            facts_info = f"{len(new_facts)} fakta" if new_facts is not None else "fact fast path off"
+            print(f"🔄 Reload OK | index={index_dir.name} | {mode} | {facts_info} | sig={sig2} | "
+                  f"cache dibuang={dropped}{warm_info}")
         except Exception as e:
+            metrics.inc("reload_errors")
             print("❌ Reload gagal (pakai chain lama jika ada):", e)
             traceback.print_exc()
             if chain is None:
@@ -194,10 +559,121 @@ def classify_answer_status(answer: str) -> int:
     return 0 if score >= 2 else 1
 
 
+# ============================================================
+# Answer cache helpers
+# ============================================================
+_FOLLOWUP_RE = re.compile(
+    r"\b(kalau|kalo|itu|tadi|tersebut|nambah|tambah|lagi|sebelumnya|yang sama|juga)\b"
+)
+
+
+def _is_followup(text: str) -> bool:
+    """Pertanyaan lanjutan bergantung pada percakapan sebelumnya, jadi tidak boleh diambil dari cache."""
+    return bool(_FOLLOWUP_RE.search((text or "").lower()))
+
+
+def _cache_stats_line() -> str:
+    st = answer_cache.stats()
+    emb = embeddings.stats() if embeddings is not None else {"size": 0, "hit_rate": 0.0}
+    return (
+        f"CACHE: size={st['size']} exact={st['exact_hits']} semantic={st['semantic_hits']} "
+        f"miss={st['misses']} hit_rate={st['hit_rate']:.1%}\n"
+        f"EMBED_CACHE: size={emb['size']} hit_rate={emb['hit_rate']:.1%}"
+    )
+
+
+# ============================================================
+# Streaming ke Telegram (progressive edit)
+# ============================================================
+async def _safe_edit(message, text: str, parse_mode=None) -> bool:
+    """Edit pesan; abaikan 'message is not modified', hormati RetryAfter."""
+    try:
+        await message.edit_text(text[:TELEGRAM_MAX_CHARS], parse_mode=parse_mode)
+        return True
+    except RetryAfter as e:
+        ra = e.retry_after
+        await asyncio.sleep(ra.total_seconds() if hasattr(ra, "total_seconds") else float(ra))
+        return False
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return True
+        raise
+
+
+async def _stream_answer(message, full_input: dict) -> str:
+    """
+    Konsumsi chain.astream sambil mengedit placeholder di task terpisah,
+    maksimal sekali per STREAM_EDIT_INTERVAL, supaya edit tidak memperlambat stream.
+    """
+    parts = []
+    updated = asyncio.Event()
+
+    async def _editor():
+        shown = ""
+        while True:
+            await updated.wait()
+            updated.clear()
+            text = "".join(parts)
+            if len(text) - len(shown) < STREAM_MIN_CHARS:
+                continue
+            # teks parsial belum tentu Markdown valid -> kirim plain text
+            if await _safe_edit(message, text + " ▌"):
+                shown = text
+            await asyncio.sleep(STREAM_EDIT_INTERVAL)
+
+    editor = asyncio.create_task(_editor())
+    try:
+        async with _chain_semaphore:
+            async for chunk in chain.astream(full_input):
+                parts.append(getattr(chunk, "content", "") or "")
+                updated.set()
+    finally:
+        editor.cancel()
+        try:
+            await editor
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Edit streaming gagal: {e}")
+
+    return "".join(parts).strip()
+
+
+async def _send_final(message, formatted_answer: str, fallback=None) -> None:
+    """
+    Edit placeholder dengan jawaban final (Markdown), fallback plain text kalau parse gagal.
+    Kena RetryAfter -> tunggu lalu ulangi (maks FINAL_EDIT_ATTEMPTS); kalau tetap gagal,
+    jawaban dikirim sebagai pesan baru lewat `fallback` (pesan user) supaya tidak hilang.
+    """
+    parse_mode = "Markdown"
+    for _ in range(FINAL_EDIT_ATTEMPTS):
+        try:
+            if await _safe_edit(message, formatted_answer, parse_mode=parse_mode):
+                return
+        except BadRequest:
+            if parse_mode is None:
+                break
+            parse_mode = None
+    metrics.inc("telegram_final_edit_failed")
+    if fallback is None:
+        return
+    try:
+        await fallback.reply_text(formatted_answer[:TELEGRAM_MAX_CHARS], parse_mode="Markdown")
+    except BadRequest:
+        await fallback.reply_text(formatted_answer[:TELEGRAM_MAX_CHARS])
+
+
 # ============================================================
 # Telegram handlers
 # ============================================================
-user_memory = {}
+conversation_memory = create_memory()
+
+
+async def _memory_call(fn, *args):
+    # backend in-memory cukup dipanggil langsung; sqlite/postgres lewat executor
+    if conversation_memory.is_local:
+        return fn(*args)
+    return await _run_blocking(fn, *args)
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -209,17 +685,38 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def debug_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg = (
         f"BASE_DIR: {BASE_DIR}\n"
-        f"CHROMA_DIR: {CHROMA_DIR} (exists={CHROMA_DIR.exists()})\n"
-        f"SQLITE: {CHROMA_DIR / 'chroma.sqlite3'} (exists={(CHROMA_DIR / 'chroma.sqlite3').exists()})\n"
+        f"INDEX_DIR: {_active_index_dir}\n"
+        f"CURRENT: {index_store.current_name()}\n"
         f"PROCESSED_FILE: {PROCESSED_FILE} (exists={PROCESSED_FILE.exists()})\n"
         f"VERSION_FILE: {VERSION_FILE} (exists={VERSION_FILE.exists()})\n"
         f"SIG_NS: {dataset_signature_ns()}\n"
         f"LAST_SIG_NS: {_last_sig_ns}\n"
-        f"CHAIN_READY: {chain is not None}\n"
+        f"WATCHER: {dataset_watcher.stats() if dataset_watcher else 'off'}\n"
+        f"CHAIN_READY: {chain is not None} | WARMUP_DONE: {_ready.is_set()}\n"
+        f"STARTUP: {_startup_line()}\n"
+        f"FACTS: {len(fact_index) if fact_index is not None else 'off'}\n"
+        f"{_cache_stats_line()}\n"
     )
     await update.message.reply_text(f"```{msg}```", parse_mode="Markdown")
 
 
+async def stats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id if update.effective_user else None
+    if ADMIN_IDS and (user_id not in ADMIN_IDS):
+        await update.message.reply_text("❌ Anda tidak memiliki izin untuk menjalankan /stats.")
+        return
+
+    msg = (
+        f"{metrics.summary_text()}\n"
+        f"{_cache_stats_line()}\n"
+        f"CHATLOG_QUEUE: {get_chatlog_sink().qsize()}\n"
+        f"MEMORY: {conversation_memory.stats()}\n"
+        f"STARTUP: {_startup_line()}\n"
+        f"LLM: {llm.stats() if hasattr(llm, 'stats') else type(llm).__name__}\n"
+    )
+    await update.message.reply_text(f"```\n{msg}```", parse_mode="Markdown")
+
+
 async def reload_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         await ensure_chain_latest(force=True)
@@ -229,36 +726,196 @@ async def reload_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    t_start = time.perf_counter()
     user_text = (update.message.text or "").strip()
     user_id = update.effective_chat.id
 
     print(f"📩 Pesan diterima dari {user_id}: {user_text}")
+    metrics.inc("messages")
     await context.bot.send_chat_action(chat_id=user_id, action=ChatAction.TYPING)
 
-    previous_context = user_memory.get(user_id, "")
+    placeholder = None
 
     try:
+        if not _ready.is_set():
+            # warm-up belum selesai: pesan menunggu di sini (antre), bukan gagal
+            metrics.inc("messages_queued_startup")
+            with metrics.timer("startup_wait"):
+                await asyncio.wait_for(_ready.wait(), STARTUP_WAIT_TIMEOUT)
+
+        turns = await _memory_call(conversation_memory.get_turns, user_id)
         await ensure_chain_latest()
 
-        full_input = f"{previous_context}\n\nPengguna: {user_text}"
-        response = chain.invoke(full_input)
-        answer = (response.content or "").strip()
+        followup = bool(turns) and _is_followup(user_text)
+        cacheable = ANSWER_CACHE_ENABLED and not followup
+        sig = _last_sig_ns
+        query_vec = None
+        cached = None
+        fact_answer = None
+        if fact_index is not None and not followup:
+            with metrics.timer("fact_lookup"):
+                fact_answer = fact_index.answer(user_text)
+        if fact_answer is not None:
+            cacheable = False
+        elif cacheable:
+            with metrics.timer("cache_lookup"):
+                semantic = ANSWER_CACHE_SIM_THRESHOLD > 0
+                # exact-match dulu, embedding hanya dihitung kalau exact miss
+                cached = answer_cache.get(user_text, sig, count_miss=not semantic)
+                if cached is None and semantic:
+                    query_vec = await _run_blocking(embeddings.embed_query, user_text)
+                    cached = answer_cache.get(user_text, sig, query_vec)
+
+        if fact_answer is not None:
+            answer = fact_answer
+            metrics.inc("fact_hits")
+            print("⚡ Dijawab dari index fakta (tanpa LLM)")
+        elif cached is not None:
+            answer, tier = cached
+            metrics.inc(f"cache_{tier}_hits")
+            print(f"⚡ Cache hit ({tier})")
+        else:
+            full_input = {
+                "question": user_text,
+                # retriever hanya butuh pertanyaan; pertanyaan lanjutan digabung pertanyaan sebelumnya
+                "query": f"{turns[-1][0]} {user_text}" if followup else user_text,
+                "history": fit_history(turns),
+            }
+            if STREAM_RESPONSES:
+                with metrics.timer("telegram_send"):
+                    placeholder = await update.message.reply_text(STREAM_PLACEHOLDER)
+                with metrics.timer("chain"):
+                    answer = await _stream_answer(placeholder, full_input)
+            else:
+                # retriever (embedding + Chroma) jalan di executor, Groq pakai HTTP async
+                with metrics.timer("chain"):
+                    async with _chain_semaphore:
+                        response = await chain.ainvoke(full_input)
+                answer = (response.content or "").strip()
+
+        with metrics.timer("format"):
+            formatted_answer = format_to_list(answer)
+
+        with metrics.timer("classify"):
+            status = classify_answer_status(answer)
+
+        with metrics.timer("chatlog"):
+            save_chatlog(user_text, answer, user_id, status)
+
+        if cacheable and cached is None and status == 1:
+            answer_cache.put(user_text, sig, answer, query_vec)
+
+        with metrics.timer("telegram_send"):
+            if placeholder is not None:
+                await _send_final(placeholder, formatted_answer, fallback=update.message)
+            else:
+                await update.message.reply_text(formatted_answer, parse_mode="Markdown")
+
+        await _memory_call(conversation_memory.add_turn, user_id, user_text, formatted_answer)
+        metrics.observe("total_seconds", time.perf_counter() - t_start)
+        if _startup["first_answer_s"] is None:
+            _startup["first_answer_s"] = time.perf_counter() - _PROCESS_T0
+            print(f"⏱️ Time-to-first-answer: {_startup['first_answer_s']:.2f}s sejak proses start")
+
+    except Exception as e:
+        metrics.inc("errors")
+        print(f"❌ Error: {e}")
+        if isinstance(e, LLMUnavailable):
+            # kuota/timeout Groq: bukan bug, tidak perlu traceback
+            metrics.inc("llm_unavailable")
+            save_chatlog(user_text, f"ERROR: LLM tidak tersedia: {e}", user_id, 0)
+            error_text = "⚠️ Maaf, layanan sedang sangat ramai. Silakan kirim ulang pertanyaan Anda dalam beberapa saat."
+        else:
+            traceback.print_exc()
+            save_chatlog(user_text, f"ERROR: {e}", user_id, 0)
+            error_text = "⚠️ Maaf, terjadi kesalahan saat memproses pesan Anda."
+        if placeholder is not None:
+            try:
+                await _safe_edit(placeholder, error_text)
+                return
+            except Exception:
+                pass
+        await update.message.reply_text(error_text)
+
+
+async def _post_init(app):
+    # Retriever/embedding LangChain memakai default executor loop saat ainvoke,
+    # jadi arahkan ke pool yang ukurannya bisa diatur.
+    asyncio.get_running_loop().set_default_executor(_blocking_executor)
+
+    metrics.set_gauge("answer_cache_size", lambda: answer_cache.stats()["size"])
+    metrics.set_gauge("embed_cache_hit_rate", lambda: embeddings.stats()["hit_rate"] if embeddings else 0.0)
+    metrics.set_gauge("ready", lambda: 1 if _ready.is_set() else 0)
+    metrics.set_gauge("chatlog_queue_size", lambda: get_chatlog_sink().qsize())
+    metrics.set_gauge("memory_users", lambda: conversation_memory.stats()["users"])
+    if METRICS_PORT:
+        start_metrics_server(METRICS_HOST, METRICS_PORT)
+        print(f"📈 Metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    if LAZY_STARTUP:
+        asyncio.get_running_loop().create_task(_warmup())
+    else:
+        await _warmup()
+
+    if DATASET_WATCH:
+        _start_dataset_watcher(asyncio.get_running_loop())
+
+
+async def _warmup() -> None:
+    """Muat model embedding + Groq, buka Chroma, embed + search dummy, susun chain; lalu set _ready."""
+    t0 = time.perf_counter()
+    try:
+        await _run_blocking(_init_models)
+        await ensure_chain_latest(force=True)
+        _startup["warmup_s"] = time.perf_counter() - t0
+        print(f"✅ Warm-up selesai dalam {_startup['warmup_s']:.2f}s "
+              f"({time.perf_counter() - _PROCESS_T0:.2f}s sejak proses start)")
+    except Exception as e:
+        # pesan tetap dilepas; ensure_chain_latest akan mencoba lagi saat pesan masuk
+        _startup["error"] = str(e)
+        print(f"❌ Warm-up gagal: {e}")
+        traceback.print_exc()
+    finally:
+        _ready.set()
 
-        formatted_answer = format_to_list(answer)
 
-        status = classify_answer_status(answer)
-        save_chatlog(user_text, answer, user_id, status)
+def _startup_line() -> str:
+    def fmt(v):
+        return f"{v:.2f}s" if v is not None else "-"
 
-        await update.message.reply_text(formatted_answer, parse_mode="Markdown")
+    line = (f"import={fmt(_startup['import_s'])} warmup={fmt(_startup['warmup_s'])} "
+            f"first_answer={fmt(_startup['first_answer_s'])}")
+    if _startup["error"]:
+        line += f" error={_startup['error']}"
+    return line
 
-        new_context = f"{previous_context}\nPengguna: {user_text}\nBot: {formatted_answer}"
-        user_memory[user_id] = "\n".join(new_context.splitlines()[-10:])
 
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        traceback.print_exc()
-        save_chatlog(user_text, f"ERROR: {e}", user_id, 0)
-        await update.message.reply_text("⚠️ Maaf, terjadi kesalahan saat memproses pesan Anda.")
+def _start_dataset_watcher(loop) -> None:
+    global dataset_watcher
+
+    async def _reload_from_watcher(version: int):
+        try:
+            await ensure_chain_latest(from_watcher=True)
+        except Exception as e:
+            print(f"❌ Reload dari watcher gagal (versi {version}): {e}")
+
+    def _on_change(version: int):
+        metrics.inc("dataset_changes")
+        asyncio.run_coroutine_threadsafe(_reload_from_watcher(version), loop)
+
+    dataset_watcher = DatasetWatcher(
+        [VERSION_FILE, PROCESSED_FILE, index_store.CURRENT_FILE],
+        signature_fn=dataset_signature_ns,
+        on_change=_on_change,
+    ).start()
+
+
+async def _post_shutdown(app):
+    if dataset_watcher is not None:
+        dataset_watcher.stop()
+    # pastikan sisa chatlog di antrean tertulis sebelum proses berhenti
+    await asyncio.get_running_loop().run_in_executor(None, close_chatlog_sink)
+    conversation_memory.close()
 
 
 def main():
@@ -267,17 +924,31 @@ def main():
     if not GROQ_API_KEY:
         raise RuntimeError("GROQ_API_KEY belum di-set di .env")
 
-    print("🤖 Bot berjalan...")
+    print(f"🤖 Bot berjalan... (import main.py {_startup['import_s']:.2f}s, "
+          f"warm-up {'background' if LAZY_STARTUP else 'sebelum polling'})")
     print("BASE_DIR =", BASE_DIR)
-    print("CHROMA_DIR =", CHROMA_DIR)
+    print("INDEX_DIR =", index_store.current_index_dir())
+
+    print(f"MAX_CONCURRENT_UPDATES = {MAX_CONCURRENT_UPDATES} | MAX_CONCURRENT_CHAINS = {MAX_CONCURRENT_CHAINS}")
 
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    app = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .concurrent_updates(MAX_CONCURRENT_UPDATES)
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("debug", debug_cmd))
+    app.add_handler(CommandHandler("stats", stats_cmd))
     app.add_handler(CommandHandler("reload", reload_cmd))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.run_polling()
 
 
+_startup["import_s"] = time.perf_counter() - _PROCESS_T0
+
+
 if __name__ == "__main__":
     main()
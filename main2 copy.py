@@ -10,6 +10,7 @@ from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
+import index_store
 
 # === Konfigurasi Token dan Key ===
 load_dotenv()
@@ -20,7 +21,8 @@ MODEL_NAME = os.getenv("MODEL_NAME", "openai/gpt-oss-safeguard-20b")
 
 
 # === Siapkan Folder DB dan Data ===
-CHROMA_PATH = "./chroma_db"
+# Index aktif = snapshot yang ditunjuk chroma_snapshots/CURRENT (chroma_db hanya sebelum snapshot pertama)
+CHROMA_PATH = str(index_store.current_index_dir())
 DATA_PATH = "./data"
 
 
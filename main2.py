@@ -6,6 +6,7 @@ from telegram.constants import ChatAction
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
 from dotenv import load_dotenv
 from chatlog_db import save_chatlog
+import index_store
 
 # === LangChain dan Chroma ===
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -39,7 +40,8 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 MODEL_NAME = os.getenv("MODEL_NAME", "openai/gpt-oss-safeguard-20b")
 
-CHROMA_PATH = "./chroma_db"
+# Index aktif = snapshot yang ditunjuk chroma_snapshots/CURRENT (chroma_db hanya sebelum snapshot pertama)
+CHROMA_PATH = str(index_store.current_index_dir())
 DATA_PATH = "./data"
 
 # === Load Vectorstore ===
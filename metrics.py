@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bucket default (detik) - cukup lebar untuk embedding (ms) sampai LLM (detik)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+RESERVOIR_SIZE = 2048
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus + reservoir sampel terakhir untuk p50/p95/p99."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, reservoir: int = RESERVOIR_SIZE):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=reservoir)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.recent.append(value)
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    self.counts[i] += 1
+                    break
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)) -> dict:
+        with self._lock:
+            data = sorted(self.recent)
+        if not data:
+            return {q: 0.0 for q in qs}
+        return {q: data[min(len(data) - 1, int(q * len(data)))] for q in qs}
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, running = [], 0
+            for c in self.counts:
+                running += c
+                cumulative.append(running)
+            return list(zip(self.buckets, cumulative)), self.count, self.sum
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "travelbot"):
+        self.prefix = prefix
+        self._hist = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            h = self._hist.get(name)
+            if h is None:
+                h = self._hist[name] = Histogram(buckets)
+            return h
+
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS) -> None:
+        self.histogram(name, buckets).observe(value)
+
+    def inc(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def set_gauge(self, name: str, fn_or_value) -> None:
+        """Gauge bisa berupa nilai atau callable yang dibaca saat scrape."""
+        with self._lock:
+            self._gauges[name] = fn_or_value
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Catat durasi blok ke histogram <stage>_seconds (aman dipakai di sekitar await)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{stage}_seconds", time.perf_counter() - t0)
+
+    # ---------- output ----------
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            hist = dict(self._hist)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        for name in sorted(hist):
+            full = f"{self.prefix}_{name}"
+            buckets, count, total = hist[name].snapshot()
+            lines.append(f"# TYPE {full} histogram")
+            for le, c in buckets:
+                lines.append(f'{full}_bucket{{le="{le}"}} {c}')
+            lines.append(f'{full}_bucket{{le="+Inf"}} {count}')
+            lines.append(f"{full}_sum {total}")
+            lines.append(f"{full}_count {count}")
+            for q, v in hist[name].quantiles().items():
+                lines.append(f'{full}_recent{{quantile="{q}"}} {v}')
+
+        for name in sorted(counters):
+            full = f"{self.prefix}_{name}_total"
+            lines.append(f"# TYPE {full} counter")
+            lines.append(f"{full} {counters[name]}")
+
+        for name in sorted(gauges):
+            full = f"{self.prefix}_{name}"
+            v = gauges[name]
+            try:
+                v = v() if callable(v) else v
+            except Exception:
+                continue
+            lines.append(f"# TYPE {full} gauge")
+            lines.append(f"{full} {v}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary_text(self) -> str:
+        """Ringkasan singkat untuk command /stats."""
+        with self._lock:
+            hist = dict(self._hist)
+            counters = dict(self._counters)
+        out = []
+        for name in sorted(hist):
+            h = hist[name]
+            q = h.quantiles()
+            if name.endswith("_seconds"):
+                out.append(
+                    f"{name[:-8]:<18} n={h.count:<6} p50={q[0.5] * 1000:7.1f}ms "
+                    f"p95={q[0.95] * 1000:7.1f}ms p99={q[0.99] * 1000:7.1f}ms"
+                )
+            else:
+                out.append(f"{name:<18} n={h.count:<6} p50={q[0.5]:7.0f} p95={q[0.95]:7.0f} p99={q[0.99]:7.0f}")
+        for name in sorted(counters):
+            out.append(f"{name:<18} {counters[name]}")
+        return "\n".join(out) or "(belum ada data)"
+
+
+metrics = MetricsRegistry()
+
+
+def start_metrics_server(host: str = "127.0.0.1", port: int = 8002, registry: MetricsRegistry = metrics):
+    """Endpoint GET /metrics (format teks Prometheus) di thread daemon."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
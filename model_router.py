@@ -0,0 +1,228 @@
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, AsyncIterator, Optional
+
+from dotenv import load_dotenv
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from llm_gateway import LLMUnavailable, prompt_text
+from metrics import metrics
+from prompt_assembly import estimate_tokens
+
+load_dotenv()
+
+# === Konfigurasi router model ===
+# MODEL_LADDER: urutan model dari yang utama ke fallback (lebih murah/cepat), dipisah koma,
+# opsional SLO latency per model dalam ms, mis.
+#   MODEL_LADDER=llama-3.3-70b-versatile:4000,llama-3.1-8b-instant:2000
+# Kosong -> hanya MODEL_NAME (perilaku lama). Kuota GROQ_RPM/GROQ_TPM berlaku per model.
+MODEL_LADDER = os.getenv("MODEL_LADDER", "").strip()
+ROUTER_SLO_MS = float(os.getenv("ROUTER_SLO_MS", "4000"))
+# Statistik latency/error per model hanya dari ROUTER_WINDOW_S detik terakhir,
+# jadi model yang sempat dilewati otomatis dicoba lagi setelah datanya kedaluwarsa.
+ROUTER_WINDOW_S = float(os.getenv("ROUTER_WINDOW_S", "300"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.3"))
+# Prompt kecil (estimasi token) langsung ke model termurah di ladder; 0 = mati
+ROUTER_SMALL_PROMPT_TOKENS = int(os.getenv("ROUTER_SMALL_PROMPT_TOKENS", "400"))
+
+
+def parse_ladder(spec: str, default_slo_ms: float = ROUTER_SLO_MS) -> list:
+    """'model-a:4000,model-b' -> [("model-a", 4.0), ("model-b", default_slo_ms/1000)]."""
+    out = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, slo = item.rpartition(":")
+        if not name or not slo.replace(".", "", 1).isdigit():
+            name, slo = item, ""
+        out.append((name, (float(slo) if slo else default_slo_ms) / 1000))
+    return out
+
+
+def _metric_name(model: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", model)
+
+
+class ModelRoute:
+    """Satu anak tangga ladder: model (LLMGateway) + latency/error terbaru."""
+
+    def __init__(self, name: str, llm, slo_s: float):
+        self.name = name
+        self.llm = llm
+        self.slo_s = slo_s
+        self._samples = deque(maxlen=1000)  # (waktu, detik, sukses)
+        self._lock = threading.Lock()
+        self.chosen = 0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds, ok))
+        metrics.observe(f"llm_{_metric_name(self.name)}_seconds", seconds)
+        if not ok:
+            metrics.inc(f"llm_{_metric_name(self.name)}_errors")
+
+    def window(self) -> list:
+        cutoff = time.monotonic() - ROUTER_WINDOW_S
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return list(self._samples)
+
+    def health(self) -> dict:
+        samples = self.window()
+        ok = sorted(s for _, s, good in samples if good)
+        p95 = ok[min(len(ok) - 1, int(0.95 * len(ok)))] if ok else None
+        errors = sum(1 for _, _, good in samples if not good)
+        return {"n": len(samples), "p95": p95, "error_rate": errors / len(samples) if samples else 0.0}
+
+    def breach(self, prompt: str) -> str:
+        """Alasan model ini dilewati, '' kalau sehat."""
+        h = self.health()
+        if h["n"] >= ROUTER_MIN_SAMPLES:
+            if h["error_rate"] > ROUTER_MAX_ERROR_RATE:
+                return f"error {h['error_rate']:.0%}"
+            if h["p95"] is not None and h["p95"] > self.slo_s:
+                return f"p95 {h['p95'] * 1000:.0f}ms > SLO {self.slo_s * 1000:.0f}ms"
+        wait = self.llm.queue_wait(prompt) if hasattr(self.llm, "queue_wait") else 0.0
+        if wait > self.slo_s:
+            return f"antre kuota {wait:.1f}s"
+        return ""
+
+
+def _degraded_rank(route: ModelRoute) -> tuple:
+    h = route.health()
+    return h["error_rate"], h["p95"] if h["p95"] is not None else float("inf")
+
+
+class ModelRouter(Runnable):
+    """
+    Pilih model per request dari ladder berdasarkan ukuran prompt, p95 latency
+    dan error rate terbaru tiap model, lalu turun ke model berikutnya kalau
+    model terpilih gagal (LLMUnavailable) sebelum sempat mengirim teks.
+    Setiap keputusan dicatat di log ([ROUTER]) dan di recent untuk /stats.
+    """
+
+    def __init__(self, routes: list, small_prompt_tokens: int = ROUTER_SMALL_PROMPT_TOKENS):
+        if not routes:
+            raise ValueError("ModelRouter butuh minimal 1 model")
+        self.routes = routes
+        self.small_prompt_tokens = small_prompt_tokens
+        self.recent = deque(maxlen=50)
+        self.fallbacks = 0
+
+    @property
+    def model_name(self) -> str:
+        return self.routes[0].name
+
+    # ---------- keputusan ----------
+    def has_headroom(self, prompt: str, reserve: float) -> bool:
+        """Semua model di ladder masih punya sisa kuota (lihat LLMGateway.has_headroom)."""
+        return all(r.llm.has_headroom(prompt, reserve) for r in self.routes if hasattr(r.llm, "has_headroom"))
+
+    def decide(self, prompt: str) -> list:
+        """Return urutan ModelRoute yang dicoba (pertama = pilihan utama)."""
+        tokens = estimate_tokens(prompt)
+        start, why = 0, "primary"
+        if len(self.routes) > 1 and self.small_prompt_tokens and tokens <= self.small_prompt_tokens:
+            start, why = len(self.routes) - 1, "prompt kecil"
+        # turun ke model yang lebih murah/cepat dulu, baru naik ke atas ladder
+        order = self.routes[start:] + self.routes[:start][::-1]
+
+        healthy, degraded, skipped = [], [], []
+        for route in order:
+            reason = route.breach(prompt)
+            if reason:
+                degraded.append(route)
+                skipped.append(f"{route.name} ({reason})")
+            else:
+                healthy.append(route)
+        if not healthy:
+            # semua melanggar SLO -> error rate terkecil dulu, lalu p95 terkecil; model tanpa
+            # sampel sukses (p95 None) paling belakang, jangan sampai model yang selalu gagal dipilih
+            degraded.sort(key=_degraded_rank)
+            why = "semua model degradasi"
+        elif healthy[0] is not order[0]:
+            why = "fallback SLO"
+        chosen = healthy + degraded
+
+        chosen[0].chosen += 1
+        metrics.inc(f"router_{_metric_name(chosen[0].name)}_chosen")
+        decision = {"model": chosen[0].name, "reason": why, "prompt_tokens": tokens, "skipped": skipped}
+        self.recent.append(decision)
+        if len(self.routes) > 1:
+            skip = f" | dilewati: {', '.join(skipped)}" if skipped else ""
+            print(f"[ROUTER] model={chosen[0].name} alasan={why} prompt~{tokens} tok{skip}")
+        return chosen
+
+    def _fallback(self, route: ModelRoute, nxt: ModelRoute, e: Exception) -> None:
+        self.fallbacks += 1
+        metrics.inc("router_fallbacks")
+        print(f"[ROUTER] {route.name} gagal ({e}), lanjut ke {nxt.name}")
+
+    # ---------- Runnable ----------
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        order = self.decide(prompt_text(input))
+        for i, route in enumerate(order):
+            t0 = time.perf_counter()
+            try:
+                result = route.llm.invoke(input, config, **kwargs)
+            except LLMUnavailable as e:
+                route.record(time.perf_counter() - t0, False)
+                if i == len(order) - 1:
+                    raise
+                self._fallback(route, order[i + 1], e)
+                continue
+            route.record(time.perf_counter() - t0, True)
+            return result
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        order = self.decide(prompt_text(input))
+        for i, route in enumerate(order):
+            t0 = time.perf_counter()
+            try:
+                result = await route.llm.ainvoke(input, config, **kwargs)
+            except LLMUnavailable as e:
+                route.record(time.perf_counter() - t0, False)
+                if i == len(order) - 1:
+                    raise
+                self._fallback(route, order[i + 1], e)
+                continue
+            route.record(time.perf_counter() - t0, True)
+            return result
+
+    async def astream(self, input, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator:
+        order = self.decide(prompt_text(input))
+        for i, route in enumerate(order):
+            t0 = time.perf_counter()
+            emitted = False
+            try:
+                async for chunk in route.llm.astream(input, config, **kwargs):
+                    emitted = True
+                    yield chunk
+            except LLMUnavailable as e:
+                route.record(time.perf_counter() - t0, False)
+                if emitted or i == len(order) - 1:
+                    raise
+                self._fallback(route, order[i + 1], e)
+                continue
+            route.record(time.perf_counter() - t0, True)
+            return
+
+    def stats(self) -> dict:
+        models = {}
+        for r in self.routes:
+            h = r.health()
+            models[r.name] = {
+                "chosen": r.chosen,
+                "n": h["n"],
+                "p95_ms": round(h["p95"] * 1000) if h["p95"] is not None else None,
+                "err": round(h["error_rate"], 3),
+                "slo_ms": round(r.slo_s * 1000),
+            }
+        reasons = Counter(d["reason"] for d in self.recent)
+        return {"models": models, "fallbacks": self.fallbacks, "recent_reasons": dict(reasons)}
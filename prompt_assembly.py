@@ -0,0 +1,158 @@
+import math
+import os
+import re
+
+# === Konfigurasi budget prompt ===
+# Estimasi token tanpa tokenizer: ~3.5 karakter per token untuk teks Indonesia di tokenizer Llama 3
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3.5"))
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "1200"))
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "300"))
+# Chunk peringkat teratas yang selalu dikirim utuh; sisanya dipangkas ke baris yang relevan
+PROMPT_FULL_CHUNKS = int(os.getenv("PROMPT_FULL_CHUNKS", "2"))
+# Jumlah baris tetangga yang ikut dipertahankan di sekitar baris yang cocok dengan pertanyaan
+PROMPT_LINE_WINDOW = int(os.getenv("PROMPT_LINE_WINDOW", "3"))
+# Panjang maksimum overlap antar chunk yang dicari (build_dataset.CHUNK_OVERLAP = 200)
+MAX_OVERLAP_CHARS = 400
+
+_WORD_RE = re.compile(r"[0-9a-zA-ZÀ-ɏ]+")
+_STOPWORDS = {
+    "yang", "dan", "untuk", "dengan", "dari", "ini", "itu", "ada", "apa", "apakah", "berapa",
+    "saya", "aku", "mau", "ingin", "bisa", "dong", "kak", "min", "mas", "mbak", "tolong",
+    "the", "and", "for", "atau", "juga", "kalau", "kalo", "nya", "pada", "akan", "sudah",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / PROMPT_CHARS_PER_TOKEN)
+
+
+def query_terms(text: str) -> set:
+    return {w for w in _WORD_RE.findall((text or "").lower()) if len(w) >= 3 and w not in _STOPWORDS}
+
+
+def _overlap_len(prev: str, text: str) -> int:
+    """Panjang ekor `prev` yang sama dengan awal `text` (overlap splitter), 0 kalau tidak ada."""
+    tail = prev[-MAX_OVERLAP_CHARS:]
+    probe = text[:40]
+    if len(probe) < 20:
+        return 0
+    pos = tail.find(probe)
+    while pos != -1:
+        overlap = len(tail) - pos
+        if text[:overlap] == tail[pos:]:
+            return overlap
+        pos = tail.find(probe, pos + 1)
+    return 0
+
+
+def dedupe_chunks(docs) -> list:
+    """
+    Buang chunk duplikat (teks sama / terkandung di chunk lain) dan potong overlap
+    antar chunk berurutan dari file yang sama. Urutan peringkat retriever dijaga.
+    """
+    kept = []  # (source, text, rank)
+    for rank, d in enumerate(docs):
+        text = (d.page_content or "").strip()
+        if not text:
+            continue
+        src = d.metadata.get("dataset_file") or d.metadata.get("source") or ""
+        if any(text in k[1] for k in kept):
+            continue
+        for i, (ksrc, ktext, krank) in enumerate(kept):
+            if ksrc != src:
+                continue
+            if ktext in text:
+                # chunk lama terkandung di chunk baru -> ganti dengan yang lebih lengkap
+                kept[i] = (ksrc, text, krank)
+                text = ""
+                break
+            # chunk baru sesudah chunk lama -> potong awalnya; sebelum -> potong ekornya
+            n = _overlap_len(ktext, text)
+            if n:
+                text = text[n:].lstrip()
+            else:
+                n = _overlap_len(text, ktext)
+                if n:
+                    text = text[:-n].rstrip()
+            if not text:
+                break
+        if text:
+            kept.append((src, text, rank))
+    return kept
+
+
+def compress_chunk(text: str, terms: set, window: int = PROMPT_LINE_WINDOW) -> str:
+    """Sisakan baris yang mengandung kata dari pertanyaan (+ tetangganya). '' kalau tidak ada yang cocok."""
+    lines = [ln for ln in text.splitlines() if ln.strip()]
+    if not terms or not lines:
+        return text
+    hits = [i for i, ln in enumerate(lines) if query_terms(ln) & terms]
+    if not hits:
+        return ""
+    keep = set()
+    for i in hits:
+        keep.update(range(max(0, i - window), min(len(lines), i + window + 1)))
+    out, last = [], -2
+    for i in sorted(keep):
+        if i != last + 1 and out:
+            out.append("...")
+        out.append(lines[i])
+        last = i
+    return "\n".join(out)
+
+
+def fit_history(turns, max_tokens: int = PROMPT_HISTORY_TOKENS) -> str:
+    """Ambil turn terakhir yang muat di budget (turn terbaru paling penting)."""
+    picked, used = [], 0
+    for q, a in reversed(list(turns)):
+        block = f"Pengguna: {q}\nBot: {a}"
+        cost = estimate_tokens(block)
+        if used + cost > max_tokens:
+            if not picked:
+                # turn terakhir tetap masuk walau dipotong
+                picked.append(block[: int(max_tokens * PROMPT_CHARS_PER_TOKEN)])
+            break
+        picked.append(block)
+        used += cost
+    return "\n".join(reversed(picked))
+
+
+def assemble_context(docs, question: str, max_tokens: int = PROMPT_CONTEXT_TOKENS,
+                     full_chunks: int = PROMPT_FULL_CHUNKS) -> tuple:
+    """
+    Susun teks konteks dari hasil retrieval dalam budget token.
+    Return (context_text, info) - info untuk metrics (chunk masuk/dibuang, token).
+    """
+    terms = query_terms(question)
+    parts, used = [], 0
+    info = {"retrieved": len(docs), "deduped": 0, "trimmed": 0, "dropped": 0, "used": 0, "tokens": 0}
+    chunks = dedupe_chunks(docs)
+    info["deduped"] = len(docs) - len(chunks)
+
+    for pos, (src, text, rank) in enumerate(chunks):
+        if pos >= full_chunks:
+            short = compress_chunk(text, terms)
+            if not short:
+                info["dropped"] += 1
+                continue
+            if short != text:
+                info["trimmed"] += 1
+            text = short
+
+        name = os.path.basename(src) if src else "dokumen"
+        block = f"[{name}]\n{text}"
+        cost = estimate_tokens(block)
+        if used + cost > max_tokens:
+            room = int((max_tokens - used) * PROMPT_CHARS_PER_TOKEN)
+            if room < 200:
+                info["dropped"] += len(chunks) - pos
+                break
+            block = block[:room].rsplit("\n", 1)[0]
+            cost = estimate_tokens(block)
+            info["trimmed"] += 1
+        parts.append(block)
+        used += cost
+        info["used"] += 1
+
+    info["tokens"] = used
+    return "\n\n".join(parts), info
@@ -68,6 +68,9 @@ def get_prompt():
     ### 📘 KONTEKS DOKUMEN
     {context}
 
+    ### 💬 PERCAKAPAN SEBELUMNYA
+    {history}
+
     ### ❓PERTANYAAN
     {question}
-    """)
+    """).partial(history="(tidak ada)")  # pemanggil tanpa riwayat (mis. main2.py) tetap jalan
@@ -0,0 +1,314 @@
+# Export / import snapshot index ke satu file pack, untuk menyiapkan replica bot
+# tanpa menyalin folder Chroma atau embed ulang semua PDF di data/.
+#
+#   python snapshot_pack.py export index.pack [--dtype int8]
+#   python snapshot_pack.py import index.pack
+#   python snapshot_pack.py info index.pack
+import gzip
+import hashlib
+import json
+import os
+import struct
+import time
+from pathlib import Path
+
+import numpy as np
+
+import index_store
+from build_dataset import (FLAT_INDEX, PROCESSED_FILE, _atomic_write_json, load_manifest,
+                           load_processed_files, open_collection)
+from embedding_service import EMBEDDING_MODEL
+from fact_index import FACT_NAME
+from flat_index import FlatIndex
+from lexical_index import LexicalIndex
+
+# ============================================================
+# Format file
+# ============================================================
+# [MAGIC][section][section]...[header JSON][u64 offset header][u32 panjang header][MAGIC]
+# Header ditulis di akhir (seperti zip), jadi export bisa streaming dan import cukup
+# seek ke footer. Section diratakan ke ALIGN byte supaya vektor bisa di-mmap langsung.
+PACK_MAGIC = b"CTAIPACK"
+PACK_FORMAT = "chatbot-travel-index"
+PACK_VERSION = 1
+ALIGN = 64
+_FOOTER = struct.Struct("<QI")
+PACK_DTYPES = ("float32", "int8")
+IMPORT_BATCH = int(os.getenv("PACK_IMPORT_BATCH", "1000"))
+
+
+class PackError(Exception):
+    """File pack tidak valid, rusak, atau tidak cocok dengan konfigurasi lokal."""
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple:
+    """Kuantisasi simetris per baris: x ≈ q * scale, q int8 di [-127, 127]."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    q = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return q, scales
+
+
+class _PackWriter:
+    def __init__(self, f):
+        self.f = f
+        self.sections = {}
+        f.write(PACK_MAGIC)
+
+    def _pad(self) -> None:
+        pad = -self.f.tell() % ALIGN
+        if pad:
+            self.f.write(b"\0" * pad)
+
+    def write(self, name: str, data: bytes, **info) -> None:
+        self._pad()
+        offset = self.f.tell()
+        self.f.write(data)
+        self.sections[name] = {"offset": offset, "length": len(data),
+                               "sha256": hashlib.sha256(data).hexdigest(), **info}
+
+    def finish(self, header: dict) -> None:
+        header = dict(header, sections=self.sections)
+        raw = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        offset = self.f.tell()
+        self.f.write(raw)
+        self.f.write(_FOOTER.pack(offset, len(raw)))
+        self.f.write(PACK_MAGIC)
+
+
+def _json_gz(data) -> bytes:
+    return gzip.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), mtime=0)
+
+
+# ============================================================
+# Export
+# ============================================================
+def export_pack(out_path: Path, dtype: str = "float32", index_dir: Path = None) -> dict:
+    """
+    Tulis snapshot aktif (atau index_dir) ke satu file pack. Return header.
+    Isi: vektor (float32 / int8 + skala per baris), teks + metadata chunk, manifest,
+    processed_files.json, fact_index.json dan ID model embedding; tiap section ber-sha256.
+    """
+    if dtype not in PACK_DTYPES:
+        raise PackError(f"dtype {dtype} tidak didukung (pilih {PACK_DTYPES})")
+    t0 = time.perf_counter()
+    index_dir = Path(index_dir or index_store.current_index_dir())
+    if not index_dir.exists():
+        raise PackError(f"index tidak ditemukan: {index_dir}")
+    meta = index_store.current_meta() if index_dir == index_store.current_index_dir() else {}
+    model = meta.get("embedding_model")
+    if not model:
+        print(f"[WARN] snapshot tidak mencatat model embedding, dianggap {EMBEDDING_MODEL}")
+        model = EMBEDDING_MODEL
+
+    flat = FlatIndex.from_collection(open_collection(index_dir))
+    if not len(flat):
+        raise PackError(f"collection di {index_dir} kosong")
+    manifest_path = index_dir / index_store.MANIFEST_NAME
+    if not manifest_path.exists():
+        manifest_path = index_store.current_manifest_path()
+    facts_path = index_dir / FACT_NAME
+
+    out_path = Path(out_path)
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        w = _PackWriter(f)
+        matrix = np.ascontiguousarray(flat.matrix, dtype=np.float32)
+        if dtype == "int8":
+            q, scales = quantize_int8(matrix)
+            w.write("vectors", q.tobytes(), dtype="int8", shape=list(q.shape))
+            w.write("scales", scales.tobytes(), dtype="float32", shape=list(scales.shape))
+        else:
+            w.write("vectors", matrix.tobytes(), dtype="float32", shape=list(matrix.shape))
+        # satu baris JSON per chunk, urutannya sama dengan baris vektor
+        lines = "\n".join(json.dumps({"id": cid, "text": text, "meta": m}, ensure_ascii=False)
+                          for cid, text, m in zip(flat.ids, flat.documents, flat.metadatas))
+        w.write("chunks", gzip.compress(lines.encode("utf-8"), mtime=0), encoding="jsonl+gzip")
+        w.write("manifest", _json_gz(load_manifest(manifest_path)), encoding="json+gzip")
+        w.write("processed", _json_gz(sorted(load_processed_files())), encoding="json+gzip")
+        if facts_path.exists():
+            w.write("facts", gzip.compress(facts_path.read_bytes(), mtime=0), encoding="json+gzip")
+        header = {
+            "format": PACK_FORMAT,
+            "version": PACK_VERSION,
+            "created_at": time.time(),
+            "source_snapshot": meta.get("name") or index_dir.name,
+            "embedding_model": model,
+            "space": flat.space,
+            "count": len(flat),
+            "dim": int(matrix.shape[1]),
+            "dtype": dtype,
+        }
+        w.finish(header)
+    os.replace(tmp, out_path)
+    header["sections"] = w.sections
+    header["bytes"] = out_path.stat().st_size
+    header["seconds"] = round(time.perf_counter() - t0, 3)
+    return header
+
+
+# ============================================================
+# Import
+# ============================================================
+def read_header(path: Path) -> dict:
+    path = Path(path)
+    with open(path, "rb") as f:
+        if f.read(len(PACK_MAGIC)) != PACK_MAGIC:
+            raise PackError(f"{path} bukan file pack index")
+        size = path.stat().st_size
+        f.seek(max(0, size - _FOOTER.size - len(PACK_MAGIC)))
+        footer = f.read(_FOOTER.size)
+        if size < 2 * len(PACK_MAGIC) + _FOOTER.size or f.read(len(PACK_MAGIC)) != PACK_MAGIC:
+            raise PackError(f"{path} terpotong (footer tidak ditemukan)")
+        offset, length = _FOOTER.unpack(footer)
+        f.seek(offset)
+        try:
+            header = json.loads(f.read(length).decode("utf-8"))
+        except ValueError as e:
+            raise PackError(f"header pack rusak: {e}")
+    if header.get("format") != PACK_FORMAT or header.get("version") != PACK_VERSION:
+        raise PackError(f"format/versi pack tidak didukung: {header.get('format')} v{header.get('version')}")
+    return header
+
+
+def verify_pack(path: Path, header: dict, bufsize: int = 1024 * 1024) -> None:
+    """Cek sha256 setiap section (dibaca streaming, tidak dimuat utuh ke memori)."""
+    with open(path, "rb") as f:
+        for name, sec in header["sections"].items():
+            f.seek(sec["offset"])
+            h, left = hashlib.sha256(), sec["length"]
+            while left > 0:
+                buf = f.read(min(bufsize, left))
+                if not buf:
+                    break
+                h.update(buf)
+                left -= len(buf)
+            if left or h.hexdigest() != sec["sha256"]:
+                raise PackError(f"checksum section '{name}' tidak cocok, file pack rusak")
+
+
+def _read_section(path: Path, sec: dict) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(sec["offset"])
+        return f.read(sec["length"])
+
+
+def _vectors(path: Path, header: dict, start: int, stop: int) -> np.ndarray:
+    """Baris [start, stop) sebagai float32; file vektor di-mmap, int8 didekuantisasi per batch."""
+    sec = header["sections"]["vectors"]
+    mm = np.memmap(path, dtype=sec["dtype"], mode="r", offset=sec["offset"], shape=tuple(sec["shape"]))
+    rows = np.asarray(mm[start:stop], dtype=np.float32)
+    if sec["dtype"] == "int8":
+        ssec = header["sections"]["scales"]
+        scales = np.memmap(path, dtype=np.float32, mode="r", offset=ssec["offset"], shape=tuple(ssec["shape"]))
+        rows *= np.asarray(scales[start:stop])[:, None]
+    return rows
+
+
+def import_pack(path: Path, allow_model_mismatch: bool = False, batch: int = IMPORT_BATCH) -> dict:
+    """
+    Buat snapshot baru dari file pack lalu jadikan CURRENT (bot reload lewat watcher).
+    Pack yang checksum-nya salah atau dibuat dengan EMBEDDING_MODEL lain ditolak.
+    Vektor langsung ditulis ke Chroma (tanpa embed ulang), index BM25 disusun dari teks
+    chunk, index flat ditulis langsung dari vektor pack kalau RETRIEVER_BACKEND=flat.
+    """
+    t0 = time.perf_counter()
+    path = Path(path)
+    header = read_header(path)
+    if header["embedding_model"] != EMBEDDING_MODEL and not allow_model_mismatch:
+        raise PackError(f"pack dibuat dengan model embedding {header['embedding_model']}, "
+                        f"bot memakai {EMBEDDING_MODEL}; import dibatalkan")
+    verify_pack(path, header)
+    verify_s = time.perf_counter() - t0
+
+    sections = header["sections"]
+    chunks = [json.loads(line) for line in
+              gzip.decompress(_read_section(path, sections["chunks"])).decode("utf-8").splitlines() if line]
+    if len(chunks) != header["count"]:
+        raise PackError(f"jumlah chunk {len(chunks)} != {header['count']} di header")
+
+    with index_store.staging(copy=False) as snap:
+        collection = open_collection(snap.path, space=header["space"])
+        lex = LexicalIndex()
+        for i in range(0, len(chunks), batch):
+            part = chunks[i:i + batch]
+            collection.upsert(
+                ids=[c["id"] for c in part],
+                embeddings=_vectors(path, header, i, i + len(part)),
+                documents=[c["text"] for c in part],
+                metadatas=[c["meta"] for c in part],
+            )
+            for c in part:
+                lex.add(c["id"], c["text"] or "")
+        lex.save(snap.path)
+
+        # index flat langsung dari pack (sama dengan isi collection), hanya untuk backend flat
+        if FLAT_INDEX:
+            flat = FlatIndex(_vectors(path, header, 0, len(chunks)), [c["id"] for c in chunks],
+                             [c["text"] for c in chunks], [c["meta"] or {} for c in chunks], header["space"])
+            flat.save(snap.path)
+
+        if "facts" in sections:
+            (snap.path / FACT_NAME).write_bytes(gzip.decompress(_read_section(path, sections["facts"])))
+        manifest = json.loads(gzip.decompress(_read_section(path, sections["manifest"])))
+        # file dataset-nya tidak ikut di pack: tandai supaya build lokal tidak menganggapnya
+        # "sudah dihapus dari data/" (lihat build_dataset.run_build)
+        for entry in manifest.get("files", {}).values():
+            entry["imported"] = True
+        _atomic_write_json(snap.manifest_path, manifest)
+
+        snap.publish({"imported_from": path.name, "source_snapshot": header.get("source_snapshot"),
+                      "chunks": len(chunks), "dtype": header["dtype"]}, imported=True)
+        # processed_files.json setelah CURRENT pindah, supaya build berikutnya melihat dataset yang sama
+        _atomic_write_json(PROCESSED_FILE, json.loads(gzip.decompress(_read_section(path, sections["processed"]))))
+
+    return {
+        "snapshot": snap.name,
+        "chunks": len(chunks),
+        "dtype": header["dtype"],
+        "embedding_model": header["embedding_model"],
+        "verify_s": round(verify_s, 3),
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export/import snapshot index ke satu file pack")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export")
+    ex.add_argument("path")
+    ex.add_argument("--dtype", choices=PACK_DTYPES, default="float32",
+                    help="int8 = ~4x lebih kecil, vektor sedikit lossy (skala per baris)")
+    im = sub.add_parser("import")
+    im.add_argument("path")
+    im.add_argument("--allow-model-mismatch", action="store_true",
+                    help="tetap import walau EMBEDDING_MODEL berbeda (hasil retrieval tidak valid)")
+    info = sub.add_parser("info")
+    info.add_argument("path")
+    args = parser.parse_args()
+
+    try:
+        if args.cmd == "export":
+            h = export_pack(Path(args.path), dtype=args.dtype)
+            print(f"[OK] {args.path}: {h['count']} chunk dim={h['dim']} {h['dtype']} model={h['embedding_model']} "
+                  f"| {h['bytes'] / 1e6:.2f} MB | {h['seconds']:.2f}s")
+        elif args.cmd == "import":
+            st = import_pack(Path(args.path), allow_model_mismatch=args.allow_model_mismatch)
+            print(f"[OK] CURRENT -> {st['snapshot']}: {st['chunks']} chunk ({st['dtype']}) "
+                  f"| verifikasi {st['verify_s']:.2f}s | total {st['seconds']:.2f}s")
+        elif args.cmd == "info":
+            h = read_header(Path(args.path))
+            verify_pack(Path(args.path), h)
+            print(json.dumps({k: v for k, v in h.items() if k != "sections"}, ensure_ascii=False, indent=2))
+            for name, sec in h["sections"].items():
+                print(f"[STAT] {name:<9} {sec['length'] / 1e6:8.3f} MB  sha256={sec['sha256'][:16]}…")
+            print("[OK] checksum cocok")
+    except PackError as e:
+        print(f"[ERROR] {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()